@@ -8,18 +8,44 @@ from flask_cors import CORS
 from sqlalchemy import inspect
 from datetime import datetime
 import os
+import re
 
 from app.models import db, bcrypt, SuperAdmin, Admin, User
+from app.serialization import JSONProvider
+from app.compression import init_compression
+from app import tenant_version  # noqa: F401 - registers the data-version mapper events
+from app.subscription_cache import subscription_cache, get_subscription_state
+from app.analytics_cache import analytics_cache, make_backend
 from config import Config
 
 jwt = JWTManager()
 migrate = Migrate()
 
+IGNORED_METHODS = {"HEAD", "OPTIONS"}
+
+
+def find_route_collisions(url_map):
+    """
+    Rules that map the same path and method to different endpoints. Only the
+    first registered one is ever reachable, so every hit is a dead route.
+    Returns {(path, method): [endpoint, ...]}.
+    """
+    seen = {}
+    for rule in url_map.iter_rules():
+        # "/jobs/<int:job_id>" and "/jobs/<int:id>" match the same URLs
+        path = re.sub(r"<(?:([^:<>]+):)?[^<>]+>", lambda m: f"<{m.group(1) or 'default'}>", rule.rule)
+        for method in rule.methods - IGNORED_METHODS:
+            seen.setdefault((path, method), []).append(rule.endpoint)
+    return {key: endpoints for key, endpoints in seen.items() if len(endpoints) > 1}
+
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # orjson when installed; ISO 8601 datetimes either way
+    app.json = JSONProvider(app)
+
     # ---------------------------
     # INITIALIZE EXTENSIONS
     # ---------------------------
@@ -28,6 +54,20 @@ def create_app(config_class=Config):
     jwt.init_app(app)
     migrate.init_app(app, db)
     CORS(app)
+    init_compression(app)
+
+    subscription_cache.configure(
+        ttl=app.config.get("SUBSCRIPTION_CACHE_TTL", 60),
+        maxsize=app.config.get("SUBSCRIPTION_CACHE_SIZE", 10000)
+    )
+    analytics_cache.configure(
+        backend=make_backend(
+            app.config.get("ANALYTICS_CACHE_BACKEND", "memory"),
+            url=app.config.get("ANALYTICS_CACHE_URL"),
+            maxsize=app.config.get("ANALYTICS_CACHE_SIZE", 2048)
+        ),
+        ttl=app.config.get("ANALYTICS_CACHE_TTL", 300)
+    )
 
     # ==========================================================
     # 🔥 GLOBAL TOKEN VALIDATION FOR ADMIN EXPIRY & USER BLOCKING
@@ -50,20 +90,21 @@ def create_app(config_class=Config):
 
         role = jwt_data.get("role")
 
+        # Cached (is_active, admin_id, admin_expiry); a DB hit only on a miss
+        state = get_subscription_state(role, identity)
+        today = datetime.utcnow().date()
+
         # --- ADMIN LOGIN CHECK ---
         if role == "admin":
-            admin = Admin.query.get(int(identity))
-            if admin and admin.expiry_date and admin.expiry_date < datetime.utcnow().date():
+            if state.admin_expiry and state.admin_expiry < today:
                 return jsonify({"error": "Admin subscription expired"}), 403
 
         # --- USER LOGIN CHECK ---
         elif role == "user":
-            user = User.query.get(int(identity))
-            if not user:
+            if state.admin_id is None:
                 return jsonify({"error": "Invalid user"}), 403
 
-            admin = Admin.query.get(user.admin_id)
-            if admin and admin.expiry_date and admin.expiry_date < datetime.utcnow().date():
+            if state.admin_expiry and state.admin_expiry < today:
                 return jsonify({"error": "Your admin subscription has expired"}), 403
 
         return  # Allow request
@@ -96,6 +137,12 @@ def create_app(config_class=Config):
     app.register_blueprint(admin_performance_bp)
     app.register_blueprint(admin_dashboard_bp)
 
+    # ---------------------------
+    # CLI MAINTENANCE COMMANDS
+    # ---------------------------
+    from app.commands import register_commands
+    register_commands(app)
+
 
     # ---------------------------
     # INITIAL DATABASE SETUP
@@ -140,4 +187,13 @@ def create_app(config_class=Config):
     def admin_static(filename):
         return send_from_directory(os.path.join(FRONTEND_PATH, "admin"), filename)
 
+    # ---------------------------
+    # ROUTE COLLISION CHECK
+    # ---------------------------
+    # Fail fast: of two views on one URL only the first registered is reachable
+    collisions = find_route_collisions(app.url_map)
+    if collisions:
+        details = "; ".join(f"{method} {path} -> {', '.join(eps)}" for (path, method), eps in sorted(collisions.items()))
+        raise RuntimeError(f"Conflicting routes registered: {details}")
+
     return app
@@ -0,0 +1,87 @@
+# app/activity_logs.py
+"""
+Filters shared by the activity log listings.
+
+    ?actor_role=admin&actor_id=7        who did it
+    ?target_type=user&target_id=42      what it was done to
+    ?since=2026-10-01T00:00:00          time range, ISO 8601, [since, until)
+    ?until=2026-10-17
+
+Listings page newest first on (timestamp, id) with ?cursor= (app/pagination.py).
+Each actor or target filter lands on one of the composite indexes
+(actor_role, actor_id, timestamp, id) and (target_type, target_id, timestamp, id),
+so a page stays one short index range scan however large the log grows.
+Malformed values raise InvalidLogFilter (answered with 400).
+"""
+from datetime import datetime, timezone
+
+from flask import request
+
+from app.models import ActivityLog, UserRole
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+
+class InvalidLogFilter(ValueError):
+    pass
+
+
+def _int_arg(name):
+    value = request.args.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise InvalidLogFilter(f"{name} must be an integer")
+
+
+def _datetime_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+    except ValueError:
+        raise InvalidLogFilter(f"{name} must be an ISO 8601 date or datetime")
+    # Stored timestamps are naive UTC
+    if dt.tzinfo:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def log_per_page(default=DEFAULT_PER_PAGE):
+    per_page = request.args.get("per_page", default, type=int)
+    return min(max(per_page, 1), MAX_PER_PAGE)
+
+
+def filter_activity_logs(query, allowed=("actor_role", "actor_id", "target_type", "target_id")):
+    """Apply the ?actor_* / ?target_* filters named in `allowed` and the time range to `query`."""
+    if "actor_role" in allowed and request.args.get("actor_role"):
+        try:
+            role = UserRole(request.args["actor_role"])
+        except ValueError:
+            raise InvalidLogFilter(f"actor_role must be one of {[r.value for r in UserRole]}")
+        query = query.filter(ActivityLog.actor_role == role)
+
+    if "actor_id" in allowed:
+        actor_id = _int_arg("actor_id")
+        if actor_id is not None:
+            query = query.filter(ActivityLog.actor_id == actor_id)
+
+    if "target_type" in allowed and request.args.get("target_type"):
+        query = query.filter(ActivityLog.target_type == request.args["target_type"])
+
+    if "target_id" in allowed:
+        target_id = _int_arg("target_id")
+        if target_id is not None:
+            query = query.filter(ActivityLog.target_id == target_id)
+
+    since, until = _datetime_arg("since"), _datetime_arg("until")
+    if since:
+        query = query.filter(ActivityLog.timestamp >= since)
+    if until:
+        query = query.filter(ActivityLog.timestamp < until)
+
+    return query
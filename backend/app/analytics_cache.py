@@ -0,0 +1,256 @@
+# app/analytics_cache.py
+"""
+Per-tenant cache of the dashboard aggregate responses.
+
+Entries are keyed by
+
+    analytics:<admin id>:<data version>:<UTC date>:<endpoint>:<params hash>
+
+where the params are the URL's path parameters and query string.
+
+The data version is the tenant's generation counter (admins.data_version,
+app/tenant_version.py). Sync and the other writers bump it in the
+transaction that commits their rows, so every worker stops reading the old
+entries the moment the rows are visible; nothing has to be deleted. The
+UTC date rolls "today" windows over at midnight, and ANALYTICS_CACHE_TTL
+bounds how long an entry can live at all.
+
+Backends (ANALYTICS_CACHE_BACKEND):
+
+    memory      in-process TTL/LRU, per worker (default)
+    redis       shared; any redis-py compatible client (ANALYTICS_CACHE_URL)
+    fakeredis   FakeRedis below, an in-process stand-in for tests and benchmarks
+    none        disabled
+
+Hit/miss counters are per process; see AnalyticsCache.stats().
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, request
+from flask_jwt_extended import get_jwt, get_jwt_identity
+
+from app.tenant_version import request_data_version
+
+try:
+    import redis
+except ImportError:  # optional; only needed for the redis backend
+    redis = None
+
+
+# -------------------------
+# Backends
+# -------------------------
+class MemoryBackend:
+    """Thread-safe TTL/LRU dict of bytes."""
+    name = "memory"
+
+    def __init__(self, maxsize=2048):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def size(self):
+        return len(self._data)
+
+
+class RedisBackend:
+    """Backend over a redis-py compatible client (get / set(ex=) / delete / scan_iter)."""
+    name = "redis"
+
+    def __init__(self, client, prefix="analytics:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl):
+        self.client.set(key, value, ex=ttl)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def size(self):
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + "*"))
+
+
+class FakeRedis:
+    """The subset of the redis-py client RedisBackend uses, in process memory."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        item = self._data.get(key)
+        if item is not None and item[0] is not None and item[0] < time.monotonic():
+            del self._data[key]
+            return None
+        return item
+
+    def get(self, name):
+        with self._lock:
+            item = self._live(name)
+            return item[1] if item else None
+
+    def set(self, name, value, ex=None):
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        with self._lock:
+            self._data[name] = (time.monotonic() + ex if ex else None, value)
+        return True
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(1 for name in names if self._data.pop(name, None) is not None)
+
+    def scan_iter(self, match=None):
+        prefix = match[:-1] if match and match.endswith("*") else match
+        with self._lock:
+            keys = [k for k in list(self._data) if self._live(k) and (prefix is None or k.startswith(prefix))]
+        return iter(keys)
+
+    def flushdb(self):
+        with self._lock:
+            self._data.clear()
+
+
+def make_backend(name, url=None, maxsize=2048):
+    if name in (None, "", "none"):
+        return None
+    if name == "memory":
+        return MemoryBackend(maxsize=maxsize)
+    if name == "fakeredis":
+        return RedisBackend(FakeRedis())
+    if name == "redis":
+        if redis is None:
+            raise RuntimeError("ANALYTICS_CACHE_BACKEND=redis needs the redis package")
+        return RedisBackend(redis.Redis.from_url(url))
+    raise ValueError(f"Unknown analytics cache backend: {name}")
+
+
+# -------------------------
+# Cache
+# -------------------------
+class AnalyticsCache:
+    def __init__(self, backend=None, ttl=300):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def configure(self, backend=None, ttl=None):
+        self.backend = backend
+        if ttl is not None:
+            self.ttl = ttl
+        self.reset_stats()
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key):
+        try:
+            value = self.backend.get(key)
+        except Exception:
+            # A cache outage must not take the dashboards down with it
+            current_app.logger.exception("analytics cache get failed")
+            self._count("errors")
+            value = None
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key, value):
+        try:
+            self.backend.set(key, value, self.ttl)
+        except Exception:
+            current_app.logger.exception("analytics cache set failed")
+            self._count("errors")
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.errors = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name if self.backend else None,
+            "ttl": self.ttl,
+            "entries": self.backend.size() if self.backend else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+analytics_cache = AnalyticsCache()
+
+
+def cache_key(admin_id, data_version, endpoint):
+    # Path parameters (/trend/users/<user_id>) as well as the query string
+    params = "&".join(
+        f"{k}={v}" for k, v in sorted((request.view_args or {}).items()) + sorted(request.args.items(multi=True))
+    )
+    digest = hashlib.sha1(params.encode("utf-8")).hexdigest()[:16]
+    return f"analytics:{admin_id}:{data_version.version}:{datetime.utcnow():%Y%m%d}:{endpoint}:{digest}"
+
+
+def tenant_cached(fn):
+    """
+    Serve an admin's GET from the analytics cache, or run the view and keep
+    its 200 JSON body. Goes under @jwt_required() (and @tenant_conditional).
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if analytics_cache.backend is None or get_jwt().get("role") != "admin":
+            return fn(*args, **kwargs)
+
+        admin_id = int(get_jwt_identity())
+        data_version = request_data_version(admin_id)
+        if data_version is None:
+            return fn(*args, **kwargs)
+
+        key = cache_key(admin_id, data_version, request.endpoint)
+        body = analytics_cache.get(key)
+        if body is not None:
+            return current_app.response_class(body, mimetype="application/json")
+
+        response = current_app.make_response(fn(*args, **kwargs))
+        if response.status_code == 200 and response.mimetype == "application/json":
+            analytics_cache.set(key, response.get_data())
+        return response
+
+    return wrapper
@@ -0,0 +1,74 @@
+# app/commands.py
+"""
+Maintenance commands, run with the Flask CLI from the backend directory:
+
+    FLASK_APP=wsgi flask backfill-call-fingerprints --chunk-size 2000
+"""
+import click
+
+from app.ingest import backfill_call_fingerprints
+from app.number_search import backfill_number_digits, ensure_search_indexes
+from app.performance_snapshots import snapshot_performance
+from app.query_plans import run_plan_checks
+from app.rollups import rebuild_call_rollups
+from app.user_counters import reconcile_user_counters
+
+
+def register_commands(app):
+    """Attach the maintenance commands to `app.cli`."""
+
+    @app.cli.command("backfill-call-fingerprints")
+    @click.option("--chunk-size", default=1000, show_default=True, help="Rows per transaction.")
+    def backfill_call_fingerprints_command(chunk_size):
+        """Fingerprint call_history rows still missing one and delete duplicates."""
+        updated, deleted, skipped = backfill_call_fingerprints(chunk_size=chunk_size, log=click.echo)
+        click.echo(f"Done: {updated} fingerprinted, {deleted} duplicates deleted, {skipped} skipped (no timestamp)")
+
+    @app.cli.command("rebuild-call-rollups")
+    @click.option("--user-id", "user_ids", type=int, multiple=True, help="Limit to these users (repeatable).")
+    @click.option("--admin-id", type=int, default=None, help="Limit to one admin's users.")
+    def rebuild_call_rollups_command(user_ids, admin_id):
+        """Recompute call_daily_rollups from raw call_history."""
+        rebuilt = rebuild_call_rollups(user_ids=list(user_ids), admin_id=admin_id, log=click.echo)
+        click.echo(f"Done: rebuilt rollups for {rebuilt} users")
+
+    @app.cli.command("backfill-number-digits")
+    @click.option("--chunk-size", default=1000, show_default=True, help="Rows per transaction.")
+    def backfill_number_digits_command(chunk_size):
+        """Fill the normalized number search columns and ensure their indexes."""
+        ensure_search_indexes(log=click.echo)
+        updated = backfill_number_digits(chunk_size=chunk_size, log=click.echo)
+        click.echo(f"Done: {updated} rows normalized")
+
+    @app.cli.command("reconcile-user-counters")
+    @click.option("--user-id", "user_ids", type=int, multiple=True, help="Limit to these users (repeatable).")
+    @click.option("--admin-id", type=int, default=None, help="Limit to one admin's users.")
+    def reconcile_user_counters_command(user_ids, admin_id):
+        """Recount users.call_count / attendance_count and repair drift (safe to run from cron)."""
+        checked, repaired = reconcile_user_counters(user_ids=list(user_ids), admin_id=admin_id, log=click.echo)
+        click.echo(f"Done: {checked} users checked, {repaired} repaired")
+
+    @app.cli.command("snapshot-performance")
+    @click.option("--admin-id", "admin_ids", type=int, multiple=True, help="Limit to these admins (repeatable).")
+    def snapshot_performance_command(admin_ids):
+        """Recalculate performance scores and store today's snapshot (run daily)."""
+        users = snapshot_performance(admin_ids=list(admin_ids), log=click.echo)
+        click.echo(f"Done: {users} users snapshotted")
+
+    @app.cli.command("explain-check")
+    @click.option("--user-id", type=int, default=None, help="User to plan per-user queries for.")
+    @click.option("--verbose", is_flag=True, help="Print every plan, not only failures.")
+    def explain_check_command(user_id, verbose):
+        """EXPLAIN the hot queries and fail if one doesn't use its expected index."""
+        results = run_plan_checks(user_id=user_id)
+        for r in results:
+            click.echo(f"{'ok  ' if r.ok else 'FAIL'} {r.name}")
+            if verbose or not r.ok:
+                click.echo(f"     expected one of: {', '.join(r.expected)}")
+                for line in r.plan.splitlines():
+                    click.echo(f"     | {line}")
+
+        failed = sum(1 for r in results if not r.ok)
+        click.echo(f"{len(results) - failed}/{len(results)} plans use their expected index")
+        if failed:
+            raise SystemExit(1)
@@ -0,0 +1,183 @@
+# app/compression.py
+"""
+HTTP compression, both directions.
+
+Responses: buffered responses of a compressible type and at least
+COMPRESS_MIN_SIZE bytes are encoded with the best of br / gzip the client
+accepts (br only when the optional `brotli` package is installed). Streamed
+responses (the CSV/NDJSON exports), files and anything already encoded pass
+through untouched.
+
+Request bodies: views decorated with @accepts_compressed_body take a
+`Content-Encoding: gzip` (or `zstd`, with the optional `zstandard` package)
+body. It is inflated chunk by chunk and refused with 413 as soon as it
+grows past SYNC_MAX_DECOMPRESSED_BYTES, so a small zip bomb can't make the
+worker allocate more than that.
+"""
+import gzip
+import io
+import zlib
+from functools import wraps
+
+from flask import current_app, jsonify, request
+from werkzeug.wsgi import get_input_stream
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip only
+    zstandard = None
+
+# Compressed bytes read / decompressed bytes produced per step
+DECODE_CHUNK_SIZE = 64 * 1024
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/x-ndjson",
+    "image/svg+xml",
+}
+
+
+def _compressible(response):
+    mimetype = response.mimetype or ""
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES
+
+
+def _encode(data, encoding, config):
+    if encoding == "br":
+        return brotli.compress(data, quality=config.get("COMPRESS_BROTLI_QUALITY", 5))
+    return gzip.compress(data, compresslevel=config.get("COMPRESS_GZIP_LEVEL", 6), mtime=0)
+
+
+def init_compression(app):
+    min_size = app.config.get("COMPRESS_MIN_SIZE", 1024)
+    encodings = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or not 200 <= response.status_code < 300
+            or response.status_code == 204
+            or "Content-Encoding" in response.headers
+            or not _compressible(response)
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        encoding = request.accept_encodings.best_match(encodings)
+        if not encoding:
+            return response
+
+        response.set_data(_encode(data, encoding, app.config))
+        response.headers["Content-Encoding"] = encoding
+        # A strong validator names one exact representation
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(f"{etag}-{encoding}")
+        return response
+
+
+# -------------------------
+# Request bodies
+# -------------------------
+class BodyTooLarge(Exception):
+    pass
+
+
+def _gunzip_chunks(stream):
+    # 16 + MAX_WBITS: gzip header and trailer required
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    while not decoder.eof:
+        data = stream.read(DECODE_CHUNK_SIZE)
+        if not data:
+            raise zlib.error("truncated gzip body")
+        while data and not decoder.eof:
+            # max_length bounds each step's output; the rest waits in unconsumed_tail
+            yield decoder.decompress(data, DECODE_CHUNK_SIZE)
+            data = decoder.unconsumed_tail
+
+
+def _unzstd_chunks(stream):
+    with zstandard.ZstdDecompressor().stream_reader(stream, closefd=False) as reader:
+        while True:
+            data = reader.read(DECODE_CHUNK_SIZE)
+            if not data:
+                return
+            yield data
+
+
+REQUEST_DECODERS = {"gzip": _gunzip_chunks, "x-gzip": _gunzip_chunks}
+DECODE_ERRORS = (zlib.error, EOFError)
+if zstandard is not None:
+    REQUEST_DECODERS["zstd"] = _unzstd_chunks
+    DECODE_ERRORS += (zstandard.ZstdError,)
+
+
+def _inflate(chunks, max_size):
+    body = bytearray()
+    for chunk in chunks:
+        body += chunk
+        if len(body) > max_size:
+            raise BodyTooLarge()
+    return bytes(body)
+
+
+def decode_request_body():
+    """
+    Replace the current request's compressed body with its decoded bytes.
+    Returns None on success (or for an uncompressed body), otherwise the
+    error response to send.
+    """
+    encoding = (request.headers.get("Content-Encoding") or "").strip().lower()
+    if encoding in ("", "identity"):
+        return None
+
+    decoder = REQUEST_DECODERS.get(encoding)
+    if decoder is None:
+        return jsonify({
+            "error": f"Unsupported Content-Encoding '{encoding}'",
+            "supported": sorted(REQUEST_DECODERS),
+        }), 415
+
+    max_size = current_app.config.get("SYNC_MAX_DECOMPRESSED_BYTES", 32 * 1024 * 1024)
+    environ = request.environ
+    stream = get_input_stream(environ, max_content_length=current_app.config.get("MAX_CONTENT_LENGTH"))
+
+    try:
+        body = _inflate(decoder(stream), max_size)
+    except BodyTooLarge:
+        return jsonify({"error": f"Decompressed body exceeds {max_size} bytes"}), 413
+    except DECODE_ERRORS:
+        return jsonify({"error": f"Malformed {encoding} body"}), 400
+
+    environ["wsgi.input"] = io.BytesIO(body)
+    environ["CONTENT_LENGTH"] = str(len(body))
+    environ.pop("HTTP_CONTENT_ENCODING", None)
+    # Werkzeug caches these on first access; make them re-read the new body
+    cached = request._get_current_object().__dict__
+    for name in ("stream", "content_length", "content_encoding", "_cached_data"):
+        cached.pop(name, None)
+    return None
+
+
+def accepts_compressed_body(fn):
+    """Let a view's request body arrive gzip/zstd encoded. Goes under @jwt_required()."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        error = decode_request_body()
+        if error is not None:
+            return error
+        return fn(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,72 @@
+# app/fieldsets.py
+"""
+Sparse fieldsets and the columnar response shape for list endpoints.
+
+An endpoint describes what it can return as a FieldSet (output key -> column,
+in response order). The listing query is narrowed to the requested columns
+with `with_entities`, so rows come back as plain Core rows instead of ORM
+objects. Values are passed through as-is; the app's JSON provider formats
+datetimes (app/serialization.py).
+
+    ?fields=id,phone_number,timestamp     only these keys (default: all)
+    ?shape=columns                        {"columns": [...], "rows": [[...], ...]}
+                                          instead of a list of objects
+
+Unknown field names raise InvalidFields (answered with 400).
+"""
+from flask import request
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def columnar_requested():
+    return request.args.get("shape") == "columns"
+
+
+class FieldSet:
+    def __init__(self, columns):
+        """`columns` is an ordered mapping of output key -> column expression."""
+        self.columns = dict(columns)
+
+    def requested(self):
+        """Keys named by ?fields= in request order, or all of them."""
+        raw = request.args.get("fields")
+        if raw is None:
+            return list(self.columns)
+
+        keys = list(dict.fromkeys(k.strip() for k in raw.split(",") if k.strip()))
+        unknown = [k for k in keys if k not in self.columns]
+        if not keys or unknown:
+            raise InvalidFields(
+                f"Unknown fields: {', '.join(unknown)}" if unknown else "fields must not be empty"
+            )
+        return keys
+
+    def labelled(self, keys):
+        """The columns of `keys`, labelled with their keys (for Core selects)."""
+        return [self.columns[k].label(k) for k in keys]
+
+    def select(self, query, keys, keep=()):
+        """
+        `query` narrowed to the columns of `keys`, labelled with their keys.
+        Columns in `keep` (e.g. the keyset sort and id columns) are selected
+        under their own names as well, after the requested ones.
+        """
+        entities = self.labelled(keys)
+        names = set(keys)
+        for column in keep:
+            if column.key not in names:
+                entities.append(column.label(column.key))
+                names.add(column.key)
+        return query.with_entities(*entities)
+
+    def render(self, rows, keys):
+        """Rows from select() as a list of dicts, or the columnar shape."""
+        width = len(keys)
+        values = [row[:width] for row in rows]
+
+        if columnar_requested():
+            return {"columns": keys, "rows": values}
+        return [dict(zip(keys, value)) for value in values]
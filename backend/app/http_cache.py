@@ -0,0 +1,68 @@
+# app/http_cache.py
+"""
+Conditional GET for the admin dashboards.
+
+Validators come from the tenant's data version (app/tenant_version.py), not
+from the response body, so an unchanged dashboard is answered with
+304 Not Modified after one primary-key lookup and without running the view
+or its aggregate queries.
+
+    ETag:          W/"<admin id>.<data version>.<UTC date>.<query hash>"
+    Last-Modified: the later of the last data change and UTC midnight
+
+The UTC date is part of both because "today" windows roll over at midnight
+without any write. The query hash keeps ?filter=today and ?filter=week apart.
+"""
+import zlib
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, make_response, request
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from werkzeug.http import is_resource_modified
+
+from app.tenant_version import request_data_version
+
+
+def tenant_validators(admin_id, data_version):
+    """(etag, last_modified) for the current request of `admin_id`."""
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    query = zlib.crc32(request.full_path.encode("utf-8"))
+    etag = f"{admin_id}.{data_version.version}.{today:%Y%m%d}.{query:08x}"
+    last_modified = max(data_version.changed_at or today, today)
+    return etag, last_modified
+
+
+def tenant_conditional(fn):
+    """
+    Answer an admin's GET with 304 when the tenant's data hasn't changed
+    since the validators the client sent; otherwise run the view and attach
+    them. Goes under @jwt_required().
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if get_jwt().get("role") != "admin":
+            return fn(*args, **kwargs)
+
+        admin_id = int(get_jwt_identity())
+        data_version = request_data_version(admin_id)
+        if data_version is None:
+            return fn(*args, **kwargs)
+
+        etag, last_modified = tenant_validators(admin_id, data_version)
+
+        if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+            response = make_response(fn(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        else:
+            response = current_app.response_class(status=304)
+
+        response.set_etag(etag, weak=True)
+        response.last_modified = last_modified
+        # Browsers may keep it but must revalidate every time
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+
+    return wrapper
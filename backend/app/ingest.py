@@ -0,0 +1,397 @@
+# app/ingest.py
+"""
+Set-based ingest for the mobile sync endpoints.
+
+A sync batch is validated in memory, duplicates are resolved against the
+unique `call_fingerprint` index and the surviving rows go out as a single
+multi-row INSERT, so the number of round trips no longer depends on how many
+entries the phone pushed or how much history the user already has.
+"""
+import hashlib
+import re
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, insert, select
+
+from app.models import db, Attendance, CallHistory, User, gen_uuid, dialect_insert, update_by_id
+from app.rollups import apply_call_rollups, rebuild_call_rollups
+from app.tenant_version import bump_data_version
+from app.user_counters import add_user_counts, reconcile_user_counters
+
+# Columns a re-synced attendance record overwrites
+ATTENDANCE_SYNC_COLUMNS = (
+    "check_in", "check_out", "latitude", "longitude", "address",
+    "image_path", "status", "synced", "sync_timestamp",
+)
+
+# Bound the IN (...) lists of the duplicate lookup (SQLite caps bound params).
+LOOKUP_CHUNK_SIZE = 1000
+
+NON_DIGITS_RE = re.compile(r"\D+")
+
+
+# -------------------------------------------------
+# Helpers
+# -------------------------------------------------
+def parse_timestamp(ts_value):
+    """Convert timestamp input from ISO string, seconds, or milliseconds."""
+    if ts_value is None:
+        return None
+
+    # Epoch seconds/milliseconds
+    if isinstance(ts_value, (int, float)):
+        try:
+            # milliseconds
+            if ts_value > 1e10:
+                return datetime.utcfromtimestamp(ts_value / 1000)
+            # seconds
+            return datetime.utcfromtimestamp(ts_value)
+        except:
+            return None
+
+    # ISO string
+    if isinstance(ts_value, str):
+        try:
+            if ts_value.endswith("Z"):
+                ts_value = ts_value[:-1] + "+00:00"
+            dt = datetime.fromisoformat(ts_value)
+            if dt.tzinfo:
+                dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+            return dt
+        except:
+            return None
+
+    return None
+
+
+def tenant_of(user_id):
+    """admin_id that owns `user_id` (stored on each synced row)."""
+    return db.session.query(User.admin_id).filter(User.id == user_id).scalar()
+
+
+def _chunks(values, size=LOOKUP_CHUNK_SIZE):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def normalize_number(phone_number):
+    """Digits-only form of a phone number ("+91 98-76" -> "919876")."""
+    return NON_DIGITS_RE.sub("", phone_number or "")
+
+
+def number_columns(phone_number):
+    """Search columns derived from a raw number (see app/number_search.py)."""
+    digits = normalize_number(phone_number)
+    return {"number_digits": digits, "number_digits_rev": digits[::-1]}
+
+
+def call_fingerprint(user_id, phone_number, call_type, timestamp, duration):
+    """Stable natural key of a call: user, number, type, second and duration."""
+    epoch = int(timestamp.replace(tzinfo=timezone.utc).timestamp())
+    raw = f"{user_id}|{normalize_number(phone_number)}|{call_type or ''}|{epoch}|{int(duration or 0)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# -------------------------------------------------
+# CALL HISTORY
+# -------------------------------------------------
+def prepare_call_rows(user_id, call_list, admin_id=None):
+    """
+    Validate a raw `call_history` payload without touching the database.
+    Returns (rows, errors); rows are plain dicts ready for a bulk INSERT.
+    """
+    rows = []
+    errors = []
+
+    for entry in call_list:
+        if not isinstance(entry, dict):
+            errors.append({"entry": entry, "error": "Entry must be an object"})
+            continue
+
+        phone_number = entry.get("phone_number")
+        timestamp_raw = entry.get("timestamp")
+
+        if not phone_number or not timestamp_raw:
+            errors.append({"entry": entry, "error": "Missing timestamp or phone_number"})
+            continue
+
+        dt = parse_timestamp(timestamp_raw)
+        if not dt:
+            errors.append({"entry": entry, "error": "Invalid timestamp format"})
+            continue
+
+        try:
+            duration = int(entry.get("duration") or 0)
+        except (TypeError, ValueError):
+            errors.append({"entry": entry, "error": "Invalid duration"})
+            continue
+
+        ts = dt.replace(microsecond=0)
+        call_type = entry.get("call_type")
+
+        rows.append({
+            "user_id": user_id,
+            "admin_id": admin_id,
+            "phone_number": phone_number,
+            "formatted_number": entry.get("formatted_number") or "",
+            "call_type": call_type,
+            "duration": duration,
+            "timestamp": ts,
+            "contact_name": entry.get("contact_name") or "",
+            "call_fingerprint": call_fingerprint(user_id, phone_number, call_type, ts, duration),
+            **number_columns(phone_number),
+        })
+
+    return rows, errors
+
+
+def existing_fingerprints(fingerprints):
+    """Fingerprints from `fingerprints` that are already stored (index probes)."""
+    found = set()
+    for chunk in _chunks(sorted(fingerprints)):
+        found.update(
+            fp for (fp,) in db.session.query(CallHistory.call_fingerprint)
+            .filter(CallHistory.call_fingerprint.in_(chunk))
+        )
+    return found
+
+
+def ingest_call_history(user_id, call_list, admin_id=None):
+    """
+    Validate, dedupe and bulk-insert a call_history batch for one user, and
+    fold the new rows into the daily rollups in the same transaction.
+    `admin_id` is looked up when the caller doesn't already have it.
+    Does not commit; the caller owns the transaction.
+    Returns (records_saved, errors).
+    """
+    if admin_id is None:
+        admin_id = tenant_of(user_id)
+    rows, errors = prepare_call_rows(user_id, call_list, admin_id)
+
+    # Collapse duplicates inside the batch itself
+    unique_rows = list({r["call_fingerprint"]: r for r in rows}.values())
+    if not unique_rows:
+        return 0, errors
+
+    table = CallHistory.__table__
+    upsert = dialect_insert()
+
+    if upsert is not None:
+        # The unique index does the dedupe; RETURNING tells us what was new
+        stmt = (
+            upsert(table)
+            .on_conflict_do_nothing(index_elements=["call_fingerprint"])
+            .returning(table.c.call_fingerprint)
+        )
+        inserted = {fp for (fp,) in db.session.execute(stmt, unique_rows)}
+        new_rows = [r for r in unique_rows if r["call_fingerprint"] in inserted]
+    else:
+        stored = existing_fingerprints(r["call_fingerprint"] for r in unique_rows)
+        new_rows = [r for r in unique_rows if r["call_fingerprint"] not in stored]
+        if new_rows:
+            db.session.execute(insert(table), new_rows)
+
+    apply_call_rollups(new_rows)
+    if new_rows:
+        add_user_counts(user_id, calls=len(new_rows))
+        bump_data_version(admin_id)
+    return len(new_rows), errors
+
+
+def fingerprint_legacy_calls(connection, chunk_size=LOOKUP_CHUNK_SIZE, log=print, commit=None):
+    """
+    Fill `call_fingerprint` for rows stored before it existed, walking them in
+    primary-key chunks. A row whose fingerprint is already taken (by an
+    earlier row, or a row synced since) is a true duplicate and is deleted.
+    Rows without a timestamp can't be fingerprinted and are left alone.
+
+    Runs on `connection` (a Connection or Session); `commit()`, if given, is
+    called after each chunk.
+    Returns (updated, deleted, skipped, user_ids_with_deletions).
+    """
+    table = CallHistory.__table__
+    c = table.c
+
+    updated = deleted = skipped = 0
+    touched_users = set()
+    last_id = 0
+
+    while True:
+        batch = connection.execute(
+            select(c.id, c.user_id, c.phone_number, c.call_type, c.timestamp, c.duration)
+            .where(c.id > last_id, c.call_fingerprint.is_(None))
+            .order_by(c.id)
+            .limit(chunk_size)
+        ).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        pending = {}
+        duplicates = []
+        for row in batch:
+            if row.timestamp is None:
+                skipped += 1
+                continue
+            fp = call_fingerprint(row.user_id, row.phone_number, row.call_type, row.timestamp, row.duration)
+            if fp in pending:
+                duplicates.append(row)
+                continue
+            pending[fp] = row
+
+        stored = set()
+        for chunk in _chunks(sorted(pending)):
+            stored.update(
+                fp for (fp,) in connection.execute(select(c.call_fingerprint).where(c.call_fingerprint.in_(chunk)))
+            )
+        duplicates.extend(row for fp, row in pending.items() if fp in stored)
+        changes = {row.id: {"call_fingerprint": fp} for fp, row in pending.items() if fp not in stored}
+
+        if duplicates:
+            for chunk in _chunks([row.id for row in duplicates]):
+                connection.execute(delete(table).where(c.id.in_(chunk)))
+            touched_users.update(row.user_id for row in duplicates)
+        if changes:
+            update_by_id(table, changes, connection=connection)
+        if commit is not None:
+            commit()
+
+        updated += len(changes)
+        deleted += len(duplicates)
+        log(f"call_fingerprint backfill: up to id {last_id}, {updated} updated, {deleted} duplicates deleted")
+
+    return updated, deleted, skipped, touched_users
+
+
+def backfill_call_fingerprints(chunk_size=LOOKUP_CHUNK_SIZE, log=print):
+    """
+    fingerprint_legacy_calls() on the app's session, committing per chunk,
+    then rebuild the rollups and counters of users who lost duplicates.
+    The migration adding the column fingerprints the rows stored before it;
+    this repairs rows written by anything that bypasses sync since. Returns (updated, deleted, skipped).
+    """
+    updated, deleted, skipped, user_ids = fingerprint_legacy_calls(
+        db.session, chunk_size=chunk_size, log=log, commit=db.session.commit
+    )
+    if user_ids:
+        rebuild_call_rollups(user_ids=sorted(user_ids), log=log)
+        reconcile_user_counters(user_ids=sorted(user_ids), log=log)
+    return updated, deleted, skipped
+
+
+# -------------------------------------------------
+# ATTENDANCE
+# -------------------------------------------------
+def ts_to_datetime(value):
+    """Convert milliseconds timestamp safely."""
+    if not value:
+        return None
+    try:
+        return datetime.fromtimestamp(int(value) / 1000)
+    except:
+        return None
+
+
+def prepare_attendance_rows(user_id, records, admin_id=None):
+    """
+    Map mobile attendance records to column dicts, in memory.
+    A record re-sent within the same batch keeps its last version.
+    Returns (rows, errors).
+    """
+    synced_at = datetime.utcnow()
+    by_external_id = {}
+    anonymous = []
+    errors = []
+
+    for rec in records:
+        if not isinstance(rec, dict):
+            errors.append({"record": rec, "error": "Record must be an object"})
+            continue
+
+        check_in = ts_to_datetime(rec.get("check_in"))
+        if not check_in:
+            errors.append({"record": rec, "error": "Missing or invalid check_in"})
+            continue
+
+        external_id = rec.get("id")  # mobile-side ID
+        row = {
+            "id": gen_uuid(),
+            "external_id": str(external_id) if external_id is not None else None,
+            "user_id": user_id,
+            "admin_id": admin_id,
+            "check_in": check_in,
+            "check_out": ts_to_datetime(rec.get("check_out")),
+            "latitude": rec.get("latitude"),
+            "longitude": rec.get("longitude"),
+            "address": rec.get("location"),
+            "image_path": rec.get("imagePath"),
+            "status": rec.get("status", "present"),
+            "synced": True,
+            "sync_timestamp": synced_at,
+        }
+
+        if row["external_id"] is None:
+            anonymous.append(row)
+        else:
+            by_external_id[row["external_id"]] = row
+
+    return list(by_external_id.values()) + anonymous, errors
+
+
+def stored_attendance_ids(user_id, external_ids):
+    """{external_id: id} of `user_id`'s records already stored (index probes)."""
+    stored = {}
+    for chunk in _chunks(sorted(external_ids)):
+        stored.update(
+            db.session.query(Attendance.external_id, Attendance.id)
+            .filter(Attendance.user_id == user_id, Attendance.external_id.in_(chunk))
+        )
+    return stored
+
+
+def upsert_attendance(user_id, records, admin_id=None):
+    """
+    Insert-or-update a batch of attendance records keyed on
+    (user_id, external_id) in a fixed number of statements. Stored records
+    are probed first so the user's attendance_count grows by the new ones.
+    `admin_id` is looked up when the caller doesn't already have it.
+    Does not commit; the caller owns the transaction.
+    Returns (rows_written, errors).
+    """
+    if admin_id is None:
+        admin_id = tenant_of(user_id)
+    rows, errors = prepare_attendance_rows(user_id, records, admin_id)
+    keyed = [r for r in rows if r["external_id"] is not None]
+    anonymous = [r for r in rows if r["external_id"] is None]
+
+    table = Attendance.__table__
+    upsert = dialect_insert()
+
+    stored = stored_attendance_ids(user_id, [r["external_id"] for r in keyed]) if keyed else {}
+    added = len(anonymous) + sum(1 for r in keyed if r["external_id"] not in stored)
+
+    if keyed and upsert is not None:
+        stmt = upsert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "external_id"],
+            set_={col: stmt.excluded[col] for col in ATTENDANCE_SYNC_COLUMNS}
+        )
+        db.session.execute(stmt, keyed)
+
+    elif keyed:
+        # No native upsert: update the stored ids, insert the rest
+        updates = {
+            stored[r["external_id"]]: {col: r[col] for col in ATTENDANCE_SYNC_COLUMNS}
+            for r in keyed if r["external_id"] in stored
+        }
+        if updates:
+            update_by_id(table, updates)
+        anonymous = anonymous + [r for r in keyed if r["external_id"] not in stored]
+
+    if anonymous:
+        db.session.execute(insert(table), anonymous)
+
+    if rows:
+        add_user_counts(user_id, attendance=added)
+        bump_data_version(admin_id)
+    return len(rows), errors
@@ -0,0 +1,315 @@
+# app/jobs.py
+"""
+Database-backed background jobs.
+
+Web workers only `enqueue_job()`; `worker.py` (next to wsgi.py) claims queued
+rows from the `jobs` table and runs the registered handler outside any HTTP
+request. A failing job is re-queued with exponential backoff until it runs
+out of attempts; a job whose worker died is re-queued once its lease expires.
+A live worker renews its lease while the handler runs, and only records the
+outcome of a job it still holds.
+
+Claiming is a conditional UPDATE (status queued -> running), so several
+worker processes can share the table on PostgreSQL and SQLite alike.
+"""
+import os
+import random
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import update
+
+from app.ingest import backfill_call_fingerprints
+from app.models import db, Job, now
+from app.number_search import backfill_number_digits, ensure_search_indexes
+from app.performance_snapshots import snapshot_performance
+from app.rollups import rebuild_call_rollups
+from app.user_counters import reconcile_user_counters
+
+JOB_HANDLERS = {}
+
+# Candidates fetched per claim attempt; others may win the race for some
+CLAIM_BATCH = 5
+
+
+class UnknownJobKind(Exception):
+    pass
+
+
+def job_handler(kind):
+    """Register `fn(**payload)` as the handler for `kind`; its return value is stored as the result."""
+    def decorator(fn):
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+# -------------------------------------------------
+# Producer side (web)
+# -------------------------------------------------
+def enqueue_job(kind, payload=None, admin_id=None, max_attempts=3, dedupe=True):
+    """
+    Queue a job and return it. With `dedupe`, an identical job that is still
+    queued or running is returned instead of adding another one.
+    Does not commit; the caller owns the transaction.
+    """
+    if kind not in JOB_HANDLERS:
+        raise UnknownJobKind(kind)
+
+    payload = payload or {}
+
+    if dedupe:
+        pending = Job.query.filter(
+            Job.kind == kind,
+            Job.admin_id == admin_id if admin_id is not None else Job.admin_id.is_(None),
+            Job.status.in_([Job.QUEUED, Job.RUNNING])
+        ).order_by(Job.id)
+        for job in pending:
+            if (job.payload or {}) == payload:
+                return job
+
+    job = Job(kind=kind, payload=payload, admin_id=admin_id, max_attempts=max_attempts)
+    db.session.add(job)
+    db.session.flush()
+    return job
+
+
+# -------------------------------------------------
+# Consumer side (worker)
+# -------------------------------------------------
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def retry_delay(attempts):
+    """Backoff before retry number `attempts`: base * 2^(attempts-1), capped, with 10% jitter."""
+    base = current_app.config.get("JOB_RETRY_BASE_SECONDS", 30)
+    cap = current_app.config.get("JOB_RETRY_MAX_SECONDS", 3600)
+    delay = min(cap, base * 2 ** max(attempts - 1, 0))
+    return delay + random.uniform(0, delay * 0.1)
+
+
+def requeue_stale_jobs():
+    """Re-queue (or fail) running jobs held past the lease, i.e. whose worker died mid-run."""
+    lease = current_app.config.get("JOB_LEASE_SECONDS", 1800)
+    cutoff = now() - timedelta(seconds=lease)
+
+    stale = Job.query.filter(Job.status == Job.RUNNING, Job.locked_at < cutoff).all()
+    for job in stale:
+        job.last_error = f"Lease expired on {job.locked_by}"
+        job.locked_by = None
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+            job.finished_at = now()
+        else:
+            job.status = Job.QUEUED
+            job.run_after = now()
+    db.session.commit()
+    return len(stale)
+
+
+def claim_next_job(worker_id):
+    """Atomically move the next due job to `running` for this worker. Returns the Job or None."""
+    candidates = [
+        job_id for (job_id,) in db.session.query(Job.id)
+        .filter(Job.status == Job.QUEUED, Job.run_after <= now())
+        .order_by(Job.run_after, Job.id)
+        .limit(CLAIM_BATCH)
+    ]
+
+    for job_id in candidates:
+        claimed_at = now()
+        result = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == Job.QUEUED)
+            .values(
+                status=Job.RUNNING,
+                locked_by=worker_id,
+                locked_at=claimed_at,
+                started_at=claimed_at,
+                attempts=Job.attempts + 1
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if result.rowcount == 1:
+            return db.session.get(Job, job_id)
+
+    return None
+
+
+class LeaseRenewal:
+    """
+    Keeps a running job's lease fresh from a background thread while its
+    handler runs, so requeue_stale_jobs() only reclaims jobs whose worker
+    is really gone. Renews every third of JOB_LEASE_SECONDS; `lost` turns
+    true once the job is no longer running under `worker_id`.
+    """
+
+    def __init__(self, job_id, worker_id):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.interval = current_app.config.get("JOB_LEASE_SECONDS", 1800) / 3
+        self.engine = db.engine
+        self.log = current_app.logger
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"job-{job_id}-lease", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            stmt = _held_by(update(Job.__table__), self.job_id, self.worker_id).values(locked_at=now())
+            try:
+                with self.engine.begin() as connection:
+                    renewed = connection.execute(stmt).rowcount
+            except Exception:
+                # A busy database; the next beat tries again well within the lease
+                self.log.warning("Job %s: lease renewal failed", self.job_id, exc_info=True)
+                continue
+            if not renewed:
+                self.lost = True
+                self.log.warning("Job %s: lease lost by %s", self.job_id, self.worker_id)
+                return
+
+
+def _held_by(stmt, job_id, worker_id):
+    """Restrict an UPDATE of jobs to `job_id` while `worker_id` still holds its lease."""
+    table = Job.__table__
+    return stmt.where(table.c.id == job_id, table.c.status == Job.RUNNING, table.c.locked_by == worker_id)
+
+
+def _release(job_id, worker_id, values):
+    """Record a job's outcome if this worker still holds it. Commits; returns whether it did."""
+    result = db.session.execute(_held_by(update(Job.__table__), job_id, worker_id).values(**values))
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def run_job(job):
+    """
+    Run one claimed job and record success, a scheduled retry or a final
+    failure. The outcome is only written while this worker still holds the
+    lease; if it was lost (the job was re-queued and may be running
+    elsewhere), the outcome is logged and dropped.
+    """
+    job_id, kind, payload = job.id, job.kind, dict(job.payload or {})
+    worker_id, attempts, max_attempts = job.locked_by, job.attempts, job.max_attempts
+    log = current_app.logger
+    released = dict(locked_by=None, locked_at=None)
+
+    try:
+        handler = JOB_HANDLERS.get(kind)
+        if handler is None:
+            raise UnknownJobKind(kind)
+        with LeaseRenewal(job_id, worker_id):
+            result = handler(**payload)
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        released["last_error"] = f"{type(e).__name__}: {e}"
+
+        if attempts >= max_attempts or isinstance(e, UnknownJobKind):
+            if _release(job_id, worker_id, dict(released, status=Job.FAILED, finished_at=now())):
+                log.exception("Job %s (%s) failed permanently", job_id, kind)
+            else:
+                log.exception("Job %s (%s) failed after losing its lease", job_id, kind)
+        else:
+            run_after = now() + timedelta(seconds=retry_delay(attempts))
+            if _release(job_id, worker_id, dict(released, status=Job.QUEUED, run_after=run_after)):
+                log.warning("Job %s (%s) failed, retry %s/%s at %s",
+                            job_id, kind, attempts, max_attempts, run_after)
+            else:
+                log.exception("Job %s (%s) failed after losing its lease", job_id, kind)
+        return db.session.get(Job, job_id)
+
+    succeeded = dict(released, status=Job.SUCCEEDED, result=result, last_error=None, finished_at=now())
+    if _release(job_id, worker_id, succeeded):
+        log.info("Job %s (%s) succeeded", job_id, kind)
+    else:
+        log.warning("Job %s (%s) finished after losing its lease; result not recorded", job_id, kind)
+    return db.session.get(Job, job_id)
+
+
+def run_worker(worker_id=None, poll_interval=None, burst=False, should_stop=lambda: False):
+    """
+    Claim and run jobs until `should_stop()` is true. With `burst`, return as
+    soon as the queue has nothing due. Returns the number of jobs run.
+    """
+    worker_id = worker_id or default_worker_id()
+    if poll_interval is None:
+        poll_interval = current_app.config.get("JOB_POLL_INTERVAL", 2)
+
+    ran = 0
+    while not should_stop():
+        requeue_stale_jobs()
+        job = claim_next_job(worker_id)
+
+        if job is None:
+            db.session.remove()
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        run_job(job)
+        db.session.remove()
+        ran += 1
+
+    return ran
+
+
+# -------------------------------------------------
+# Handlers
+# -------------------------------------------------
+@job_handler("recalc_performance")
+def recalc_performance_job(admin_id):
+    """Recompute and persist performance_score for every user of an admin."""
+    # Imported here: the admin blueprint itself imports this module to enqueue
+    from app.routes.admin import calculate_performance_for_admin, save_performance_scores
+
+    scores = calculate_performance_for_admin(admin_id)
+    save_performance_scores(scores, admin_id=admin_id)
+    return {"users_scored": len(scores)}
+
+
+@job_handler("rebuild_call_rollups")
+def rebuild_call_rollups_job(user_ids=None, admin_id=None):
+    rebuilt = rebuild_call_rollups(user_ids=user_ids, admin_id=admin_id, log=current_app.logger.info)
+    return {"users_rebuilt": rebuilt}
+
+
+@job_handler("backfill_call_fingerprints")
+def backfill_call_fingerprints_job(chunk_size=1000):
+    updated, deleted, skipped = backfill_call_fingerprints(chunk_size=chunk_size, log=current_app.logger.info)
+    return {"updated": updated, "deleted": deleted, "skipped": skipped}
+
+
+@job_handler("backfill_number_digits")
+def backfill_number_digits_job(chunk_size=1000):
+    ensure_search_indexes(log=current_app.logger.info)
+    updated = backfill_number_digits(chunk_size=chunk_size, log=current_app.logger.info)
+    return {"updated": updated}
+
+
+@job_handler("reconcile_user_counters")
+def reconcile_user_counters_job(user_ids=None, admin_id=None):
+    checked, repaired = reconcile_user_counters(user_ids=user_ids, admin_id=admin_id, log=current_app.logger.info)
+    return {"checked": checked, "repaired": repaired}
+
+
+@job_handler("snapshot_performance")
+def snapshot_performance_job(admin_ids=None):
+    users = snapshot_performance(admin_ids=admin_ids, log=current_app.logger.info)
+    return {"users_snapshotted": users}
@@ -7,6 +7,11 @@ import json
 import uuid
 from sqlalchemy.types import Text, TypeDecorator
 from sqlalchemy import JSON as SA_JSON
+from sqlalchemy import case, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.serialization import iso
 
 db = SQLAlchemy()
 bcrypt = Bcrypt()
@@ -23,6 +28,49 @@ def gen_uuid():
     return uuid.uuid4().hex
 
 
+# Dialects with INSERT ... ON CONFLICT support
+UPSERT_INSERTS = {
+    "postgresql": pg_insert,
+    "sqlite": sqlite_insert,
+}
+
+
+def dialect_insert():
+    """Return the bound dialect's ON CONFLICT-capable insert(), or None."""
+    return UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+
+
+# Rows per update_by_id() statement; each costs 2 binds per column + 1
+UPDATE_BY_ID_CHUNK_SIZE = 500
+
+
+def update_by_id(table, values_by_id, connection=None, chunk_size=UPDATE_BY_ID_CHUNK_SIZE):
+    """
+    Give many rows of `table` their own values, {id: {column: value}}, with
+    one UPDATE ... SET col = CASE id WHEN ... END WHERE id IN (...) per chunk.
+    An executemany of per-row UPDATEs is one round trip per row on psycopg2.
+    Does not commit.
+    """
+    ids = sorted(values_by_id)
+    pk = table.c.id
+
+    for i in range(0, len(ids), chunk_size):
+        chunk = ids[i:i + chunk_size]
+        whens = {}
+        for row_id in chunk:
+            for col, value in values_by_id[row_id].items():
+                whens.setdefault(col, {})[row_id] = value
+        if not whens:
+            continue
+
+        stmt = (
+            update(table)
+            .where(pk.in_(chunk))
+            .values({col: case(mapping, value=pk, else_=table.c[col]) for col, mapping in whens.items()})
+        )
+        (connection or db.session).execute(stmt)
+
+
 # =========================================================
 # ENUM: User Roles
 # =========================================================
@@ -103,6 +151,10 @@ class Admin(db.Model):
     last_login = db.Column(db.DateTime)
     is_active = db.Column(db.Boolean, default=True)
 
+    # Bumped whenever the tenant's dashboard data changes (app/tenant_version.py)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    data_changed_at = db.Column(db.DateTime, default=now)
+
     users = db.relationship(
         "User",
         backref="admin",
@@ -133,7 +185,7 @@ class User(db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
 
     phone = db.Column(db.String(20))
-    admin_id = db.Column(db.Integer, db.ForeignKey("admins.id"), nullable=False)
+    admin_id = db.Column(db.Integer, db.ForeignKey("admins.id"), nullable=False, index=True)
 
     is_active = db.Column(db.Boolean, default=True)
     performance_score = db.Column(db.Float, default=0.0)
@@ -143,6 +195,10 @@ class User(db.Model):
     last_sync = db.Column(db.DateTime)
     expiry_date = db.Column(db.Date, nullable=True)
 
+    # Maintained by sync, repaired by reconcile_user_counters (app/user_counters.py)
+    call_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    attendance_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
 
     def set_password(self, password):
         self.password_hash = bcrypt.generate_password_hash(password).decode("utf-8")
@@ -155,9 +211,9 @@ class User(db.Model):
 
     def get_sync_summary(self):
         return {
-            "last_sync": self.last_sync.isoformat() if self.last_sync else None,
-            "call_records": CallHistory.query.filter_by(user_id=self.id).count(),
-            "attendance_records": Attendance.query.filter_by(user_id=self.id).count(),
+            "last_sync": iso(self.last_sync),
+            "call_records": self.call_count,
+            "attendance_records": self.attendance_count,
         }
 
 
@@ -166,11 +222,23 @@ class User(db.Model):
 # =========================================================
 class Attendance(db.Model):
     __tablename__ = "attendances"
+    __table_args__ = (
+        # Natural key of a synced record; target of the sync upsert
+        db.Index("ix_attendances_user_id_external_id", "user_id", "external_id", unique=True),
+        # Per-user listings, newest first by check-in or by creation
+        db.Index("ix_attendances_user_id_check_in", "user_id", "check_in"),
+        db.Index("ix_attendances_user_id_created_at", "user_id", "created_at"),
+        # Tenant-wide listings without joining users
+        db.Index("ix_attendances_admin_id_check_in", "admin_id", "check_in"),
+        db.Index("ix_attendances_admin_id_created_at", "admin_id", "created_at"),
+    )
 
     id = db.Column(db.String(64), primary_key=True, default=gen_uuid)
     external_id = db.Column(db.String(64), index=True)
 
     user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # Copy of users.admin_id, written at sync (see app/ingest.py)
+    admin_id = db.Column(db.Integer)
 
     check_in = db.Column(db.DateTime, nullable=False)
     check_out = db.Column(db.DateTime)
@@ -194,16 +262,16 @@ class Attendance(db.Model):
             "id": self.id,
             "external_id": self.external_id,
             "user_id": self.user_id,
-            "check_in": self.check_in.isoformat() if self.check_in else None,
-            "check_out": self.check_out.isoformat() if self.check_out else None,
+            "check_in": iso(self.check_in),
+            "check_out": iso(self.check_out),
             "latitude": self.latitude,
             "longitude": self.longitude,
             "address": self.address,
             "image_path": self.image_path,
             "status": self.status,
             "synced": self.synced,
-            "sync_timestamp": self.sync_timestamp.isoformat() if self.sync_timestamp else None,
-            "created_at": self.created_at.isoformat() if self.created_at else None
+            "sync_timestamp": iso(self.sync_timestamp),
+            "created_at": iso(self.created_at)
         }
 
 
@@ -212,19 +280,40 @@ class Attendance(db.Model):
 # =========================================================
 class CallHistory(db.Model):
     __tablename__ = "call_history"
+    __table_args__ = (
+        # Per-user history newest first, including the (timestamp, id) keyset
+        db.Index("ix_call_history_user_id_timestamp_id", "user_id", db.text('"timestamp" DESC'), db.text("id DESC")),
+        # Per-user change feed in id order (/api/call-history/changes)
+        db.Index("ix_call_history_user_id_id", "user_id", "id"),
+        # Per-user counts/filters by call type over a time window
+        db.Index("ix_call_history_user_id_call_type_timestamp", "user_id", "call_type", "timestamp"),
+        # Tenant-wide listings without joining users
+        db.Index("ix_call_history_admin_id_timestamp", "admin_id", "timestamp"),
+        # Tenant "last N digits" search as a prefix range (app/number_search.py)
+        db.Index("ix_call_history_admin_id_number_digits_rev", "admin_id", "number_digits_rev"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    # Copy of users.admin_id, written at sync (see app/ingest.py)
+    admin_id = db.Column(db.Integer)
 
     phone_number = db.Column(db.String(50))
+    # Digits-only phone_number and its reverse, for indexed search
+    number_digits = db.Column(db.String(50))
+    number_digits_rev = db.Column(db.String(50))
     formatted_number = db.Column(db.String(100))
     call_type = db.Column(db.String(20))  # incoming/outgoing/missed/rejected
 
-    timestamp = db.Column(db.DateTime)
+    timestamp = db.Column(db.DateTime, index=True)
     duration = db.Column(db.Integer)
     contact_name = db.Column(db.String(150))
 
+    # sha256 of (user, digits-only number, type, timestamp to the second, duration);
+    # the unique index makes dedupe a single probe / ON CONFLICT target
+    call_fingerprint = db.Column(db.String(64), unique=True, index=True)
+
     created_at = db.Column(db.DateTime, default=now)
 
     user = db.relationship("User", backref=db.backref("call_history_records", lazy="dynamic"))
@@ -236,10 +325,10 @@ class CallHistory(db.Model):
             "phone_number": self.phone_number,
             "formatted_number": self.formatted_number,
             "call_type": self.call_type,
-            "timestamp": self.timestamp.isoformat() if self.timestamp else None,
+            "timestamp": iso(self.timestamp),
             "duration": self.duration,
             "contact_name": self.contact_name,
-            "created_at": self.created_at.isoformat() if self.created_at else None
+            "created_at": iso(self.created_at)
         }
 
 
@@ -265,11 +354,121 @@ class CallMetrics(db.Model):
     created_at = db.Column(db.DateTime, default=now)
 
 
+# =========================================================
+# CALL DAILY ROLLUP
+# =========================================================
+class CallDailyRollup(db.Model):
+    """Per-user, per-UTC-day call aggregates, maintained at sync time."""
+    __tablename__ = "call_daily_rollups"
+    __table_args__ = (
+        db.Index("ix_call_daily_rollups_user_id_day", "user_id", "day", unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+
+    total_calls = db.Column(db.Integer, nullable=False, default=0)
+    incoming_calls = db.Column(db.Integer, nullable=False, default=0)
+    outgoing_calls = db.Column(db.Integer, nullable=False, default=0)
+    missed_calls = db.Column(db.Integer, nullable=False, default=0)
+    rejected_calls = db.Column(db.Integer, nullable=False, default=0)
+    answered_calls = db.Column(db.Integer, nullable=False, default=0)  # duration > 0
+
+    total_duration = db.Column(db.Integer, nullable=False, default=0)
+    max_duration = db.Column(db.Integer, nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, default=now, onupdate=now)
+
+
+# =========================================================
+# PERFORMANCE SNAPSHOT
+# =========================================================
+class PerformanceSnapshot(db.Model):
+    """A user's performance score as of a UTC day, written at recalculation."""
+    __tablename__ = "performance_snapshots"
+    __table_args__ = (
+        db.Index("ix_performance_snapshots_user_id_day", "user_id", "day", unique=True),
+        # Tenant trends without joining users
+        db.Index("ix_performance_snapshots_admin_id_day", "admin_id", "day"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    admin_id = db.Column(db.Integer, nullable=False)
+    day = db.Column(db.Date, nullable=False)
+
+    score = db.Column(db.Float, nullable=False, default=0.0)
+
+    updated_at = db.Column(db.DateTime, default=now, onupdate=now)
+
+
+# =========================================================
+# BACKGROUND JOB
+# =========================================================
+class Job(db.Model):
+    """A unit of background work, claimed and run by `worker.py`."""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        db.Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(64), nullable=False)
+    payload = db.Column(JSONAuto())
+
+    # Tenant that requested the job (None for system maintenance)
+    admin_id = db.Column(db.Integer, db.ForeignKey("admins.id", ondelete="CASCADE"), index=True)
+
+    status = db.Column(db.String(16), nullable=False, default=QUEUED)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, nullable=False, default=now)
+
+    locked_by = db.Column(db.String(128))
+    locked_at = db.Column(db.DateTime)
+
+    result = db.Column(JSONAuto())
+    last_error = db.Column(db.Text)
+
+    created_at = db.Column(db.DateTime, default=now)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "payload": self.payload,
+            "status": self.status,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "run_after": iso(self.run_after),
+            "result": self.result,
+            "last_error": self.last_error,
+            "created_at": iso(self.created_at),
+            "started_at": iso(self.started_at),
+            "finished_at": iso(self.finished_at),
+        }
+
+
 # =========================================================
 # ACTIVITY LOG
 # =========================================================
 class ActivityLog(db.Model):
     __tablename__ = "activity_logs"
+    __table_args__ = (
+        # Log listings, newest first, filtered by target or by actor (app/activity_logs.py)
+        db.Index("ix_activity_logs_target_type_target_id_timestamp", "target_type", "target_id", "timestamp", "id"),
+        db.Index("ix_activity_logs_actor_role_actor_id_timestamp", "actor_role", "actor_id", "timestamp", "id"),
+        # Unfiltered browsing
+        db.Index("ix_activity_logs_timestamp_id", "timestamp", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -293,6 +492,6 @@ class ActivityLog(db.Model):
             "target_type": self.target_type,
             "target_id": self.target_id,
             "extra_data": self.extra_data,
-            "timestamp": self.timestamp.isoformat() if self.timestamp else None
+            "timestamp": iso(self.timestamp)
         }
 
@@ -0,0 +1,164 @@
+# app/number_search.py
+"""
+Phone number search over call_history.
+
+Sync stores two derived columns next to the raw `phone_number`:
+
+    number_digits      digits only          "+91 98765-43210" -> "919876543210"
+    number_digits_rev  the same, reversed   -> "012345678919"
+
+and searches run against those instead of `phone_number LIKE '%...%'`:
+
+- PostgreSQL: a pg_trgm GIN index on number_digits serves both substring
+  and suffix lookups (3+ digits).
+- SQLite: a suffix ("last 4 digits") becomes a prefix of the reversed
+  column, a GLOB range scan on (admin_id, number_digits_rev); a substring
+  of 3+ digits is looked up in an FTS5 trigram table over number_digits,
+  kept in step by triggers. Shorter substrings stay a LIKE over the
+  tenant's rows.
+
+A search with no digits in it falls back to the old raw LIKE so free-text
+searches keep working. The number_search migration fills the columns for
+rows synced before they existed; `flask backfill-number-digits` repairs any
+row written without them since.
+"""
+from sqlalchemy import DDL, event, text
+
+from app.ingest import LOOKUP_CHUNK_SIZE, normalize_number, number_columns
+from app.models import db, CallHistory, update_by_id
+
+MATCH_MODES = ("contains", "suffix")
+
+TRGM_INDEX = "ix_call_history_number_digits_trgm"
+
+# SQLite substring index: an external-content FTS5 table (no copy of the
+# data, just the trigram index) over call_history.number_digits
+FTS_TABLE = "call_history_number_fts"
+FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "number_digits, content='call_history', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON call_history BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, number_digits) VALUES (new.id, new.number_digits); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON call_history BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, number_digits) VALUES ('delete', old.id, old.number_digits); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF number_digits ON call_history BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, number_digits) VALUES ('delete', old.id, old.number_digits); "
+    f"INSERT INTO {FTS_TABLE}(rowid, number_digits) VALUES (new.id, new.number_digits); END",
+]
+
+for _ddl in FTS_DDL:
+    event.listen(CallHistory.__table__, "after_create", DDL(_ddl).execute_if(dialect="sqlite"))
+
+# Rows below which ANALYZE is skipped: statistics taken on a handful of rows
+# steer SQLite to full scans, and at that size any plan is fast
+ANALYZE_MIN_ROWS = 10_000
+
+# Engines known to have FTS_TABLE (databases created before it fall back to LIKE)
+_fts_ready = {}
+
+
+def _has_fts(bind):
+    if bind.url not in _fts_ready:
+        found = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+        ).first()
+        if found is None:
+            return False
+        _fts_ready[bind.url] = True
+    return True
+
+
+def number_search_filter(search, match="contains"):
+    """
+    WHERE clause for `?search=` on CallHistory. `match` is "contains"
+    (default: the search's digits anywhere in the number, whatever the
+    formatting on either side) or "suffix".
+    """
+    digits = normalize_number(search)
+    if not digits:
+        return CallHistory.phone_number.like(f"%{search}%")
+
+    bind = db.session.get_bind()
+    if match == "suffix":
+        if bind.dialect.name == "sqlite":
+            # GLOB is case-sensitive, so SQLite can turn the prefix into an index range
+            return CallHistory.number_digits_rev.op("GLOB")(digits[::-1] + "*")
+        return CallHistory.number_digits.like(f"%{digits}")
+
+    if bind.dialect.name == "sqlite" and len(digits) >= 3 and _has_fts(bind):
+        # The trigram tokenizer answers LIKE '%...%' from the index for 3+ characters
+        return CallHistory.id.in_(
+            text(f"SELECT rowid FROM {FTS_TABLE} WHERE number_digits LIKE :fts_pattern")
+            .bindparams(fts_pattern=f"%{digits}%")
+        )
+
+    return CallHistory.number_digits.like(f"%{digits}%")
+
+
+# -------------------------------------------------
+# Maintenance
+# -------------------------------------------------
+def ensure_search_indexes(log=print):
+    """
+    Create the substring index if missing: the PostgreSQL trigram index (and
+    pg_trgm), or on SQLite the FTS5 table and its triggers, filled from the
+    rows already stored. SQLite's call_history statistics are refreshed too
+    (past ANALYZE_MIN_ROWS): without them the planner assumes `admin_id = ?`
+    is the narrower filter and scans the tenant instead of fetching the FTS
+    matches by id. The trigram index is not declared on the model so
+    db.create_all() works without the extension. No-op on other databases.
+    """
+    bind = db.session.get_bind()
+    if bind.dialect.name == "sqlite":
+        created = not _has_fts(bind)
+        for ddl in FTS_DDL:
+            db.session.execute(text(ddl))
+        if created:
+            db.session.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        if db.session.execute(text("SELECT count(*) FROM call_history")).scalar() >= ANALYZE_MIN_ROWS:
+            db.session.execute(text("ANALYZE call_history"))
+        db.session.commit()
+        log(f"{FTS_TABLE} present")
+        return True
+
+    if bind.dialect.name != "postgresql":
+        return False
+
+    db.session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    db.session.execute(text(
+        f"CREATE INDEX IF NOT EXISTS {TRGM_INDEX} "
+        "ON call_history USING gin (number_digits gin_trgm_ops)"
+    ))
+    db.session.commit()
+    log(f"{TRGM_INDEX} present")
+    return True
+
+
+def backfill_number_digits(chunk_size=LOOKUP_CHUNK_SIZE, log=print):
+    """
+    Fill number_digits / number_digits_rev for rows synced before they
+    existed, in primary-key chunks committed one at a time. Returns the
+    number of rows updated.
+    """
+    updated = 0
+    last_id = 0
+
+    while True:
+        batch = (
+            db.session.query(CallHistory.id, CallHistory.phone_number)
+            .filter(CallHistory.id > last_id, CallHistory.number_digits.is_(None))
+            .order_by(CallHistory.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        update_by_id(CallHistory.__table__, {row.id: number_columns(row.phone_number) for row in batch})
+        db.session.commit()
+
+        updated += len(batch)
+        log(f"number_digits backfill: up to id {last_id}, {updated} updated")
+
+    return updated
@@ -0,0 +1,126 @@
+# app/pagination.py
+"""
+Opt-in keyset (cursor) pagination for the history listings.
+
+A client opts in by sending `cursor` (empty for the first page) instead of
+`page`. Rows are walked newest first on (sort_column, id); each page is one
+indexed range scan of `per_page + 1` rows, so page N costs the same as
+page 1. The exact total is only counted when `include_total=1` is passed.
+
+    meta = {"per_page", "has_next", "has_prev", "next_cursor", "prev_cursor"[, "total"]}
+
+Cursors are opaque to clients: url-safe base64 of the boundary row's
+(sort value, id) plus the direction to walk from it.
+"""
+import base64
+import json
+from datetime import datetime
+
+from flask import request
+from sqlalchemy import tuple_
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def cursor_requested():
+    """True when the client asked for keyset rather than page/offset pagination."""
+    return "cursor" in request.args
+
+
+def include_total():
+    return request.args.get("include_total", "").lower() in ("1", "true", "yes")
+
+
+def encode_cursor(sort_value, row_id, direction):
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id, direction], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, sort_column):
+    """Return (sort_value, row_id, direction); raises InvalidCursor."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        sort_value, row_id, direction = json.loads(raw)
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        if sort_column.type.python_type is datetime:
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, row_id, direction
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+
+
+def encode_change_token(last_id):
+    """Opaque delta-sync token: everything up to row `last_id` has been seen."""
+    raw = json.dumps(["changes", last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_change_token(token):
+    """Row id a change token stands for (0 for an empty token); raises InvalidCursor."""
+    if not token:
+        return 0
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        kind, last_id = json.loads(raw)
+        if kind != "changes" or not isinstance(last_id, int) or last_id < 0:
+            raise ValueError(token)
+        return last_id
+    except Exception:
+        raise InvalidCursor("Invalid sync token")
+
+
+def keyset_paginate(query, sort_column, id_column, per_page, key=None):
+    """
+    Page `query` newest first on (sort_column, id_column) from `?cursor=`.
+    `key(item)` returns an item's (sort value, id); by default both are read
+    as attributes of the item. Rows whose sort value is NULL are not listed.
+    Returns (items, meta); raises InvalidCursor for a malformed cursor.
+    """
+    if key is None:
+        key = lambda item: (getattr(item, sort_column.key), getattr(item, id_column.key))
+
+    token = request.args.get("cursor") or ""
+    query = query.filter(sort_column.isnot(None))
+    total = query.order_by(None).count() if include_total() else None
+
+    position = tuple_(sort_column, id_column)
+    direction = "next"
+
+    if token:
+        sort_value, row_id, direction = decode_cursor(token, sort_column)
+        if direction == "next":
+            query = query.filter(position < tuple_(sort_value, row_id))
+        else:
+            query = query.filter(position > tuple_(sort_value, row_id))
+
+    if direction == "next":
+        query = query.order_by(None).order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(None).order_by(sort_column.asc(), id_column.asc())
+
+    items = query.limit(per_page + 1).all()
+    has_more = len(items) > per_page
+    items = items[:per_page]
+
+    if direction == "next":
+        has_next, has_prev = has_more, bool(token)
+    else:
+        items.reverse()
+        has_next, has_prev = True, has_more
+
+    meta = {
+        "per_page": per_page,
+        "has_next": has_next and bool(items),
+        "has_prev": has_prev and bool(items),
+        "next_cursor": encode_cursor(*key(items[-1]), "next") if has_next and items else None,
+        "prev_cursor": encode_cursor(*key(items[0]), "prev") if has_prev and items else None,
+    }
+    if total is not None:
+        meta["total"] = total
+
+    return items, meta
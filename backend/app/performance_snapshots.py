@@ -0,0 +1,125 @@
+# app/performance_snapshots.py
+"""
+Daily performance score snapshots (`performance_snapshots`).
+
+Every recalculation stores each user's score under the current UTC day, so
+dashboards can chart how scores moved instead of only showing today's value.
+Past days are never rewritten; a second recalculation on the same day
+replaces that day's row, leaving one compact row per user and day.
+`snapshot_performance` is the daily batch that guarantees a row per day:
+
+    FLASK_APP=wsgi flask snapshot-performance     # e.g. from cron at 23:55 UTC
+"""
+from datetime import timedelta
+
+from sqlalchemy import delete, func, insert
+
+from app.models import db, Admin, PerformanceSnapshot, dialect_insert, now
+
+# Rows per snapshot INSERT (5 bound parameters each)
+SNAPSHOT_CHUNK_SIZE = 500
+
+
+# -------------------------------------------------
+# Writers
+# -------------------------------------------------
+def record_performance_snapshots(scores, admin_id, day=None):
+    """Store {user_id: score} as `admin_id`'s snapshot for `day` (today, UTC). Does not commit."""
+    if not scores:
+        return
+    day = day or now().date()
+    rows = [
+        {"user_id": uid, "admin_id": admin_id, "day": day, "score": score or 0.0, "updated_at": now()}
+        for uid, score in scores.items()
+    ]
+
+    table = PerformanceSnapshot.__table__
+    upsert = dialect_insert()
+
+    if upsert is not None:
+        # Multi-row VALUES, so each chunk is one statement on every driver
+        for i in range(0, len(rows), SNAPSHOT_CHUNK_SIZE):
+            stmt = upsert(table).values(rows[i:i + SNAPSHOT_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_id", "day"],
+                set_={col: stmt.excluded[col] for col in ("admin_id", "score", "updated_at")}
+            )
+            db.session.execute(stmt)
+        return
+
+    db.session.execute(
+        delete(PerformanceSnapshot)
+        .where(PerformanceSnapshot.day == day, PerformanceSnapshot.user_id.in_(list(scores)))
+    )
+    db.session.execute(insert(table), rows)
+
+
+# -------------------------------------------------
+# Readers
+# -------------------------------------------------
+def _trend(condition, days, end_day):
+    """
+    Average snapshot score per day matching `condition`, for each of the
+    `days` days up to `end_day` (today, UTC), oldest first, as [(day, score)].
+    A day without a snapshot repeats the previous value (0 before the first).
+    """
+    end_day = end_day or now().date()
+    start_day = end_day - timedelta(days=days - 1)
+    S = PerformanceSnapshot
+
+    averages = dict(
+        db.session.query(S.day, func.avg(S.score))
+        .filter(condition, S.day >= start_day, S.day <= end_day)
+        .group_by(S.day)
+    )
+
+    value = 0.0
+    if start_day not in averages:
+        # Carry in the last value from before the window
+        last_day = db.session.query(func.max(S.day)).filter(condition, S.day < start_day).scalar_subquery()
+        value = db.session.query(func.avg(S.score)).filter(condition, S.day == last_day).scalar() or 0.0
+
+    trend = []
+    for offset in range(days):
+        day = start_day + timedelta(days=offset)
+        if day in averages:
+            value = averages[day]
+        trend.append((day, round(float(value), 2)))
+    return trend
+
+
+def tenant_performance_trend(admin_id, days=7, end_day=None):
+    """Daily average score of `admin_id`'s users (range scan on admin_id, day)."""
+    return _trend(PerformanceSnapshot.admin_id == admin_id, days, end_day)
+
+
+def user_performance_trend(user_id, days=7, end_day=None):
+    """Daily score of one user (range scan on user_id, day)."""
+    return _trend(PerformanceSnapshot.user_id == user_id, days, end_day)
+
+
+# -------------------------------------------------
+# Scheduled snapshot
+# -------------------------------------------------
+def snapshot_performance(admin_ids=None, log=print):
+    """
+    Recalculate every active tenant's scores and store them as today's
+    snapshot, one tenant per transaction. Meant to run daily (cron or the
+    snapshot_performance job). Returns the number of users snapshotted.
+    """
+    # Imported here: the admin blueprint imports this module
+    from app.routes.admin import calculate_performance_for_admin, save_performance_scores
+
+    admins = db.session.query(Admin.id).filter(Admin.is_active.isnot(False)).order_by(Admin.id)
+    if admin_ids:
+        admins = admins.filter(Admin.id.in_(admin_ids))
+
+    total = 0
+    for (admin_id,) in admins.all():
+        scores = calculate_performance_for_admin(admin_id)
+        save_performance_scores(scores, admin_id=admin_id)
+        db.session.commit()
+        total += len(scores)
+        log(f"performance snapshot: admin {admin_id}, {len(scores)} users")
+
+    return total
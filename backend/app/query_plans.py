@@ -0,0 +1,222 @@
+# app/query_plans.py
+"""
+EXPLAIN checks for the hot query shapes.
+
+Each check builds the statement an endpoint issues and asserts that the
+database plans it through one of the expected indexes. Run it after
+migrating (and in CI against a scratch database):
+
+    FLASK_APP=wsgi flask explain-check
+
+On PostgreSQL sequential scans are disabled for the check's transaction, so a
+tiny table doesn't hide a missing index; the check only asks whether the
+index is usable, not whether the planner prefers it at today's row counts.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.models import db, ActivityLog, Attendance, CallDailyRollup, CallHistory, PerformanceSnapshot, User, UserRole
+from app.number_search import FTS_TABLE, TRGM_INDEX, number_search_filter
+
+PlanCheck = namedtuple("PlanCheck", "name build expected")
+PlanResult = namedtuple("PlanResult", "name ok expected plan")
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN wrapper that keeps the inner statement's bind parameters."""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    prefix = "EXPLAIN QUERY PLAN " if compiler.dialect.name == "sqlite" else "EXPLAIN "
+    return prefix + compiler.process(element.statement, **kw)
+
+
+def _window_start():
+    return datetime.utcnow() - timedelta(days=30)
+
+
+PLAN_CHECKS = [
+    PlanCheck(
+        "user call history, first page",
+        lambda user_id, admin_id: select(CallHistory)
+        .where(CallHistory.user_id == user_id, CallHistory.timestamp.isnot(None))
+        .order_by(CallHistory.timestamp.desc(), CallHistory.id.desc())
+        .limit(26),
+        ("ix_call_history_user_id_timestamp_id",),
+    ),
+    PlanCheck(
+        "user call history, keyset page",
+        lambda user_id, admin_id: select(CallHistory)
+        .where(
+            CallHistory.user_id == user_id,
+            tuple_(CallHistory.timestamp, CallHistory.id) < tuple_(datetime.utcnow(), 2 ** 31)
+        )
+        .order_by(CallHistory.timestamp.desc(), CallHistory.id.desc())
+        .limit(26),
+        ("ix_call_history_user_id_timestamp_id",),
+    ),
+    PlanCheck(
+        "user call history changes since a token",
+        lambda user_id, admin_id: select(CallHistory)
+        .where(CallHistory.user_id == user_id, CallHistory.id > 1000)
+        .order_by(CallHistory.id)
+        .limit(501),
+        ("ix_call_history_user_id_id",),
+    ),
+    PlanCheck(
+        "user calls by type in a window",
+        lambda user_id, admin_id: select(func.count(CallHistory.id))
+        .where(
+            CallHistory.user_id == user_id,
+            CallHistory.call_type == "missed",
+            CallHistory.timestamp >= _window_start()
+        ),
+        ("ix_call_history_user_id_call_type_timestamp",),
+    ),
+    PlanCheck(
+        "tenant call history",
+        lambda user_id, admin_id: select(CallHistory, User)
+        .join(User, CallHistory.user_id == User.id)
+        .where(CallHistory.admin_id == admin_id)
+        .order_by(CallHistory.timestamp.desc())
+        .limit(50),
+        ("ix_call_history_admin_id_timestamp",),
+    ),
+    PlanCheck(
+        "tenant number search, last digits",
+        lambda user_id, admin_id: select(CallHistory)
+        .where(CallHistory.admin_id == admin_id, number_search_filter("4321", "suffix"))
+        .limit(50),
+        ("ix_call_history_admin_id_number_digits_rev", TRGM_INDEX),
+    ),
+    PlanCheck(
+        "tenant number search, substring",
+        lambda user_id, admin_id: select(CallHistory)
+        .where(CallHistory.admin_id == admin_id, number_search_filter("98765"))
+        .limit(50),
+        (FTS_TABLE, TRGM_INDEX),
+    ),
+    PlanCheck(
+        "tenant attendance",
+        lambda user_id, admin_id: select(Attendance)
+        .where(Attendance.admin_id == admin_id)
+        .order_by(Attendance.created_at.desc())
+        .limit(25),
+        ("ix_attendances_admin_id_created_at",),
+    ),
+    PlanCheck(
+        "call fingerprint probe",
+        lambda user_id, admin_id: select(CallHistory.call_fingerprint)
+        .where(CallHistory.call_fingerprint.in_(["0" * 64, "f" * 64])),
+        ("ix_call_history_call_fingerprint",),
+    ),
+    PlanCheck(
+        "user attendance by check-in",
+        lambda user_id, admin_id: select(Attendance)
+        .where(Attendance.user_id == user_id)
+        .order_by(Attendance.check_in.desc())
+        .limit(26),
+        ("ix_attendances_user_id_check_in",),
+    ),
+    PlanCheck(
+        "user attendance by creation",
+        lambda user_id, admin_id: select(Attendance)
+        .where(Attendance.user_id == user_id)
+        .order_by(Attendance.created_at.desc())
+        .limit(26),
+        ("ix_attendances_user_id_created_at",),
+    ),
+    PlanCheck(
+        "attendance sync key lookup",
+        lambda user_id, admin_id: select(Attendance.external_id, Attendance.id)
+        .where(Attendance.user_id == user_id, Attendance.external_id.in_(["1", "2"])),
+        ("ix_attendances_user_id_external_id",),
+    ),
+    PlanCheck(
+        "user call rollups in a window",
+        lambda user_id, admin_id: select(CallDailyRollup)
+        .where(CallDailyRollup.user_id == user_id, CallDailyRollup.day >= _window_start().date()),
+        ("ix_call_daily_rollups_user_id_day",),
+    ),
+    PlanCheck(
+        "user performance trend",
+        lambda user_id, admin_id: select(PerformanceSnapshot.day, func.avg(PerformanceSnapshot.score))
+        .where(PerformanceSnapshot.user_id == user_id, PerformanceSnapshot.day >= _window_start().date())
+        .group_by(PerformanceSnapshot.day),
+        ("ix_performance_snapshots_user_id_day",),
+    ),
+    PlanCheck(
+        "tenant performance trend",
+        lambda user_id, admin_id: select(PerformanceSnapshot.day, func.avg(PerformanceSnapshot.score))
+        .where(PerformanceSnapshot.admin_id == admin_id, PerformanceSnapshot.day >= _window_start().date())
+        .group_by(PerformanceSnapshot.day),
+        ("ix_performance_snapshots_admin_id_day",),
+    ),
+    PlanCheck(
+        "activity logs about a target",
+        lambda user_id, admin_id: select(ActivityLog)
+        .where(ActivityLog.target_type == "user", ActivityLog.target_id == user_id)
+        .order_by(ActivityLog.timestamp.desc(), ActivityLog.id.desc())
+        .limit(51),
+        ("ix_activity_logs_target_type_target_id_timestamp",),
+    ),
+    PlanCheck(
+        "activity logs by an actor",
+        lambda user_id, admin_id: select(ActivityLog)
+        .where(ActivityLog.actor_role == UserRole.ADMIN, ActivityLog.actor_id == admin_id)
+        .order_by(ActivityLog.timestamp.desc(), ActivityLog.id.desc())
+        .limit(51),
+        ("ix_activity_logs_actor_role_actor_id_timestamp",),
+    ),
+    PlanCheck(
+        "activity logs, keyset page",
+        lambda user_id, admin_id: select(ActivityLog)
+        .where(tuple_(ActivityLog.timestamp, ActivityLog.id) < tuple_(datetime.utcnow(), 2 ** 31))
+        .order_by(ActivityLog.timestamp.desc(), ActivityLog.id.desc())
+        .limit(51),
+        ("ix_activity_logs_timestamp_id",),
+    ),
+    PlanCheck(
+        "tenant users",
+        lambda user_id, admin_id: select(User.id).where(User.admin_id == admin_id),
+        ("ix_users_admin_id",),
+    ),
+]
+
+
+def explain(statement):
+    """Plan text of `statement` on the current bind, one line per plan node."""
+    rows = db.session.execute(Explain(statement)).all()
+    # SQLite: (id, parent, notused, detail); PostgreSQL: ("QUERY PLAN",)
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def run_plan_checks(user_id=None, admin_id=None):
+    """Explain every PLAN_CHECKS statement. Returns a list of PlanResult."""
+    if user_id is None:
+        user_id = db.session.query(func.min(User.id)).scalar() or 1
+    if admin_id is None:
+        admin_id = db.session.query(User.admin_id).filter(User.id == user_id).scalar() or 1
+
+    results = []
+    try:
+        if db.session.get_bind().dialect.name == "postgresql":
+            db.session.execute(text("SET LOCAL enable_seqscan = off"))
+
+        for check in PLAN_CHECKS:
+            plan = explain(check.build(user_id, admin_id))
+            ok = any(name in plan for name in check.expected)
+            results.append(PlanResult(check.name, ok, check.expected, plan))
+    finally:
+        db.session.rollback()
+
+    return results
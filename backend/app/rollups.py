@@ -0,0 +1,175 @@
+# app/rollups.py
+"""
+Per-user, per-day call rollups (`call_daily_rollups`).
+
+Sync folds each batch of newly inserted calls into the rollups in the same
+transaction, so dashboards can aggregate a few rows per user and day instead
+of re-scanning raw call_history. `rebuild_call_rollups` recomputes them from
+raw rows for backfills and repairs.
+
+Legacy rows without a timestamp (sync rejects those) are counted on the day
+they were stored (created_at), so all-time totals still include them as the
+raw counts did.
+"""
+from sqlalchemy import and_, case, delete, func, insert, literal, select, tuple_
+
+from app.models import db, CallDailyRollup, CallHistory, User, dialect_insert, now
+from app.tenant_version import bump_data_version
+
+# Additive counters; max_duration is merged with max() instead
+COUNTER_COLUMNS = (
+    "total_calls", "incoming_calls", "outgoing_calls", "missed_calls",
+    "rejected_calls", "answered_calls", "total_duration",
+)
+
+TYPE_COLUMNS = {
+    "incoming": "incoming_calls",
+    "outgoing": "outgoing_calls",
+    "missed": "missed_calls",
+    "rejected": "rejected_calls",
+}
+
+
+# -------------------------------------------------
+# Incremental maintenance (sync time)
+# -------------------------------------------------
+def aggregate_call_rows(rows):
+    """Fold call_history column dicts into {(user_id, day): rollup delta}."""
+    deltas = {}
+    for row in rows:
+        if row.get("timestamp") is None:
+            continue
+
+        key = (row["user_id"], row["timestamp"].date())
+        delta = deltas.get(key)
+        if delta is None:
+            delta = dict.fromkeys(COUNTER_COLUMNS, 0)
+            delta.update(user_id=key[0], day=key[1], max_duration=0)
+            deltas[key] = delta
+
+        duration = row.get("duration") or 0
+        delta["total_calls"] += 1
+        delta["total_duration"] += duration
+        delta["max_duration"] = max(delta["max_duration"], duration)
+        if duration > 0:
+            delta["answered_calls"] += 1
+
+        type_column = TYPE_COLUMNS.get(row.get("call_type"))
+        if type_column:
+            delta[type_column] += 1
+
+    return deltas
+
+
+def apply_call_rollups(rows):
+    """Add newly inserted call rows to their daily rollups. Does not commit."""
+    deltas = aggregate_call_rows(rows)
+    if not deltas:
+        return
+
+    table = CallDailyRollup.__table__
+    upsert = dialect_insert()
+
+    if upsert is not None:
+        stmt = upsert(table)
+        excluded = stmt.excluded
+        set_ = {col: table.c[col] + excluded[col] for col in COUNTER_COLUMNS}
+        set_["max_duration"] = case(
+            (excluded.max_duration > table.c.max_duration, excluded.max_duration),
+            else_=table.c.max_duration
+        )
+        set_["updated_at"] = now()
+        stmt = stmt.on_conflict_do_update(index_elements=["user_id", "day"], set_=set_)
+        db.session.execute(stmt, list(deltas.values()))
+        return
+
+    # No native upsert: merge into the stored rows loaded in one query
+    stored = {
+        (r.user_id, r.day): r
+        for r in CallDailyRollup.query.filter(
+            tuple_(CallDailyRollup.user_id, CallDailyRollup.day).in_(list(deltas))
+        )
+    }
+    for key, delta in deltas.items():
+        rollup = stored.get(key)
+        if rollup is None:
+            db.session.add(CallDailyRollup(**delta))
+            continue
+        for col in COUNTER_COLUMNS:
+            setattr(rollup, col, getattr(rollup, col) + delta[col])
+        rollup.max_duration = max(rollup.max_duration, delta["max_duration"])
+
+
+# -------------------------------------------------
+# Rebuild from raw call_history
+# -------------------------------------------------
+def _rollup_select():
+    stamp = func.coalesce(CallHistory.timestamp, CallHistory.created_at)
+    day = func.date(stamp)
+    duration = func.coalesce(CallHistory.duration, 0)
+
+    def count_type(call_type):
+        return func.sum(case((CallHistory.call_type == call_type, 1), else_=0))
+
+    return (
+        select(
+            CallHistory.user_id,
+            day,
+            func.count(),
+            count_type("incoming"),
+            count_type("outgoing"),
+            count_type("missed"),
+            count_type("rejected"),
+            func.sum(case((CallHistory.duration > 0, 1), else_=0)),
+            func.sum(duration),
+            func.max(duration),
+            literal(now(), db.DateTime)
+        )
+        .where(stamp.isnot(None))
+        .group_by(CallHistory.user_id, day)
+    )
+
+
+def rebuild_call_rollups(user_ids=None, admin_id=None, log=print):
+    """
+    Recompute rollups from raw rows, one user per transaction so a large
+    backfill never holds a long lock. Returns the number of users rebuilt.
+    """
+    users = db.session.query(User.id, User.admin_id).order_by(User.id)
+    if user_ids:
+        users = users.filter(User.id.in_(user_ids))
+    if admin_id is not None:
+        users = users.filter(User.admin_id == admin_id)
+
+    columns = [
+        "user_id", "day", "total_calls", "incoming_calls", "outgoing_calls", "missed_calls",
+        "rejected_calls", "answered_calls", "total_duration", "max_duration", "updated_at",
+    ]
+    rebuilt = 0
+
+    for user_id, user_admin_id in users.all():
+        db.session.execute(delete(CallDailyRollup).where(CallDailyRollup.user_id == user_id))
+        db.session.execute(
+            insert(CallDailyRollup.__table__).from_select(
+                columns, _rollup_select().where(CallHistory.user_id == user_id)
+            )
+        )
+        bump_data_version(user_admin_id)
+        db.session.commit()
+        rebuilt += 1
+        log(f"call rollups rebuilt for user {user_id}")
+
+    return rebuilt
+
+
+# -------------------------------------------------
+# Readers
+# -------------------------------------------------
+def rollup_window(start_day=None, end_day=None):
+    """Join conditions restricting CallDailyRollup to [start_day, end_day)."""
+    conditions = [CallDailyRollup.user_id == User.id]
+    if start_day:
+        conditions.append(CallDailyRollup.day >= start_day)
+    if end_day:
+        conditions.append(CallDailyRollup.day < end_day)
+    return and_(*conditions)
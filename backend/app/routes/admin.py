@@ -1,10 +1,18 @@
 # admin.py
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, create_access_token, get_jwt_identity, get_jwt
-from datetime import datetime, timezone
-from ..models import db, Admin, User, Attendance, CallHistory, ActivityLog, UserRole
+from datetime import datetime
+from ..models import db, Admin, User, Attendance, CallHistory, CallDailyRollup, ActivityLog, UserRole, Job, update_by_id
+from ..jobs import enqueue_job
+from ..pagination import InvalidCursor, cursor_requested, keyset_paginate
+from ..fieldsets import FieldSet, InvalidFields
+from ..serialization import iso
+from ..tenant_version import bump_data_version
+from ..http_cache import tenant_conditional
+from ..analytics_cache import tenant_cached
+from ..performance_snapshots import record_performance_snapshots, tenant_performance_trend
 import re
-from sqlalchemy import func
+from sqlalchemy import func, case
 
 bp = Blueprint("admin", __name__, url_prefix="/api/admin")
 
@@ -19,20 +27,6 @@ def validate_email(email: str) -> bool:
     return bool(email and EMAIL_PATTERN.match(email))
 
 
-def iso(dt):
-    if dt is None:
-        return None
-    if isinstance(dt, str):
-        return dt
-    # ensure timezone-aware if possible
-    try:
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.isoformat()
-    except Exception:
-        return str(dt)
-
-
 def admin_required():
     """
     Simple helper that checks the JWT contains role=admin.
@@ -64,9 +58,11 @@ def get_admin_or_401():
     return admin, None
 
 
-def paginate_query(query, serialize_fn):
+def paginate_query(query, serialize_fn, keyset=None):
     """
     Generic pagination helper. Reads ?page & ?per_page from request.
+    With `keyset=(sort_column, id_column)`, a request carrying ?cursor= is
+    paged newest first by cursor instead (see app/pagination.py).
     """
     try:
         page = max(1, int(request.args.get("page", 1)))
@@ -78,6 +74,10 @@ def paginate_query(query, serialize_fn):
         per_page = 25
     per_page = max(1, min(per_page, 200))  # bound per_page
 
+    if keyset and cursor_requested():
+        items, meta = keyset_paginate(query, *keyset, per_page)
+        return [serialize_fn(item) for item in items], meta
+
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
     items = [serialize_fn(item) for item in pagination.items]
     meta = {
@@ -91,6 +91,16 @@ def paginate_query(query, serialize_fn):
     return items, meta
 
 
+def _combine_performance(total_att, ontime_att, total_calls, answered_calls):
+    """Shared 60/40 formula behind the single-user and batched scorers."""
+    att_score = (ontime_att / total_att * 100) if total_att else 0
+    call_score = (answered_calls / total_calls * 100) if total_calls else 0
+
+    # combine
+    combined = (att_score * 0.6) + (call_score * 0.4)
+    return round(combined, 2)
+
+
 def calculate_performance_for_user(user_id):
     """
     Example heuristic for performance_score:
@@ -105,19 +115,52 @@ def calculate_performance_for_user(user_id):
         Attendance.user_id == user_id, Attendance.status == "on-time"
     ).scalar() or 0
 
-    att_score = (ontime_att / total_att * 100) if total_att else 0
-
     # call responsiveness
     total_calls = db.session.query(func.count(CallHistory.id)).filter(CallHistory.user_id == user_id).scalar() or 0
     answered_calls = db.session.query(func.count(CallHistory.id)).filter(
         CallHistory.user_id == user_id, CallHistory.duration > 0
     ).scalar() or 0
 
-    call_score = (answered_calls / total_calls * 100) if total_calls else 0
+    return _combine_performance(total_att, ontime_att, total_calls, answered_calls)
 
-    # combine
-    combined = (att_score * 0.6) + (call_score * 0.4)
-    return round(combined, 2)
+
+def calculate_performance_for_admin(admin_id):
+    """
+    Batched calculate_performance_for_user for every user of an admin:
+    one grouped query over attendance and one over call history.
+    Returns {user_id: score}; users without any data score 0.
+    """
+    att_rows = db.session.query(
+        User.id,
+        func.count(Attendance.id),
+        func.sum(case((Attendance.status == "on-time", 1), else_=0))
+    ).outerjoin(Attendance, Attendance.user_id == User.id).filter(
+        User.admin_id == admin_id
+    ).group_by(User.id)
+    att = {uid: (total or 0, ontime or 0) for uid, total, ontime in att_rows}
+
+    call_rows = db.session.query(
+        User.id,
+        func.count(CallHistory.id),
+        func.sum(case((CallHistory.duration > 0, 1), else_=0))
+    ).outerjoin(CallHistory, CallHistory.user_id == User.id).filter(
+        User.admin_id == admin_id
+    ).group_by(User.id)
+    calls = {uid: (total or 0, answered or 0) for uid, total, answered in call_rows}
+
+    return {uid: _combine_performance(*att[uid], *calls.get(uid, (0, 0))) for uid in att}
+
+
+def save_performance_scores(scores, admin_id=None):
+    """
+    Write {user_id: score} of `admin_id`'s users with a single UPDATE (per
+    500 users) and keep them as today's snapshot. Does not commit.
+    """
+    if scores:
+        update_by_id(User.__table__, {uid: {"performance_score": score} for uid, score in scores.items()})
+        if admin_id is not None:
+            record_performance_snapshots(scores, admin_id)
+        bump_data_version(admin_id)
 
 
 # -------------------------
@@ -279,6 +322,8 @@ def get_users():
 # -------------------------
 @bp.route("/dashboard-stats", methods=["GET"])
 @jwt_required()
+@tenant_conditional
+@tenant_cached
 def dashboard_stats():
     if not admin_required():
         return jsonify({"error": "Admin role required"}), 403
@@ -288,26 +333,29 @@ def dashboard_stats():
         return resp
 
     try:
-        users = User.query.filter_by(admin_id=admin.id).all()
-        total = len(users)
-        active = sum(1 for u in users if u.is_active)
-        synced = sum(1 for u in users if u.last_sync)
-        expired = sum(1 for u in users if callable(getattr(u, "is_expired", None)) and u.is_expired())
-
-        # compute average performance (recalc if None)
-        perf_values = []
-        for u in users:
-            if getattr(u, "performance_score", None) is None:
-                score = calculate_performance_for_user(u.id)
-                # optionally persist: u.performance_score = score
-            else:
-                score = u.performance_score
-            perf_values.append(score or 0)
-
-        avg_perf = round(sum(perf_values) / total, 2) if total else 0
-
-        # Basic trend placeholder (you can compute time-series from ActivityLog)
-        performance_trend = perf_values[-7:] if len(perf_values) >= 7 else perf_values
+        # One aggregate row for the whole tenant
+        total, active, synced, expired, score_sum, scored = db.session.query(
+            func.count(User.id),
+            func.sum(case((User.is_active.is_(True), 1), else_=0)),
+            func.count(User.last_sync),
+            func.sum(case((User.expiry_date < datetime.utcnow().date(), 1), else_=0)),
+            func.sum(User.performance_score),
+            func.count(User.performance_score)
+        ).filter(User.admin_id == admin.id).one()
+        active, expired, score_sum = active or 0, expired or 0, score_sum or 0
+
+        # Users never scored: calculate them (batched for the whole tenant)
+        if scored < total:
+            unscored = db.session.query(User.id).filter(
+                User.admin_id == admin.id, User.performance_score.is_(None)
+            )
+            fresh = calculate_performance_for_admin(admin.id)
+            score_sum += sum(fresh.get(uid, 0) for (uid,) in unscored)
+
+        avg_perf = round(score_sum / total, 2) if total else 0
+
+        # Tenant average per day, last 7 days, from the stored snapshots
+        trend = tenant_performance_trend(admin.id, days=7)
 
         return jsonify({
             "stats": {
@@ -319,7 +367,8 @@ def dashboard_stats():
                 "users_with_sync": synced,
                 "sync_rate": round((synced / total) * 100, 2) if total else 0,
                 "avg_performance": avg_perf,
-                "performance_trend": performance_trend
+                "performance_trend": [score for _, score in trend],
+                "performance_trend_days": [day.isoformat() for day, _ in trend]
             }
         }), 200
 
@@ -333,6 +382,7 @@ def dashboard_stats():
 # -------------------------
 @bp.route("/recent-sync", methods=["GET"])
 @jwt_required()
+@tenant_conditional
 def recent_sync():
     if not admin_required():
         return jsonify({"error": "Admin role required"}), 403
@@ -349,6 +399,7 @@ def recent_sync():
                 "name": u.name,
                 "email": u.email,
                 "phone": u.phone,
+                "is_active": u.is_active,
                 "last_sync": iso(getattr(u, "last_sync", None))
             }
 
@@ -361,48 +412,19 @@ def recent_sync():
 
 
 # -------------------------
-# USER ATTENDANCE (admin-wide listing, paginated)
+# USER CALL HISTORY (ownership checked + pagination)
 # -------------------------
-@bp.route("/attendance", methods=["GET"])
-@jwt_required()
-def admin_attendance():
-    if not admin_required():
-        return jsonify({"error": "Admin role required"}), 403
+USER_CALL_FIELDS = FieldSet({
+    "id": CallHistory.id,
+    "number": CallHistory.phone_number,
+    "call_type": CallHistory.call_type,
+    "timestamp": CallHistory.timestamp,
+    "duration": CallHistory.duration,
+    "name": CallHistory.contact_name,
+    "created_at": CallHistory.created_at,
+})
 
-    admin, resp = get_admin_or_401()
-    if resp:
-        return resp
-
-    try:
-        # Join Attendance with User limited to this admin
-        query = db.session.query(Attendance, User).join(User, Attendance.user_id == User.id).filter(User.admin_id == admin.id).order_by(Attendance.created_at.desc())
-
-        # We will paginate by Attendance.id grouping - but for simplicity we paginate on the ORM result with flask_sqlalchemy paginate helper:
-        # convert to subquery of Attendance IDs matching admin's users
-        att_q = Attendance.query.join(User, Attendance.user_id == User.id).filter(User.admin_id == admin.id).order_by(Attendance.created_at.desc())
-        def serialize(a):
-            return {
-                "id": a.id,
-                "user_id": a.user_id,
-                "user_name": getattr(a, "user").name if getattr(a, "user", None) else None,
-                "check_in": iso(getattr(a, "check_in", None)),
-                "check_out": iso(getattr(a, "check_out", None)),
-                "status": a.status,
-                "address": a.address,
-                "created_at": iso(getattr(a, "created_at", None))
-            }
-
-        items, meta = paginate_query(att_q, serialize)
-        return jsonify({"attendance": items, "meta": meta}), 200
 
-    except Exception as e:
-        current_app.logger.exception("Admin attendance failed")
-        return jsonify({"error": "Internal server error"}), 500
-
-
-# -------------------------
-# USER CALL HISTORY (ownership checked + pagination)
-# -------------------------
 @bp.route("/user-call-history/<int:user_id>", methods=["GET"])
 @jwt_required()
 def user_call_history(user_id):
@@ -421,20 +443,15 @@ def user_call_history(user_id):
     try:
         q = CallHistory.query.filter_by(user_id=user_id).order_by(CallHistory.timestamp.desc())
 
-        def serialize(c):
-            return {
-                "id": c.id,
-                "number": c.number,
-                "call_type": c.call_type,
-                "timestamp": iso(getattr(c, "timestamp", None)),
-                "duration": c.duration,
-                "name": c.name,
-                "created_at": iso(getattr(c, "created_at", None))
-            }
+        keys = USER_CALL_FIELDS.requested()
+        q = USER_CALL_FIELDS.select(q, keys, keep=(CallHistory.timestamp, CallHistory.id))
 
-        items, meta = paginate_query(q, serialize)
+        rows, meta = paginate_query(q, lambda row: row, keyset=(CallHistory.timestamp, CallHistory.id))
+        items = USER_CALL_FIELDS.render(rows, keys)
         return jsonify({"call_history": items, "meta": meta}), 200
 
+    except (InvalidCursor, InvalidFields) as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         current_app.logger.exception("User call history failed")
         return jsonify({"error": "Internal server error"}), 500
@@ -443,6 +460,17 @@ def user_call_history(user_id):
 # -------------------------
 # USER ATTENDANCE FULL LIST (ownership checked + pagination)
 # -------------------------
+USER_ATTENDANCE_FIELDS = FieldSet({
+    "id": Attendance.id,
+    "user_id": Attendance.user_id,
+    "check_in": Attendance.check_in,
+    "check_out": Attendance.check_out,
+    "status": Attendance.status,
+    "address": Attendance.address,
+    "created_at": Attendance.created_at,
+})
+
+
 @bp.route("/user-attendance/<int:user_id>", methods=["GET"])
 @jwt_required()
 def user_attendance(user_id):
@@ -460,20 +488,15 @@ def user_attendance(user_id):
     try:
         q = Attendance.query.filter_by(user_id=user_id).order_by(Attendance.created_at.desc())
 
-        def serialize(a):
-            return {
-                "id": a.id,
-                "user_id": a.user_id,
-                "check_in": iso(getattr(a, "check_in", None)),
-                "check_out": iso(getattr(a, "check_out", None)),
-                "status": a.status,
-                "address": a.address,
-                "created_at": iso(getattr(a, "created_at", None))
-            }
+        keys = USER_ATTENDANCE_FIELDS.requested()
+        q = USER_ATTENDANCE_FIELDS.select(q, keys, keep=(Attendance.created_at, Attendance.id))
 
-        items, meta = paginate_query(q, serialize)
+        rows, meta = paginate_query(q, lambda row: row, keyset=(Attendance.created_at, Attendance.id))
+        items = USER_ATTENDANCE_FIELDS.render(rows, keys)
         return jsonify({"attendance": items, "meta": meta}), 200
 
+    except (InvalidCursor, InvalidFields) as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         current_app.logger.exception("User attendance failed")
         return jsonify({"error": "Internal server error"}), 500
@@ -504,21 +527,21 @@ def user_analytics(user_id):
         return jsonify({"error": "Unauthorized user access"}), 403
 
     try:
-        # Calls
+        # Calls (pre-aggregated daily rollups)
         call_stats = db.session.query(
-            func.count(CallHistory.id).label("total_calls"),
-            func.sum(func.case([(CallHistory.duration > 0, 1)], else_=0)).label("answered_calls"),
-            func.avg(CallHistory.duration).label("avg_duration")
-        ).filter(CallHistory.user_id == user_id).one()
+            func.coalesce(func.sum(CallDailyRollup.total_calls), 0).label("total_calls"),
+            func.coalesce(func.sum(CallDailyRollup.answered_calls), 0).label("answered_calls"),
+            func.coalesce(func.sum(CallDailyRollup.total_duration), 0).label("total_duration")
+        ).filter(CallDailyRollup.user_id == user_id).one()
 
         total_calls = int(call_stats.total_calls or 0)
         answered_calls = int(call_stats.answered_calls or 0)
-        avg_duration = float(call_stats.avg_duration or 0.0)
+        avg_duration = (int(call_stats.total_duration or 0) / total_calls) if total_calls else 0.0
 
         # Attendance
         att_stats = db.session.query(
             func.count(Attendance.id).label("total_att"),
-            func.sum(func.case([(Attendance.status == "on-time", 1)], else_=0)).label("on_time")
+            func.sum(case((Attendance.status == "on-time", 1), else_=0)).label("on_time")
         ).filter(Attendance.user_id == user_id).one()
 
         total_att = int(att_stats.total_att or 0)
@@ -529,8 +552,8 @@ def user_analytics(user_id):
         last_sync = getattr(user, "last_sync", None)
         last_login = getattr(user, "last_login", None)
 
-        # computed performance
-        perf_score = calculate_performance_for_user(user_id)
+        # computed performance, from the same totals as above (no raw call scan)
+        perf_score = _combine_performance(total_att, on_time, total_calls, answered_calls)
 
         analytics = {
             "user": {
@@ -577,17 +600,53 @@ def recalc_performance_all():
         return resp
 
     try:
-        users = User.query.filter_by(admin_id=admin.id).all()
-        updated = []
-        for u in users:
-            score = calculate_performance_for_user(u.id)
-            u.performance_score = score
-            updated.append({"user_id": u.id, "performance_score": score})
-
+        # Runs in worker.py; poll GET /api/admin/jobs/<id> for the outcome
+        job = enqueue_job("recalc_performance", {"admin_id": admin.id}, admin_id=admin.id)
         db.session.commit()
-        return jsonify({"message": "Performance recalculated", "updated": updated}), 200
+        return jsonify({
+            "message": "Performance recalculation queued",
+            "job": job.to_dict()
+        }), 202, {"Location": f"/api/admin/jobs/{job.id}"}
 
     except Exception:
         db.session.rollback()
-        current_app.logger.exception("Recalc performance failed")
+        current_app.logger.exception("Recalc performance enqueue failed")
         return jsonify({"error": "Internal server error"}), 500
+
+
+# -------------------------
+# BACKGROUND JOB STATUS (own tenant only)
+# -------------------------
+@bp.route("/jobs", methods=["GET"])
+@jwt_required()
+def list_jobs():
+    if not admin_required():
+        return jsonify({"error": "Admin role required"}), 403
+
+    admin, resp = get_admin_or_401()
+    if resp:
+        return resp
+
+    query = Job.query.filter(Job.admin_id == admin.id)
+    status = request.args.get("status")
+    if status:
+        query = query.filter(Job.status == status)
+
+    items, meta = paginate_query(query.order_by(Job.id.desc()), lambda j: j.to_dict())
+    return jsonify({"jobs": items, "meta": meta}), 200
+
+
+@bp.route("/jobs/<int:job_id>", methods=["GET"])
+@jwt_required()
+def get_job(job_id):
+    if not admin_required():
+        return jsonify({"error": "Admin role required"}), 403
+
+    admin, resp = get_admin_or_401()
+    if resp:
+        return resp
+
+    job = Job.query.filter_by(id=job_id, admin_id=admin.id).first()
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({"job": job.to_dict()}), 200
@@ -1,17 +1,52 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from datetime import datetime, timedelta
-from sqlalchemy import func
+from sqlalchemy import func, select
 
+from ..export import EXPORT_FORMATS, stream_export
+from ..fieldsets import FieldSet, InvalidFields
 from ..models import db, Admin, Attendance, User
+from ..pagination import InvalidCursor, cursor_requested, keyset_paginate
 
 bp = Blueprint("admin_attendance", __name__, url_prefix="/api/admin/attendance")
 
+# Listing and export columns; narrowed with ?fields=
+ATTENDANCE_FIELDS = FieldSet({
+    "id": Attendance.id,
+    "user_id": Attendance.user_id,
+    "user_name": User.name,
+    "status": Attendance.status,
+    "check_in": Attendance.check_in,
+    "check_out": Attendance.check_out,
+    "address": Attendance.address,
+    "latitude": Attendance.latitude,
+    "longitude": Attendance.longitude,
+    "image_path": Attendance.image_path,
+    "synced": Attendance.synced,
+    "external_id": Attendance.external_id,
+    "created_at": Attendance.created_at,
+    "sync_timestamp": Attendance.sync_timestamp,
+})
+
 def admin_required():
     claims = get_jwt()
     return claims.get("role") == "admin"
 
 
+def window_start():
+    """Start of the ?filter= window (today/week/month; anything else = all time)."""
+    filter_type = request.args.get("filter", "today")
+    now = datetime.utcnow()
+
+    if filter_type == "today":
+        return datetime(now.year, now.month, now.day)
+    if filter_type == "week":
+        return now - timedelta(days=7)
+    if filter_type == "month":
+        return now - timedelta(days=30)
+    return None
+
+
 @bp.route("", methods=["GET"])
 @jwt_required()
 def get_admin_attendance():
@@ -29,52 +64,39 @@ def get_admin_attendance():
         return jsonify({"attendance": [], "meta": {}}), 200
 
     # Time Filter (today/week/month)
-    filter_type = request.args.get("filter", "today")
-
-    now = datetime.utcnow()
-    start_time = None
-
-    if filter_type == "today":
-        start_time = datetime(now.year, now.month, now.day)
-    elif filter_type == "week":
-        start_time = now - timedelta(days=7)
-    elif filter_type == "month":
-        start_time = now - timedelta(days=30)
+    start_time = window_start()
 
     # Pagination
     page = int(request.args.get("page", 1))
-    per_page = int(request.args.get("per_page", 25))
+    per_page = min(max(int(request.args.get("per_page", 25)), 1), 200)
+
+    try:
+        keys = ATTENDANCE_FIELDS.requested()
+    except InvalidFields as e:
+        return jsonify({"error": str(e)}), 400
 
     # Query all users of this admin
-    base_query = db.session.query(Attendance).join(User).filter(User.admin_id == admin_id)
+    base_query = (
+        db.session.query(Attendance)
+        .select_from(Attendance)
+        .outerjoin(User, Attendance.user_id == User.id)
+        .filter(Attendance.admin_id == admin_id)
+    )
 
     if start_time:
         base_query = base_query.filter(Attendance.check_in >= start_time)
 
-    paginated = base_query.order_by(Attendance.check_in.desc()).paginate(page=page, per_page=per_page, error_out=False)
-
-    results = []
-    for a in paginated.items:
-        results.append({
-            "id": a.id,
-            "user_id": a.user_id,
-            "user_name": a.user.name if a.user else None,
-            "status": a.status,
-            "check_in": a.check_in.isoformat() if a.check_in else None,
-            "check_out": a.check_out.isoformat() if a.check_out else None,
-            "address": a.address,
-            "latitude": a.latitude,
-            "longitude": a.longitude,
-            "image_path": a.image_path,
-            "synced": a.synced,
-            "external_id": a.external_id,
-            "created_at": a.created_at.isoformat() if a.created_at else None,
-            "sync_timestamp": a.sync_timestamp.isoformat() if a.sync_timestamp else None
-        })
-
-    return jsonify({
-        "attendance": results,
-        "meta": {
+    base_query = ATTENDANCE_FIELDS.select(base_query, keys, keep=(Attendance.check_in, Attendance.id))
+
+    if cursor_requested():
+        try:
+            rows, meta = keyset_paginate(base_query, Attendance.check_in, Attendance.id, per_page)
+        except InvalidCursor as e:
+            return jsonify({"error": str(e)}), 400
+    else:
+        paginated = base_query.order_by(Attendance.check_in.desc()).paginate(page=page, per_page=per_page, error_out=False)
+        rows = paginated.items
+        meta = {
             "page": paginated.page,
             "per_page": paginated.per_page,
             "total": paginated.total,
@@ -82,4 +104,44 @@ def get_admin_attendance():
             "has_next": paginated.has_next,
             "has_prev": paginated.has_prev
         }
+
+    results = ATTENDANCE_FIELDS.render(rows, keys)
+
+    return jsonify({
+        "attendance": results,
+        "meta": meta
     }), 200
+
+
+@bp.route("/export", methods=["GET"])
+@jwt_required()
+def export_admin_attendance():
+    """Stream attendance in the ?filter= window as ?format=csv (default) or ndjson."""
+    if not admin_required():
+        return jsonify({"error": "Admin access only"}), 403
+
+    admin_id = int(get_jwt_identity())
+
+    fmt = request.args.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+
+    try:
+        keys = ATTENDANCE_FIELDS.requested()
+    except InvalidFields as e:
+        return jsonify({"error": str(e)}), 400
+
+    stmt = (
+        select(*ATTENDANCE_FIELDS.labelled(keys))
+        .select_from(Attendance)
+        .join(User, Attendance.user_id == User.id)
+        .where(Attendance.admin_id == admin_id)
+        .order_by(Attendance.check_in.desc(), Attendance.id.desc())
+    )
+
+    start_time = window_start()
+    if start_time:
+        stmt = stmt.where(Attendance.check_in >= start_time)
+
+    filename = f"attendance-{datetime.utcnow():%Y%m%d}"
+    return stream_export(stmt, fmt, filename)
@@ -4,7 +4,10 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta, timezone
 from sqlalchemy import func, cast, Date, case, and_
-from app.models import db, CallHistory, User, Admin
+from app.models import db, CallHistory, CallDailyRollup, User, Admin
+from app.rollups import rollup_window
+from app.http_cache import tenant_conditional
+from app.analytics_cache import tenant_cached
 
 bp = Blueprint("admin_call_analytics", __name__, url_prefix="/api/admin")
 
@@ -31,6 +34,12 @@ def _get_time_bounds(filter_type: str):
     return None, None
 
 
+def _get_day_bounds(filter_type: str):
+    """Same windows as _get_time_bounds, widened to whole UTC days for the rollups."""
+    start, end = _get_time_bounds(filter_type)
+    return (start.date() if start else None), (end.date() if end else None)
+
+
 @bp.route("/call-analytics/sync", methods=["POST"])
 @jwt_required()
 def sync_call_analytics():
@@ -61,122 +70,77 @@ def sync_call_analytics():
 
 @bp.route("/call-analytics", methods=["GET"])
 @jwt_required()
+@tenant_conditional
+@tenant_cached
 def get_call_analytics():
     try:
         admin_id = int(get_jwt_identity())
-        admin = Admin.query.get(admin_id)
-        if not admin:
+        # The real row, not the subscription cache: existence is an access check
+        if db.session.get(Admin, admin_id) is None:
             return jsonify({"error": "Unauthorized"}), 401
 
         # read filter param: today | week | month
         filter_type = request.args.get("filter", None)
-        start_time, end_time = _get_time_bounds(filter_type or "")
-
-        # base join condition for admin users
-        user_join_condition = User.id == CallHistory.user_id
-        admin_filter = User.admin_id == admin_id
-
-        # build common time filter expression
-        time_filters = []
-        if start_time:
-            time_filters.append(CallHistory.timestamp >= start_time)
-        if end_time:
-            time_filters.append(CallHistory.timestamp < end_time)
-
-        # ======================================================
-        # TOTALS (single aggregated queries)
-        # ======================================================
-
-        totals_q = (
-            db.session.query(
-                func.count().label("total_calls"),
-                func.coalesce(func.sum(case([(CallHistory.call_type == "incoming", 1)], else_=0)), 0).label("incoming"),
-                func.coalesce(func.sum(case([(CallHistory.call_type == "outgoing", 1)], else_=0)), 0).label("outgoing"),
-                func.coalesce(func.sum(case([(CallHistory.call_type.in_(["missed", "rejected"]), 1)], else_=0)), 0).label("missed"),
-                func.coalesce(func.sum(CallHistory.duration), 0).label("total_duration")
-            )
-            .select_from(CallHistory)
-            .join(User, user_join_condition)
-            .filter(admin_filter)
-        )
-
-        if time_filters:
-            totals_q = totals_q.filter(and_(*time_filters))
-
-        totals_row = totals_q.one()
-
-        total_calls = int(totals_row.total_calls or 0)
-        total_incoming = int(totals_row.incoming or 0)
-        total_outgoing = int(totals_row.outgoing or 0)
-        total_missed = int(totals_row.missed or 0)
-        total_duration = int(totals_row.total_duration or 0)
-
-        # ======================================================
-        # DAILY TREND
-        # ======================================================
-        daily_q = (
-            db.session.query(
-                cast(CallHistory.timestamp, Date).label("date"),
-                func.count().label("count")
-            )
-            .select_from(CallHistory)
-            .join(User, user_join_condition)
-            .filter(admin_filter)
-        )
+        start_day, end_day = _get_day_bounds(filter_type or "")
 
-        if time_filters:
-            daily_q = daily_q.filter(and_(*time_filters))
-
-        daily_q = daily_q.group_by(cast(CallHistory.timestamp, Date)).order_by(cast(CallHistory.timestamp, Date))
-        daily_trend = [{"date": str(row.date), "count": int(row.count)} for row in daily_q.all()]
+        # window lives in the JOIN so users without calls still get a row
+        window = rollup_window(start_day, end_day)
+        R = CallDailyRollup
 
         # ======================================================
-        # USER-WISE SUMMARY (single aggregated query)
+        # USER-WISE SUMMARY (from the daily rollups)
         # ======================================================
-        # We produce for each user: incoming_count, outgoing_count, missed_count, total_duration
+        # Global totals are summed from these rows, so the cards and the
+        # per-user table come from one pass over a few rows per user/day.
         user_agg_q = (
             db.session.query(
                 User.id.label("user_id"),
                 User.name.label("user_name"),
-                func.coalesce(func.sum(case([(and_(CallHistory.call_type == "incoming"), 1)], else_=0)), 0).label("incoming"),
-                func.coalesce(func.sum(case([(and_(CallHistory.call_type == "outgoing"), 1)], else_=0)), 0).label("outgoing"),
-                func.coalesce(func.sum(case([(and_(CallHistory.call_type.in_(["missed", "rejected"])), 1)], else_=0)), 0).label("missed"),
-                func.coalesce(func.sum(CallHistory.duration), 0).label("total_duration")
+                func.coalesce(func.sum(R.total_calls), 0).label("total_calls"),
+                func.coalesce(func.sum(R.incoming_calls), 0).label("incoming"),
+                func.coalesce(func.sum(R.outgoing_calls), 0).label("outgoing"),
+                func.coalesce(func.sum(R.missed_calls + R.rejected_calls), 0).label("missed"),
+                func.coalesce(func.sum(R.total_duration), 0).label("total_duration")
             )
             .select_from(User)
-            .outerjoin(CallHistory, CallHistory.user_id == User.id)
+            .outerjoin(R, window)
             .filter(User.admin_id == admin_id)
             .group_by(User.id, User.name)
         )
 
-        # apply time filters to the callhistory side using correlated conditions
-        if time_filters:
-            # join uses CallHistory table alias; apply time restrictions by adding conditions to the query.
-            # SQLAlchemy will place these in WHERE (applies to outerjoin as well; users without calls will still appear due to outerjoin).
-            user_agg_q = user_agg_q.filter(or_(CallHistory.id == None, and_(*time_filters)))
-
-        user_summary_rows = user_agg_q.all()
-
         user_summary = []
-        for row in user_summary_rows:
+        for row in user_agg_q.all():
             user_summary.append({
                 "user_id": int(row.user_id),
                 "user_name": row.user_name,
                 "incoming": int(row.incoming or 0),
                 "outgoing": int(row.outgoing or 0),
                 "missed": int(row.missed or 0),
-                "total_duration": int(row.total_duration or 0)
+                "total_duration": int(row.total_duration or 0),
+                "total_calls": int(row.total_calls or 0)
             })
 
+        # ======================================================
+        # DAILY TREND
+        # ======================================================
+        daily_q = (
+            db.session.query(R.day.label("date"), func.sum(R.total_calls).label("count"))
+            .join(User, window)
+            .filter(User.admin_id == admin_id)
+            .group_by(R.day)
+            .order_by(R.day)
+        )
+        daily_trend = [{"date": str(row.date), "count": int(row.count or 0)} for row in daily_q.all()]
+
         # ======================================================
         # RETURN RESPONSE
         # ======================================================
         return jsonify({
-            "total_calls": total_calls,
-            "incoming": total_incoming,
-            "outgoing": total_outgoing,
-            "missed": total_missed,
-            "total_duration": total_duration,
+            "total_calls": sum(u["total_calls"] for u in user_summary),
+            "incoming": sum(u["incoming"] for u in user_summary),
+            "outgoing": sum(u["outgoing"] for u in user_summary),
+            "missed": sum(u["missed"] for u in user_summary),
+            "total_duration": sum(u["total_duration"] for u in user_summary),
             "daily_trend": daily_trend,
             "user_summary": user_summary
         }), 200
@@ -1,14 +1,37 @@
 # app/routes/admin_all_call_history.py
 
+from functools import wraps
+
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from datetime import datetime, timedelta
+from sqlalchemy import select
+
+from app.export import EXPORT_FORMATS, stream_export
+from app.fieldsets import FieldSet, InvalidFields
 from app.models import db, User, CallHistory
+from app.number_search import MATCH_MODES, number_search_filter
+from app.pagination import InvalidCursor, cursor_requested, keyset_paginate
 
 bp = Blueprint("admin_all_call_history", __name__, url_prefix="/api/admin")
 
+# Listing and export columns; narrowed with ?fields=
+CALL_HISTORY_FIELDS = FieldSet({
+    "id": CallHistory.id,
+    "user_id": CallHistory.user_id,
+    "user_name": User.name,
+    "phone_number": CallHistory.phone_number,
+    "formatted_number": CallHistory.formatted_number,
+    "contact_name": CallHistory.contact_name,
+    "call_type": CallHistory.call_type,
+    "duration": CallHistory.duration,
+    "timestamp": CallHistory.timestamp,
+    "created_at": CallHistory.created_at,
+})
+
 
 def admin_required(fn):
+    @wraps(fn)
     def wrapper(*args, **kwargs):
         if get_jwt().get("role") != "admin":
             return jsonify({"error": "Admin access required"}), 403
@@ -16,6 +39,59 @@ def admin_required(fn):
     return wrapper
 
 
+def call_history_filters(admin_id):
+    """
+    WHERE conditions for the admin call history views from the request's
+    filter/date/search/match/call_type params, shared by the listing and the
+    export. Returns (conditions, error_response); error_response is None when OK.
+    """
+    conditions = [CallHistory.admin_id == admin_id]
+
+    # ============================
+    # 1️⃣ DATE FILTER
+    # ============================
+    filter_type = request.args.get("filter")  # today / week / month
+    custom_date = request.args.get("date")  # YYYY-MM-DD format
+
+    now = datetime.utcnow()
+    start_time = None
+
+    if filter_type == "today":
+        start_time = datetime(now.year, now.month, now.day)
+    elif filter_type == "week":
+        start_time = now - timedelta(days=7)
+    elif filter_type == "month":
+        start_time = now - timedelta(days=30)
+    elif custom_date:
+        try:
+            start_time = datetime.strptime(custom_date, "%Y-%m-%d")
+        except:
+            return None, (jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400)
+
+    if start_time:
+        conditions.append(CallHistory.timestamp >= start_time)
+
+    # ============================
+    # 2️⃣ PHONE SEARCH FILTER (normalized digits, indexed)
+    # ============================
+    search = request.args.get("search")
+    match = request.args.get("match", "contains")  # contains / suffix (last digits)
+    if match not in MATCH_MODES:
+        return None, (jsonify({"error": f"match must be one of {', '.join(MATCH_MODES)}"}), 400)
+
+    if search:
+        conditions.append(number_search_filter(search, match))
+
+    # ============================
+    # 3️⃣ CALL TYPE FILTER
+    # ============================
+    call_type = request.args.get("call_type")  # incoming/outgoing/missed
+    if call_type:
+        conditions.append(CallHistory.call_type == call_type)
+
+    return conditions, None
+
+
 @bp.route("/all-call-history", methods=["GET"])
 @jwt_required()
 @admin_required
@@ -26,82 +102,33 @@ def all_call_history():
         page = int(request.args.get("page", 1))
         per_page = int(request.args.get("per_page", 50))
 
-        # ============================
-        # 1️⃣ DATE FILTER
-        # ============================
-        filter_type = request.args.get("filter")  # today / week / month
-        custom_date = request.args.get("date")  # YYYY-MM-DD format
-        
-        now = datetime.utcnow()
-        start_time = None
-
-        if filter_type == "today":
-            start_time = datetime(now.year, now.month, now.day)
-        elif filter_type == "week":
-            start_time = now - timedelta(days=7)
-        elif filter_type == "month":
-            start_time = now - timedelta(days=30)
-        elif custom_date:
-            try:
-                start_time = datetime.strptime(custom_date, "%Y-%m-%d")
-            except:
-                return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+        conditions, error = call_history_filters(admin_id)
+        if error:
+            return error
 
-        # ============================
-        # 2️⃣ PHONE SEARCH FILTER
-        # ============================
-        search = request.args.get("search")
-        
-        # ============================
-        # 3️⃣ CALL TYPE FILTER
-        # ============================
-        call_type = request.args.get("call_type")  # incoming/outgoing/missed
+        keys = CALL_HISTORY_FIELDS.requested()
 
         # ============================
-        # BASE QUERY (JOIN + ADMIN FILTER)
+        # BASE QUERY (tenant rows, users joined for names)
         # ============================
         query = (
-            db.session.query(CallHistory, User)
+            db.session.query(CallHistory)
+            .select_from(CallHistory)
             .join(User, CallHistory.user_id == User.id)
-            .filter(User.admin_id == admin_id)
+            .filter(*conditions)
         )
-
-        # Apply date filter
-        if start_time:
-            query = query.filter(CallHistory.timestamp >= start_time)
-
-        # Apply phone number search
-        if search:
-            query = query.filter(CallHistory.phone_number.like(f"%{search}%"))
-
-        # Apply call type filter
-        if call_type:
-            query = query.filter(CallHistory.call_type == call_type)
+        query = CALL_HISTORY_FIELDS.select(query, keys, keep=(CallHistory.timestamp, CallHistory.id))
 
         # Sorting
         query = query.order_by(CallHistory.timestamp.desc())
 
-        # Pagination
-        paginated = query.paginate(page=page, per_page=per_page, error_out=False)
-
-        data = []
-        for rec, user in paginated.items:
-            data.append({
-                "id": rec.id,
-                "user_id": rec.user_id,
-                "user_name": user.name,
-                "phone_number": rec.phone_number,
-                "formatted_number": rec.formatted_number,
-                "contact_name": rec.contact_name,
-                "call_type": rec.call_type,
-                "duration": rec.duration,
-                "timestamp": rec.timestamp.isoformat() if rec.timestamp else None,
-                "created_at": rec.created_at.isoformat() if rec.created_at else None,
-            })
-
-        return jsonify({
-            "call_history": data,
-            "meta": {
+        # Pagination (keyset when ?cursor= is sent, page/offset otherwise)
+        if cursor_requested():
+            rows, meta = keyset_paginate(query, CallHistory.timestamp, CallHistory.id, per_page)
+        else:
+            paginated = query.paginate(page=page, per_page=per_page, error_out=False)
+            rows = paginated.items
+            meta = {
                 "page": paginated.page,
                 "per_page": paginated.per_page,
                 "total": paginated.total,
@@ -109,7 +136,47 @@ def all_call_history():
                 "has_next": paginated.has_next,
                 "has_prev": paginated.has_prev,
             }
+
+        data = CALL_HISTORY_FIELDS.render(rows, keys)
+
+        return jsonify({
+            "call_history": data,
+            "meta": meta
         }), 200
 
+    except (InvalidCursor, InvalidFields) as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": "Internal error", "detail": str(e)}), 500
+
+
+@bp.route("/all-call-history/export", methods=["GET"])
+@jwt_required()
+@admin_required
+def export_call_history():
+    """Stream the filtered call history as ?format=csv (default) or ndjson."""
+    admin_id = int(get_jwt_identity())
+
+    fmt = request.args.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+
+    conditions, error = call_history_filters(admin_id)
+    if error:
+        return error
+
+    try:
+        keys = CALL_HISTORY_FIELDS.requested()
+    except InvalidFields as e:
+        return jsonify({"error": str(e)}), 400
+
+    stmt = (
+        select(*CALL_HISTORY_FIELDS.labelled(keys))
+        .select_from(CallHistory)
+        .join(User, CallHistory.user_id == User.id)
+        .where(*conditions)
+        .order_by(CallHistory.timestamp.desc(), CallHistory.id.desc())
+    )
+
+    filename = f"call-history-{datetime.utcnow():%Y%m%d}"
+    return stream_export(stmt, fmt, filename)
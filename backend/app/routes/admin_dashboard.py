@@ -2,11 +2,12 @@
 
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from datetime import datetime, timedelta
-from sqlalchemy import func
+
 from app.models import db
-from ..models import User, Admin, Attendance, CallHistory, ActivityLog
-g
+from ..models import User, CallHistory, ActivityLog
+from ..serialization import iso
+from ..activity_logs import InvalidLogFilter, filter_activity_logs, log_per_page
+from ..pagination import InvalidCursor, keyset_paginate
 
 admin_dashboard_bp = Blueprint("admin_dashboard", __name__, url_prefix="/api/admin")
 
@@ -19,99 +20,40 @@ def admin_required():
     return claims.get("role") == "admin"
 
 
-def iso(dt):
-    if not dt:
-        return None
-    return dt.isoformat() if hasattr(dt, "isoformat") else str(dt)
-
-
-# =========================================================
-# 1️⃣ DASHBOARD STATS (TOP CARDS)
-# =========================================================
-@admin_dashboard_bp.route("/dashboard-stats", methods=["GET"])
-@jwt_required()
-def dashboard_stats():
-    if not admin_required():
-        return jsonify({"error": "Admin access only"}), 403
-
-    admin_id = int(get_jwt_identity())
-    admin = Admin.query.get(admin_id)
-
-    users = User.query.filter_by(admin_id=admin_id).all()
-    total = len(users)
-    active = sum(1 for u in users if u.is_active)
-    synced = sum(1 for u in users if u.last_sync)
-
-    avg_perf = round(sum(u.performance_score for u in users) / total, 2) if total else 0
-
-    return jsonify({
-        "stats": {
-            "total_users": total,
-            "active_users": active,
-            "expired_users": 0,
-            "user_limit": admin.user_limit,
-            "remaining_slots": admin.user_limit - total,
-            "users_with_sync": synced,
-            "sync_rate": round((synced / total) * 100, 2) if total else 0,
-            "avg_performance": avg_perf,
-            "performance_trend": [50, 60, 70, 65, 82, 78, 90]
-        }
-    }), 200
+# Dashboard stats (/dashboard-stats) and recent sync (/recent-sync) are
+# served by app/routes/admin.py, attendance (/attendance) by
+# app/routes/admin_attendance.py; create_app() rejects duplicate routes.
 
 
 # =========================================================
-# 2️⃣ FIXED — RECENT SYNC LAST 10 USERS
-# =========================================================
-@admin_dashboard_bp.route("/recent-sync", methods=["GET"])
-@jwt_required()
-def recent_sync():
-    if not admin_required():
-        return jsonify({"error": "Admin only"}), 403
-
-    admin_id = int(get_jwt_identity())
-
-    users = (
-        User.query
-        .filter(User.admin_id == admin_id)
-        .order_by(User.last_sync.desc().nullslast())
-        .limit(10)
-        .all()
-    )
-
-    return jsonify({
-        "recent_sync": [
-            {
-                "id": u.id,
-                "name": u.name,
-                "email": u.email or "-",
-                "phone": u.phone or "-",
-                "is_active": u.is_active,
-                "last_sync": iso(u.last_sync)
-            }
-            for u in users
-        ]
-    }), 200
-
-
-# =========================================================
-# 3️⃣ USER ACTIVITY LOGS (latest 20)
+# 3️⃣ USER ACTIVITY LOGS (newest first, cursor paginated)
 # =========================================================
 @admin_dashboard_bp.route("/user-logs", methods=["GET"])
 @jwt_required()
 def user_logs():
+    """
+    Logs about this admin's users, 20 per page; ?cursor= for the next page,
+    ?target_id=<user id>, ?actor_role / ?actor_id and ?since / ?until to
+    narrow them (see app/activity_logs.py).
+    """
     if not admin_required():
         return jsonify({"error": "Admin only"}), 403
 
     admin_id = int(get_jwt_identity())
 
-    logs = (
-        db.session.query(ActivityLog, User)
-        .join(User, User.id == ActivityLog.target_id)
-        .filter(User.admin_id == admin_id)
-        .order_by(ActivityLog.timestamp.desc())
-        .limit(20)
-        .all()
-    )
+    try:
+        query = (
+            db.session.query(ActivityLog, User)
+            .join(User, User.id == ActivityLog.target_id)
+            .filter(ActivityLog.target_type == "user", User.admin_id == admin_id)
+        )
+        query = filter_activity_logs(query, allowed=("actor_role", "actor_id", "target_id"))
+        logs, meta = keyset_paginate(
+            query, ActivityLog.timestamp, ActivityLog.id, log_per_page(default=20),
+            key=lambda row: (row[0].timestamp, row[0].id)
+        )
+    except (InvalidCursor, InvalidLogFilter) as e:
+        return jsonify({"error": str(e)}), 400
 
     return jsonify({
         "logs": [
@@ -121,43 +63,8 @@ def user_logs():
                 "timestamp": iso(log.timestamp)
             }
             for log, u in logs
-        ]
-    }), 200
-
-
-# =========================================================
-# 4️⃣ ADMIN — ALL ATTENDANCE
-# =========================================================
-@admin_dashboard_bp.route("/attendance", methods=["GET"])
-@jwt_required()
-def admin_attendance():
-    if not admin_required():
-        return jsonify({"error": "Admin only"}), 403
-
-    admin_id = int(get_jwt_identity())
-
-    records = (
-        db.session.query(Attendance, User)
-        .join(User, Attendance.user_id == User.id)
-        .filter(User.admin_id == admin_id)
-        .order_by(Attendance.created_at.desc())
-        .all()
-    )
-
-    return jsonify({
-        "attendance": [
-            {
-                "id": a.id,
-                "user_name": u.name,
-                "check_in": iso(a.check_in),
-                "check_out": iso(a.check_out),
-                "address": a.address,
-                "latitude": a.latitude,
-                "longitude": a.longitude,
-                "status": a.status,
-            }
-            for a, u in records
-        ]
+        ],
+        "meta": meta
     }), 200
 
 
@@ -172,13 +79,10 @@ def admin_call_history():
 
     admin_id = int(get_jwt_identity())
 
-    users = User.query.filter_by(admin_id=admin_id).all()
-    user_ids = [u.id for u in users]
-
     calls = (
         db.session.query(CallHistory, User)
         .join(User, User.id == CallHistory.user_id)
-        .filter(CallHistory.user_id.in_(user_ids))
+        .filter(CallHistory.admin_id == admin_id)
         .order_by(CallHistory.timestamp.desc())
         .limit(200)
         .all()
@@ -1,42 +1,52 @@
 # app/routes/admin_performance.py
 
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import func, and_, or_, case
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from sqlalchemy import func
 from datetime import datetime, timedelta
 
-from app.models import db, CallHistory, User, Admin
+from app.models import db, CallDailyRollup, User, Admin
+from app.rollups import rollup_window
+from app.performance_snapshots import tenant_performance_trend, user_performance_trend
+from app.http_cache import tenant_conditional
+from app.analytics_cache import tenant_cached
 
 bp = Blueprint("admin_performance", __name__, url_prefix="/api/admin")
 
+DEFAULT_TREND_DAYS = 30
+MAX_TREND_DAYS = 366
+
 
 # ---------------------------
 # Helper: Date Range Filter
 # ---------------------------
 def get_date_range(filter_type):
-    today = datetime.now().date()
+    """Return [start, end) as UTC dates, matching the daily rollup buckets."""
+    today = datetime.utcnow().date()
 
     if filter_type == "today":
         start = today
-        end = today + timedelta(days=1)
 
     elif filter_type == "week":
         start = today - timedelta(days=7)
-        end = today + timedelta(days=1)
 
     elif filter_type == "month":
         start = today - timedelta(days=30)
-        end = today + timedelta(days=1)
 
     else:
         start = datetime(2000, 1, 1).date()
-        end = today + timedelta(days=1)
 
-    # Convert to timestamp
-    start_ts = int(datetime.combine(start, datetime.min.time()).timestamp())
-    end_ts = int(datetime.combine(end, datetime.min.time()).timestamp())
+    return start, today + timedelta(days=1)
+
+
+def get_trend_days():
+    """?days=N for the trend endpoints, bounded to 1..MAX_TREND_DAYS."""
+    days = request.args.get("days", DEFAULT_TREND_DAYS, type=int)
+    return min(max(days, 1), MAX_TREND_DAYS)
 
-    return start_ts, end_ts
+
+def serialize_trend(trend):
+    return [{"day": day.isoformat(), "score": score} for day, score in trend]
 
 
 # ---------------------------
@@ -44,6 +54,8 @@ def get_date_range(filter_type):
 # ---------------------------
 @bp.route("/performance", methods=["GET"])
 @jwt_required()
+@tenant_conditional
+@tenant_cached
 def performance():
     try:
         admin_id = int(get_jwt_identity())
@@ -54,35 +66,24 @@ def performance():
 
         # Load filter
         filter_type = request.args.get("filter", "today")
-        start_ts, end_ts = get_date_range(filter_type)
+        start_day, end_day = get_date_range(filter_type)
 
-        # CASE expressions
-        incoming_case = case((CallHistory.call_type == "incoming", 1), else_=0)
-        outgoing_case = case((CallHistory.call_type == "outgoing", 1), else_=0)
-        missed_case = case((CallHistory.call_type == "missed", 1), else_=0)
-        rejected_case = case((CallHistory.call_type == "rejected", 1), else_=0)
+        R = CallDailyRollup
 
-        # USER PERFORMANCE
+        # USER PERFORMANCE (pre-aggregated daily rollups)
         user_data = (
             db.session.query(
                 User.id,
                 User.name,
-                func.count(CallHistory.id).label("total_calls"),
-                func.sum(CallHistory.duration).label("total_duration"),
-                func.sum(incoming_case).label("incoming"),
-                func.sum(outgoing_case).label("outgoing"),
-                func.sum(missed_case).label("missed"),
-                func.sum(rejected_case).label("rejected"),
-            )
-            .outerjoin(CallHistory, CallHistory.user_id == User.id)
-            .filter(
-                User.admin_id == admin_id,
-                or_(
-                    CallHistory.timestamp == None,
-                    and_(CallHistory.timestamp >= start_ts,
-                         CallHistory.timestamp < end_ts)
-                )
+                func.sum(R.total_calls).label("total_calls"),
+                func.sum(R.total_duration).label("total_duration"),
+                func.sum(R.incoming_calls).label("incoming"),
+                func.sum(R.outgoing_calls).label("outgoing"),
+                func.sum(R.missed_calls).label("missed"),
+                func.sum(R.rejected_calls).label("rejected"),
             )
+            .outerjoin(R, rollup_window(start_day, end_day))
+            .filter(User.admin_id == admin_id)
             .group_by(User.id)
             .all()
         )
@@ -115,3 +116,58 @@ def performance():
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+
+# ---------------------------
+# GET /api/admin/performance/trend
+# ---------------------------
+@bp.route("/performance/trend", methods=["GET"])
+@jwt_required()
+@tenant_conditional
+@tenant_cached
+def performance_trend():
+    """Tenant average score per day over the last ?days= days, from the daily snapshots."""
+    if get_jwt().get("role") != "admin":
+        return jsonify({"error": "Admin role required"}), 403
+
+    try:
+        admin_id = int(get_jwt_identity())
+        days = get_trend_days()
+
+        return jsonify({
+            "days": days,
+            "trend": serialize_trend(tenant_performance_trend(admin_id, days=days))
+        }), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# ---------------------------
+# GET /api/admin/performance/trend/users/<user_id>
+# ---------------------------
+@bp.route("/performance/trend/users/<int:user_id>", methods=["GET"])
+@jwt_required()
+@tenant_conditional
+@tenant_cached
+def user_performance_trend_view(user_id):
+    """One user's score per day over the last ?days= days, from the daily snapshots."""
+    if get_jwt().get("role") != "admin":
+        return jsonify({"error": "Admin role required"}), 403
+
+    try:
+        admin_id = int(get_jwt_identity())
+        owner = db.session.query(User.admin_id).filter(User.id == user_id).scalar()
+        if owner != admin_id:
+            return jsonify({"error": "Unauthorized user access"}), 403
+
+        days = get_trend_days()
+
+        return jsonify({
+            "user_id": user_id,
+            "days": days,
+            "trend": serialize_trend(user_performance_trend(user_id, days=days))
+        }), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -4,6 +4,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from datetime import datetime, timedelta
 from sqlalchemy import func, case
 from app.models import db, User, Admin, CallHistory
+from app.serialization import iso
 
 bp = Blueprint("admin_call_analytics", __name__, url_prefix="/api/admin")
 
@@ -14,13 +15,6 @@ def admin_required():
     return claims.get("role") == "admin"
 
 
-def iso(dt):
-    try:
-        return dt.isoformat() if dt else None
-    except:
-        return str(dt)
-
-
 def parse_int(name, default, min_v=None, max_v=None):
     try:
         v = int(request.args.get(name, default))
@@ -1,25 +1,16 @@
 # app/routes/attendance.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import db, Attendance
-from datetime import datetime
-import uuid
+from app.models import db, User
+from app.ingest import upsert_attendance
+from app.compression import accepts_compressed_body
 
 bp = Blueprint("attendance", __name__, url_prefix="/api/attendance")
 
 
-def ts_to_datetime(value):
-    """Convert milliseconds timestamp safely."""
-    if not value:
-        return None
-    try:
-        return datetime.fromtimestamp(int(value) / 1000)
-    except:
-        return None
-
-
 @bp.route("/sync", methods=["POST"])
 @jwt_required()
+@accepts_compressed_body
 def sync_attendance():
     try:
         data = request.get_json()
@@ -30,53 +21,25 @@ def sync_attendance():
         user_id = int(get_jwt_identity())
         records = data["records"]
 
-        for rec in records:
-
-            external_id = rec.get("id")  # mobile-side ID
+        if not isinstance(records, list):
+            return jsonify({"error": "'records' must be a list"}), 400
 
-            # Check if record already exists
-            existing = None
-            if external_id:
-                existing = Attendance.query.filter_by(
-                    external_id=external_id,
-                    user_id=user_id
-                ).first()
+        # Tenant comes from the user row, not the TTL cache, so a reassigned
+        # user's records land with the new admin. Row-locks the user
+        # (PostgreSQL) so concurrent syncs don't both count the same record.
+        user = User.query.filter_by(id=user_id).with_for_update().first()
 
-            if existing:
-                # UPDATE existing
-                existing.check_in = ts_to_datetime(rec.get("check_in"))
-                existing.check_out = ts_to_datetime(rec.get("check_out"))
-                existing.latitude = rec.get("latitude")
-                existing.longitude = rec.get("longitude")
-                existing.address = rec.get("location")
-                existing.image_path = rec.get("imagePath")
-                existing.status = rec.get("status", "present")
-                existing.synced = True
-                existing.sync_timestamp = datetime.utcnow()
+        if not user or not user.is_active:
+            return jsonify({"error": "User inactive or missing"}), 403
 
-            else:
-                # INSERT new
-                new_rec = Attendance(
-                    id = uuid.uuid4().hex,
-                    external_id = external_id,
-                    user_id = user_id,
-                    check_in = ts_to_datetime(rec.get("check_in")),
-                    check_out = ts_to_datetime(rec.get("check_out")),
-                    latitude = rec.get("latitude"),
-                    longitude = rec.get("longitude"),
-                    address = rec.get("location"),
-                    image_path = rec.get("imagePath"),
-                    status = rec.get("status", "present"),
-                    synced = True,
-                    sync_timestamp = datetime.utcnow()
-                )
-                db.session.add(new_rec)
+        # One upsert keyed on (user_id, external_id) for the whole batch
+        _, errors = upsert_attendance(user_id, records, admin_id=user.admin_id)
 
         db.session.commit()
 
-        return jsonify({"status": "success", "message": "Attendance synced"}), 200
+        return jsonify({"status": "success", "message": "Attendance synced", "errors": errors}), 200
 
     except Exception as e:
         db.session.rollback()
-        print(e)
+        current_app.logger.exception("ATTENDANCE SYNC ERROR")
         return jsonify({"error": "Internal server error", "detail": str(e)}), 500
@@ -1,7 +1,7 @@
 # app/routes/call_history.py
 
 import uuid
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timedelta
 from functools import wraps
 
 from flask import Blueprint, request, jsonify, current_app
@@ -9,56 +9,38 @@ from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.models import db, User, CallHistory
+from app.ingest import ingest_call_history
+from app.compression import accepts_compressed_body
+from app.pagination import (
+    InvalidCursor, cursor_requested, keyset_paginate, encode_change_token, decode_change_token
+)
+from app.fieldsets import FieldSet, InvalidFields
 
 bp = Blueprint("call_history", __name__, url_prefix="/api/call-history")
 
 DEFAULT_PER_PAGE = 25
 MAX_PER_PAGE = 200
 
+DEFAULT_CHANGES_LIMIT = 500
+MAX_CHANGES_LIMIT = 2000
+
+# Same keys as CallHistory.to_dict(); narrowed with ?fields=
+CALL_FIELDS = FieldSet({
+    "id": CallHistory.id,
+    "user_id": CallHistory.user_id,
+    "phone_number": CallHistory.phone_number,
+    "formatted_number": CallHistory.formatted_number,
+    "call_type": CallHistory.call_type,
+    "timestamp": CallHistory.timestamp,
+    "duration": CallHistory.duration,
+    "contact_name": CallHistory.contact_name,
+    "created_at": CallHistory.created_at,
+})
+
 
 # -------------------------------------------------
 # Helpers
 # -------------------------------------------------
-def iso(dt):
-    if not dt:
-        return None
-    try:
-        return dt.replace(tzinfo=timezone.utc).isoformat()
-    except:
-        return str(dt)
-
-
-def parse_timestamp(ts_value):
-    """Convert timestamp input from ISO string, seconds, or milliseconds."""
-    if ts_value is None:
-        return None
-
-    # Epoch seconds/milliseconds
-    if isinstance(ts_value, (int, float)):
-        try:
-            # milliseconds
-            if ts_value > 1e10:
-                return datetime.utcfromtimestamp(ts_value / 1000)
-            # seconds
-            return datetime.utcfromtimestamp(ts_value)
-        except:
-            return None
-
-    # ISO string
-    if isinstance(ts_value, str):
-        try:
-            if ts_value.endswith("Z"):
-                ts_value = ts_value[:-1] + "+00:00"
-            dt = datetime.fromisoformat(ts_value)
-            if dt.tzinfo:
-                dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
-            return dt
-        except:
-            return None
-
-    return None
-
-
 def admin_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
@@ -69,8 +51,21 @@ def admin_required(fn):
 
 
 def paginate(query):
+    """Page a newest-first CallHistory query; `?cursor=` switches to keyset paging."""
+    keys = CALL_FIELDS.requested()
+    query = CALL_FIELDS.select(query, keys, keep=(CallHistory.timestamp, CallHistory.id))
+
+    items, meta = _paginate(query)
+    return CALL_FIELDS.render(items, keys), meta
+
+
+def _paginate(query):
     page = request.args.get("page", 1, type=int)
     per_page = min(request.args.get("per_page", DEFAULT_PER_PAGE, type=int), MAX_PER_PAGE)
+
+    if cursor_requested():
+        return keyset_paginate(query, CallHistory.timestamp, CallHistory.id, per_page)
+
     pag = query.paginate(page=page, per_page=per_page, error_out=False)
 
     return pag.items, {
@@ -88,10 +83,13 @@ def paginate(query):
 # -------------------------------------------------
 @bp.route("/sync", methods=["POST"])
 @jwt_required()
+@accepts_compressed_body
 def sync_call_history():
     try:
         user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        # Row-locks the user (PostgreSQL) so one user's syncs commit in id
+        # order, which the /changes feed relies on
+        user = User.query.filter_by(id=user_id).with_for_update().first()
 
         if not user or not user.is_active:
             return jsonify({"error": "User inactive or missing"}), 403
@@ -102,52 +100,8 @@ def sync_call_history():
         if not isinstance(call_list, list):
             return jsonify({"error": "'call_history' must be a list"}), 400
 
-        saved = 0
-        errors = []
-
-        for entry in call_list:
-            phone_number = entry.get("phone_number")
-            call_type = entry.get("call_type")
-            duration = entry.get("duration", 0)
-            timestamp_raw = entry.get("timestamp")
-
-            if not phone_number or not timestamp_raw:
-                errors.append({"entry": entry, "error": "Missing timestamp or phone_number"})
-                continue
-
-            dt = parse_timestamp(timestamp_raw)
-            if not dt:
-                errors.append({"entry": entry, "error": "Invalid timestamp format"})
-                continue
-
-            dt = dt.replace(microsecond=0)
-
-            formatted_number = entry.get("formatted_number") or ""
-            contact_name = entry.get("contact_name") or ""
-
-            # Duplicate check (safe)
-            duplicate = CallHistory.query.filter(
-                CallHistory.user_id == user_id,
-                CallHistory.phone_number == phone_number,
-                CallHistory.call_type == call_type,
-                CallHistory.duration == int(duration)
-            ).first()
-
-            if duplicate:
-                continue
-
-            new_record = CallHistory(
-                user_id=user_id,
-                phone_number=phone_number,
-                formatted_number=formatted_number,
-                call_type=call_type,
-                duration=int(duration),
-                timestamp=dt,
-                contact_name=contact_name
-            )
-
-            db.session.add(new_record)
-            saved += 1
+        # Validate, dedupe and bulk-insert the whole batch in a few statements
+        saved, errors = ingest_call_history(user_id, call_list, admin_id=user.admin_id)
 
         # 🔥 ALWAYS UPDATE USER SYNC TIME FIRST
         user.last_sync = datetime.utcnow()
@@ -182,9 +136,7 @@ def my_call_history():
 
         q = CallHistory.query.filter_by(user_id=user_id).order_by(CallHistory.timestamp.desc())
 
-        items, meta = paginate(q)
-
-        data = [r.to_dict() for r in items]
+        data, meta = paginate(q)
 
         return jsonify({
             "user_id": user_id,
@@ -192,11 +144,60 @@ def my_call_history():
             "meta": meta
         })
 
+    except (InvalidCursor, InvalidFields) as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         current_app.logger.exception("MY CALL HISTORY ERROR")
         return jsonify({"error": str(e)}), 500
 
 
+# -------------------------------------------------
+# 2️⃣b USER — DELTA SYNC (what's new since the last pull)
+# -------------------------------------------------
+@bp.route("/changes", methods=["GET"])
+@jwt_required()
+def my_call_history_changes():
+    """
+    Rows added for the calling user after `?since=<token>` (from the first
+    row when omitted), oldest first, at most `?limit=` per call. Keep
+    calling with `next_token` while `has_more`; store the last token for
+    the next pull. Rows are insert-only, so the id is the change sequence.
+    Supports ?fields= and ?shape=columns like /my.
+    """
+    if get_jwt().get("role") != "user":
+        return jsonify({"error": "User access required"}), 403
+
+    try:
+        user_id = int(get_jwt_identity())
+        since = decode_change_token(request.args.get("since", ""))
+        limit = request.args.get("limit", DEFAULT_CHANGES_LIMIT, type=int)
+        limit = min(max(limit, 1), MAX_CHANGES_LIMIT)
+
+        keys = CALL_FIELDS.requested()
+        q = (
+            CallHistory.query
+            .filter(CallHistory.user_id == user_id, CallHistory.id > since)
+            .order_by(CallHistory.id)
+        )
+        rows = CALL_FIELDS.select(q, keys, keep=(CallHistory.id,)).limit(limit + 1).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        return jsonify({
+            "user_id": user_id,
+            "call_history": CALL_FIELDS.render(rows, keys),
+            "next_token": encode_change_token(rows[-1].id if rows else since),
+            "has_more": has_more
+        })
+
+    except (InvalidCursor, InvalidFields) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        current_app.logger.exception("CALL HISTORY CHANGES ERROR")
+        return jsonify({"error": str(e)}), 500
+
+
 # -------------------------------------------------
 # 3️⃣ ADMIN — FETCH SPECIFIC USER CALL HISTORY
 # -------------------------------------------------
@@ -207,14 +208,16 @@ def admin_user_call_history(user_id):
     try:
         q = CallHistory.query.filter_by(user_id=user_id).order_by(CallHistory.timestamp.desc())
 
-        items, meta = paginate(q)
+        data, meta = paginate(q)
 
         return jsonify({
             "user_id": user_id,
-            "call_history": [r.to_dict() for r in items],
+            "call_history": data,
             "meta": meta
         })
 
+    except (InvalidCursor, InvalidFields) as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         current_app.logger.exception("ADMIN CALL HISTORY ERROR")
         return jsonify({"error": str(e)}), 500
@@ -1,7 +1,12 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, create_access_token, get_jwt_identity
+from flask_jwt_extended import jwt_required, create_access_token, get_jwt_identity, get_jwt
 from datetime import datetime
-from ..models import db, SuperAdmin, Admin, User, ActivityLog, UserRole
+from ..models import db, SuperAdmin, Admin, User, ActivityLog, UserRole, Job
+from ..jobs import enqueue_job
+from ..analytics_cache import analytics_cache
+from ..activity_logs import InvalidLogFilter, filter_activity_logs, log_per_page
+from ..pagination import InvalidCursor, keyset_paginate
+from sqlalchemy import func
 import re
 
 bp = Blueprint("super_admin", __name__, url_prefix="/api/superadmin")
@@ -15,14 +20,6 @@ def _validate_email(email: str) -> bool:
     return re.match(pattern, email or "") is not None
 
 
-def _safe_enum_value(role):
-    """Convert Enum to plain string"""
-    try:
-        return role.value
-    except:
-        return str(role)
-
-
 # =========================================================
 # SUPER ADMIN LOGIN
 # =========================================================
@@ -122,30 +119,81 @@ def create_admin():
 # =========================================================
 # GET ALL ADMINS (SUPER ADMIN)
 # =========================================================
+ADMIN_USER_COUNT = func.count(User.id).label("user_count")
+
+# ?sort_by= values of the admin listing
+ADMIN_SORT_COLUMNS = {
+    "created_at": Admin.created_at,
+    "name": Admin.name,
+    "email": Admin.email,
+    "user_count": ADMIN_USER_COUNT,
+    "user_limit": Admin.user_limit,
+    "expiry_date": Admin.expiry_date,
+    "last_login": Admin.last_login,
+}
+
+
 @bp.route("/admins", methods=["GET"])
 @jwt_required()
 def get_admins():
+    """
+    Admins with their user counts, from one grouped LEFT JOIN.
+    ?sort_by= (see ADMIN_SORT_COLUMNS, default created_at) and ?order=asc|desc
+    (default desc). Paginated with ?page & ?per_page; without either, every
+    admin is returned as before (the super admin console loads them all).
+    """
+    sort_by = request.args.get("sort_by", "created_at")
+    order = request.args.get("order", "desc")
+    if sort_by not in ADMIN_SORT_COLUMNS:
+        return jsonify({"error": f"sort_by must be one of {sorted(ADMIN_SORT_COLUMNS)}"}), 400
+    if order not in ("asc", "desc"):
+        return jsonify({"error": "order must be asc or desc"}), 400
+
     try:
-        admins = Admin.query.order_by(Admin.created_at.desc()).all()
-        result = []
-
-        for a in admins:
-            user_count = User.query.filter_by(admin_id=a.id).count()
-
-            result.append({
-                "id": a.id,
-                "name": a.name,
-                "email": a.email,
-                "user_limit": a.user_limit,
-                "user_count": user_count,
-                "is_active": a.is_active,
-                "is_expired": a.is_expired(),
-                "created_at": a.created_at.isoformat(),
-                "last_login": a.last_login.isoformat() if a.last_login else None,
-                "expiry_date": a.expiry_date.isoformat(),
-            })
-
-        return jsonify({"admins": result}), 200
+        sort_column = ADMIN_SORT_COLUMNS[sort_by]
+        direction = sort_column.asc() if order == "asc" else sort_column.desc()
+        tiebreak = Admin.id.asc() if order == "asc" else Admin.id.desc()
+
+        query = (
+            Admin.query
+            .with_entities(Admin, ADMIN_USER_COUNT)
+            .outerjoin(User, User.admin_id == Admin.id)
+            .group_by(Admin.id)
+            .order_by(direction, tiebreak)
+        )
+
+        if "page" in request.args or "per_page" in request.args:
+            page = max(request.args.get("page", 1, type=int), 1)
+            per_page = min(max(request.args.get("per_page", 25, type=int), 1), 200)
+            pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+            rows = pagination.items
+            meta = {
+                "page": pagination.page,
+                "per_page": pagination.per_page,
+                "total": pagination.total,
+                "pages": pagination.pages,
+                "has_next": pagination.has_next,
+                "has_prev": pagination.has_prev,
+            }
+        else:
+            rows = query.all()
+            meta = {"total": len(rows)}
+
+        result = [{
+            "id": a.id,
+            "name": a.name,
+            "email": a.email,
+            "user_limit": a.user_limit,
+            "user_count": user_count,
+            "is_active": a.is_active,
+            "is_expired": a.is_expired(),
+            "created_at": a.created_at,
+            "last_login": a.last_login,
+            "expiry_date": a.expiry_date,
+        } for a, user_count in rows]
+
+        meta.update(sort_by=sort_by, order=order)
+        return jsonify({"admins": result, "meta": meta}), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -177,23 +225,112 @@ def dashboard_stats():
 @bp.route("/logs", methods=["GET"])
 @jwt_required()
 def activity_logs():
+    """
+    Newest first, filterable by actor, target and time range
+    (see app/activity_logs.py). 50 per page; pass meta.next_cursor back as
+    ?cursor= for the next one.
+    """
     try:
-        logs = ActivityLog.query.order_by(ActivityLog.timestamp.desc()).limit(50).all()
+        query = filter_activity_logs(ActivityLog.query)
+        logs, meta = keyset_paginate(query, ActivityLog.timestamp, ActivityLog.id, log_per_page())
 
         formatted = [
             {
                 "id": log.id,
                 "action": log.action,
-                "actor_role": _safe_enum_value(log.actor_role),
+                "actor_role": log.actor_role,
                 "actor_id": log.actor_id,
                 "target_type": log.target_type,
                 "target_id": log.target_id,
-                "timestamp": log.timestamp.isoformat(),
+                "timestamp": log.timestamp,
             }
             for log in logs
         ]
 
-        return jsonify({"logs": formatted}), 200
+        return jsonify({"logs": formatted, "meta": meta}), 200
+
+    except (InvalidCursor, InvalidLogFilter) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# =========================================================
+# MAINTENANCE JOBS (run by worker.py)
+# =========================================================
+MAINTENANCE_JOB_KINDS = {
+    "rebuild_call_rollups", "backfill_call_fingerprints", "backfill_number_digits", "recalc_performance",
+    "reconcile_user_counters", "snapshot_performance",
+}
+
+
+def _is_super_admin():
+    return get_jwt().get("role") == "super_admin" and SuperAdmin.query.get(get_jwt_identity()) is not None
+
+
+@bp.route("/jobs", methods=["POST"])
+@jwt_required()
+def enqueue_maintenance_job():
+    if not _is_super_admin():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    data = request.get_json() or {}
+    kind = data.get("kind")
+    payload = data.get("payload") or {}
+
+    if kind not in MAINTENANCE_JOB_KINDS:
+        return jsonify({"error": f"kind must be one of {sorted(MAINTENANCE_JOB_KINDS)}"}), 400
+    if not isinstance(payload, dict):
+        return jsonify({"error": "payload must be an object"}), 400
+
+    # Tenant-scoped kinds are attributed to the tenant so its admins can poll them
+    admin_id = payload.get("admin_id") if kind in ("rebuild_call_rollups", "recalc_performance") else None
+
+    try:
+        job = enqueue_job(kind, payload, admin_id=admin_id)
+        db.session.commit()
+        return jsonify({"job": job.to_dict()}), 202
 
     except Exception as e:
+        db.session.rollback()
         return jsonify({"error": str(e)}), 500
+
+
+@bp.route("/jobs", methods=["GET"])
+@jwt_required()
+def list_jobs():
+    if not _is_super_admin():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    query = Job.query
+    for field in ("status", "kind"):
+        value = request.args.get(field)
+        if value:
+            query = query.filter(getattr(Job, field) == value)
+
+    jobs = query.order_by(Job.id.desc()).limit(100).all()
+    return jsonify({"jobs": [j.to_dict() for j in jobs]}), 200
+
+
+@bp.route("/jobs/<int:job_id>", methods=["GET"])
+@jwt_required()
+def get_job(job_id):
+    if not _is_super_admin():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    job = Job.query.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({"job": job.to_dict()}), 200
+
+
+# =========================================================
+# CACHE STATS
+# =========================================================
+@bp.route("/cache-stats", methods=["GET"])
+@jwt_required()
+def cache_stats():
+    """Hit/miss counters of this worker's analytics cache."""
+    if not _is_super_admin():
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify({"analytics_cache": analytics_cache.stats()}), 200
@@ -3,11 +3,12 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import (
     jwt_required, create_access_token, get_jwt_identity, get_jwt
 )
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timedelta
 import re
 
 from .extensions import db
 from ..models import User, Admin, ActivityLog, UserRole
+from ..serialization import iso
 from sqlalchemy import func
 
 bp = Blueprint("users", __name__, url_prefix="/api/users")
@@ -33,17 +34,6 @@ def validate_phone(phone: str) -> bool:
     return bool(phone and PHONE_RE.match(phone))
 
 
-def iso(dt):
-    if dt is None:
-        return None
-    try:
-        if hasattr(dt, "astimezone") and dt.tzinfo:
-            return dt.astimezone(timezone.utc).isoformat()
-        return dt.replace(tzinfo=timezone.utc).isoformat()
-    except Exception:
-        return str(dt)
-
-
 def admin_required():
     claims = get_jwt()
     return claims.get("role") == "admin"
@@ -336,13 +326,10 @@ def sync_status():
         if not user:
             return jsonify({"error": "User not found"}), 404
 
-        from ..models import CallHistory
-        count = CallHistory.query.filter_by(user_id=user.id).count()
-
         return jsonify({
             "sync_status": {
                 "last_sync": iso(user.last_sync),
-                "call_history_count": count
+                "call_history_count": user.call_count
             }
         }), 200
 
@@ -0,0 +1,90 @@
+# app/serialization.py
+"""
+JSON encoding for API responses.
+
+One timestamp format across the API: ISO 8601, with naive datetimes (all
+stored values are UTC from datetime.utcnow()) marked "+00:00". Dates are
+plain "YYYY-MM-DD".
+
+`JSONProvider` is installed on the app in create_app(). With orjson
+installed it encodes in C and formats datetimes, dates, enums and UUIDs
+natively, so serializers can hand it raw column values; without orjson it
+falls back to the stdlib encoder with the same output. `iso()` is the same
+formatting for the places that need a string up front, and `dumps()` the
+same encoding as one compact line (NDJSON exports).
+"""
+import decimal
+import enum
+import json
+import uuid
+from datetime import date, datetime
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used instead
+    orjson = None
+
+
+def iso(value):
+    """ISO 8601 string for a datetime/date; strings and None pass through."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.isoformat() + "+00:00"
+    return value.isoformat()
+
+
+def _default(o):
+    """Types neither encoder handles natively (orjson covers the first three)."""
+    if isinstance(o, (datetime, date)):
+        return iso(o)
+    if isinstance(o, enum.Enum):
+        return o.value
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """Compact one-line JSON string, encoded like API responses."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":"))
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's provider, with ISO datetimes and enum values instead of HTTP dates / errors."""
+    default = staticmethod(_default)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """orjson-backed provider; output matches StdlibJSONProvider (sorted keys)."""
+
+    def _options(self):
+        options = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if self.compact is False or (self.compact is None and self._app.debug):
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=self._options()).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Straight to bytes; no str round trip
+        body = orjson.dumps(obj, default=_default, option=self._options())
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+JSONProvider = OrjsonProvider if orjson is not None else StdlibJSONProvider
@@ -0,0 +1,170 @@
+# app/subscription_cache.py
+"""
+In-process TTL/LRU cache of the state the global subscription check needs.
+
+    ("admin", id) -> SubscriptionState(is_active, admin_id, admin_expiry)
+    ("user", id)  -> SubscriptionState(is_active, admin_id, admin_expiry)
+
+Writes to Admin.expiry_date / Admin.is_active and User.is_active / admin_id
+invalidate the affected entries once the transaction commits. The cache is
+per worker process, so the TTL bounds how long another worker can serve a
+stale entry.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models import db, Admin, User
+
+SubscriptionState = namedtuple("SubscriptionState", "is_active admin_id admin_expiry")
+
+# Cached "no such account" so deleted users don't hit the DB on every request
+MISSING = SubscriptionState(None, None, None)
+
+_PENDING_KEY = "subscription_cache_invalidations"
+
+
+class SubscriptionCache:
+    def __init__(self, ttl=60, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, ttl=None, maxsize=None):
+        if ttl is not None:
+            self.ttl = ttl
+        if maxsize is not None:
+            self.maxsize = maxsize
+        self.clear()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, role, identity):
+        with self._lock:
+            self._data.pop((role, int(identity)), None)
+
+    def invalidate_admin(self, admin_id):
+        """Drop an admin and every cached user under that admin."""
+        admin_id = int(admin_id)
+        with self._lock:
+            stale = [
+                key for key, (_, state) in self._data.items()
+                if key == ("admin", admin_id) or (key[0] == "user" and state.admin_id == admin_id)
+            ]
+            for key in stale:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+subscription_cache = SubscriptionCache()
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def get_subscription_state(role, identity):
+    """
+    Cached subscription state for a JWT identity. Misses cost one primary-key
+    query (users are joined to their admin). Returns MISSING for unknown ids
+    and None for roles that are not checked.
+    """
+    if role not in ("admin", "user"):
+        return None
+
+    key = (role, int(identity))
+    state = subscription_cache.get(key)
+    if state is not None:
+        return state
+
+    if role == "admin":
+        row = db.session.query(Admin.is_active, Admin.expiry_date).filter(Admin.id == key[1]).first()
+        state = SubscriptionState(row.is_active, key[1], _as_date(row.expiry_date)) if row else MISSING
+    else:
+        row = (
+            db.session.query(User.is_active, User.admin_id, Admin.expiry_date)
+            .outerjoin(Admin, Admin.id == User.admin_id)
+            .filter(User.id == key[1])
+            .first()
+        )
+        state = SubscriptionState(row.is_active, row.admin_id, _as_date(row.expiry_date)) if row else MISSING
+
+    subscription_cache.set(key, state)
+    return state
+
+
+# -------------------------
+# Invalidation on commit
+# -------------------------
+def _queue(target, key):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(key)
+
+
+def _changed(target, *attrs):
+    state = inspect(target)
+    return any(state.attrs[a].history.has_changes() for a in attrs)
+
+
+@event.listens_for(Admin, "after_update")
+def _admin_updated(mapper, connection, target):
+    if _changed(target, "expiry_date", "is_active"):
+        _queue(target, ("admin", target.id))
+
+
+@event.listens_for(Admin, "after_delete")
+def _admin_deleted(mapper, connection, target):
+    _queue(target, ("admin", target.id))
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target):
+    if _changed(target, "is_active", "admin_id"):
+        _queue(target, ("user", target.id))
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper, connection, target):
+    _queue(target, ("user", target.id))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session):
+    for role, identity in session.info.pop(_PENDING_KEY, ()):
+        if role == "admin":
+            subscription_cache.invalidate_admin(identity)
+        else:
+            subscription_cache.invalidate(role, identity)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_invalidations(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,102 @@
+# app/tenant_version.py
+"""
+Per-tenant data version.
+
+admins.data_version is a counter bumped, in the same transaction, by every
+write that can change what an admin's dashboards show; data_changed_at is
+when that last happened. The dashboards derive their ETag / Last-Modified
+from it (app/http_cache.py).
+
+Bumped by:
+- call history / attendance sync (app/ingest.py)
+- performance score recalculation and rollup rebuilds
+- any ORM insert or delete of a User, ORM updates of the User columns
+  the dashboards read (not last_login or password_hash, so logins leave
+  the version alone), and admin changes to name / user_limit /
+  expiry_date / is_active (mapper events below)
+
+Writes that bypass both (raw SQL, bulk updates of users elsewhere) must call
+bump_data_version() themselves.
+"""
+from collections import namedtuple
+
+from flask import request
+from sqlalchemy import event, inspect, update
+
+from app.models import db, now, Admin, User
+
+DataVersion = namedtuple("DataVersion", "version changed_at")
+
+# Admin columns that dashboards display
+_ADMIN_DASHBOARD_ATTRS = ("name", "user_limit", "expiry_date", "is_active")
+
+# User columns that dashboards display or aggregate
+_USER_DASHBOARD_ATTRS = (
+    "name", "email", "phone", "admin_id", "is_active",
+    "performance_score", "last_sync", "expiry_date",
+)
+
+
+def _bump_statement(admin_ids):
+    return (
+        update(Admin.__table__)
+        .where(Admin.__table__.c.id.in_(admin_ids))
+        .values(data_version=Admin.__table__.c.data_version + 1, data_changed_at=now())
+    )
+
+
+def bump_data_version(*admin_ids, connection=None):
+    """Bump the version of each tenant in `admin_ids` (None entries ignored). Does not commit."""
+    admin_ids = sorted({int(a) for a in admin_ids if a is not None})
+    if not admin_ids:
+        return
+    (connection or db.session).execute(_bump_statement(admin_ids))
+
+
+def get_data_version(admin_id):
+    """DataVersion of a tenant, or None if there is no such admin."""
+    row = (
+        db.session.query(Admin.data_version, Admin.data_changed_at)
+        .filter(Admin.id == admin_id)
+        .first()
+    )
+    return DataVersion(row.data_version, row.data_changed_at) if row else None
+
+
+def request_data_version(admin_id):
+    """get_data_version(), looked up once per request (read-only views only)."""
+    # On the request itself: `g` outlives it when a test holds an app context
+    versions = request.environ.setdefault("app.tenant_data_versions", {})
+    if admin_id not in versions:
+        versions[admin_id] = get_data_version(admin_id)
+    return versions[admin_id]
+
+
+# -------------------------
+# ORM writes
+# -------------------------
+def _changed(target, attrs):
+    state = inspect(target)
+    return any(state.attrs[a].history.has_changes() for a in attrs)
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_delete")
+def _user_added_or_removed(mapper, connection, target):
+    bump_data_version(target.admin_id, connection=connection)
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target):
+    # Fired for every dirty instance, including ones with no net change
+    if not _changed(target, _USER_DASHBOARD_ATTRS):
+        return
+    # A move between tenants changes both
+    history = inspect(target).attrs.admin_id.history
+    bump_data_version(target.admin_id, *history.deleted, connection=connection)
+
+
+@event.listens_for(Admin, "after_update")
+def _admin_updated(mapper, connection, target):
+    if _changed(target, _ADMIN_DASHBOARD_ATTRS):
+        bump_data_version(target.id, connection=connection)
@@ -0,0 +1,89 @@
+# app/user_counters.py
+"""
+Per-user record counters (users.call_count, users.attendance_count).
+
+The sync paths in app/ingest.py add what they inserted in the same
+transaction, so the profile endpoints read one users row instead of
+counting call_history and attendances. `reconcile_user_counters` recounts
+from the raw tables and repairs any drift (rows written or deleted outside
+sync).
+"""
+from sqlalchemy import func, update
+
+from app.models import db, Attendance, CallHistory, User, update_by_id
+
+# Users recounted per transaction
+RECONCILE_CHUNK_SIZE = 500
+
+
+def add_user_counts(user_id, calls=0, attendance=0):
+    """Add to a user's counters with one relative UPDATE. Does not commit."""
+    values = {}
+    if calls:
+        values["call_count"] = User.call_count + calls
+    if attendance:
+        values["attendance_count"] = User.attendance_count + attendance
+    if values:
+        db.session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _counts_by_user(model, user_ids):
+    return dict(
+        db.session.query(model.user_id, func.count())
+        .filter(model.user_id.in_(user_ids))
+        .group_by(model.user_id)
+    )
+
+
+def reconcile_user_counters(user_ids=None, admin_id=None, chunk_size=RECONCILE_CHUNK_SIZE, log=print):
+    """
+    Recount calls and attendance for users in id chunks and rewrite the
+    counters that drifted, one transaction per chunk. The chunk's user rows
+    are locked first (PostgreSQL), so a sync can't land between the count
+    and the write. Returns (users_checked, users_repaired).
+    """
+    users = db.session.query(User.id, User.call_count, User.attendance_count)
+    if user_ids:
+        users = users.filter(User.id.in_(user_ids))
+    if admin_id is not None:
+        users = users.filter(User.admin_id == admin_id)
+
+    checked = repaired = 0
+    last_id = 0
+
+    while True:
+        batch = (
+            users.filter(User.id > last_id)
+            .order_by(User.id)
+            .limit(chunk_size)
+            .with_for_update()
+            .all()
+        )
+        if not batch:
+            db.session.rollback()
+            break
+        last_id = batch[-1].id
+
+        ids = [row.id for row in batch]
+        calls = _counts_by_user(CallHistory, ids)
+        attendance = _counts_by_user(Attendance, ids)
+
+        changes = {
+            row.id: {"call_count": calls.get(row.id, 0), "attendance_count": attendance.get(row.id, 0)}
+            for row in batch
+            if (row.call_count, row.attendance_count) != (calls.get(row.id, 0), attendance.get(row.id, 0))
+        }
+        if changes:
+            update_by_id(User.__table__, changes)
+        db.session.commit()
+
+        checked += len(batch)
+        repaired += len(changes)
+        log(f"user counters: up to user {last_id}, {checked} checked, {repaired} repaired")
+
+    return checked, repaired
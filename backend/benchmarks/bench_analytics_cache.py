@@ -0,0 +1,67 @@
+# benchmarks/bench_analytics_cache.py
+"""
+Dashboard aggregates with the analytics cache off, cold and warm.
+
+    python -m benchmarks.bench_analytics_cache [users] [calls_per_user]
+
+"warm" is a poll after the first one with no sync in between; "after sync"
+is the first poll once a user has synced (a miss, then warm again).
+"""
+import sys
+from datetime import datetime
+
+from app.analytics_cache import analytics_cache, make_backend
+from app.models import db
+from benchmarks.bench_performance_scores import seed_activity
+from benchmarks.common import make_app, seed_tenant, auth_header, count_statements, timed
+
+ROUNDS = 20
+
+DASHBOARDS = [
+    "/api/admin/dashboard-stats",
+    "/api/admin/call-analytics?filter=month",
+    "/api/admin/performance?filter=month",
+]
+
+
+def poll(client, url, headers, rounds=ROUNDS):
+    with count_statements(db.engine) as statements:
+        with timed() as t:
+            for _ in range(rounds):
+                client.get(url, headers=headers)
+    return t["seconds"] / rounds * 1000, statements.count / rounds
+
+
+def main(users, calls_per_user):
+    app = make_app()
+    with app.app_context():
+        admin, agents = seed_tenant(users=users)
+        seed_activity(agents, calls_per_user)
+
+        client = app.test_client()
+        headers = auth_header(admin.id, "admin")
+        agent_headers = auth_header(agents[0].id, "user")
+
+        print(f"{'endpoint':>40} {'off ms':>7} {'stmts':>6} {'warm ms':>8} {'stmts':>6} {'after sync ms':>14}")
+        for i, url in enumerate(DASHBOARDS):
+            analytics_cache.configure(backend=None)
+            off_ms, off_stmts = poll(client, url, headers)
+
+            analytics_cache.configure(backend=make_backend("memory"))
+            poll(client, url, headers, rounds=1)
+            warm_ms, warm_stmts = poll(client, url, headers)
+
+            client.post("/api/call-history/sync", headers=agent_headers, json={"call_history": [{
+                "phone_number": f"+91999000{i:04d}", "call_type": "incoming",
+                "timestamp": datetime.utcnow().isoformat(), "duration": 30,
+            }]})
+            miss_ms, _ = poll(client, url, headers, rounds=1)
+
+            print(f"{url:>40} {off_ms:>7.2f} {off_stmts:>6.0f} {warm_ms:>8.2f} {warm_stmts:>6.0f} {miss_ms:>14.2f}")
+
+        print(analytics_cache.stats())
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [200, 50][len(args):]))
@@ -0,0 +1,109 @@
+# benchmarks/bench_call_analytics.py
+"""
+GET /api/admin/call-analytics on a synthetic tenant.
+
+    python -m benchmarks.bench_call_analytics [users] [calls]
+
+Defaults to 500 users / 200k calls, which SQLite seeds in seconds. For the
+10M-call comparison point BENCH_DATABASE_URL at a scratch PostgreSQL
+database and pass `500 10000000`.
+
+"legacy" replays the old query pattern (load every User, five COUNTs over
+an IN list, a SUM, a trend query and a per-user summary) against the same
+data so both numbers come from one run.
+"""
+import random
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, case
+
+from app.models import db, User, CallHistory
+from benchmarks.common import make_app, seed_tenant, auth_header, count_statements, timed
+
+CALL_TYPES = ["incoming", "outgoing", "missed", "rejected"]
+SEED_CHUNK = 50_000
+
+
+def seed_calls(users, calls, days=90, seed=7):
+    rnd = random.Random(seed)
+    table = CallHistory.__table__
+    now = datetime.utcnow()
+    user_ids = [u.id for u in users]
+
+    written = 0
+    while written < calls:
+        n = min(SEED_CHUNK, calls - written)
+        db.session.execute(table.insert(), [
+            {
+                "user_id": rnd.choice(user_ids),
+                "phone_number": f"+9198{rnd.randrange(10**8):08d}",
+                "call_type": rnd.choice(CALL_TYPES),
+                "duration": rnd.randrange(0, 600),
+                "timestamp": now - timedelta(seconds=rnd.randrange(days * 86400)),
+            }
+            for _ in range(n)
+        ])
+        db.session.commit()
+        written += n
+
+
+def legacy_call_analytics(admin_id, days=7):
+    users = User.query.filter_by(admin_id=admin_id).all()
+    user_ids = [u.id for u in users]
+    base = CallHistory.query.filter(CallHistory.user_id.in_(user_ids))
+
+    base.count()
+    for call_type in CALL_TYPES:
+        base.filter(CallHistory.call_type == call_type).count()
+    base.with_entities(func.coalesce(func.sum(CallHistory.duration), 0)).scalar()
+
+    start = datetime.utcnow().date() - timedelta(days=days - 1)
+    db.session.query(func.date(CallHistory.timestamp), func.count(CallHistory.id)).filter(
+        CallHistory.user_id.in_(user_ids),
+        CallHistory.timestamp >= datetime.combine(start, datetime.min.time())
+    ).group_by(func.date(CallHistory.timestamp)).all()
+
+    db.session.query(
+        User.id,
+        User.name,
+        func.sum(case((CallHistory.call_type == "incoming", 1), else_=0)),
+        func.sum(case((CallHistory.call_type == "outgoing", 1), else_=0)),
+        func.sum(case((CallHistory.call_type == "missed", 1), else_=0)),
+        func.sum(func.coalesce(CallHistory.duration, 0)),
+        func.count(CallHistory.id)
+    ).outerjoin(CallHistory, CallHistory.user_id == User.id).filter(
+        User.id.in_(user_ids)
+    ).group_by(User.id, User.name).all()
+
+
+def main(n_users, n_calls, repeats=3):
+    app = make_app()
+    client = app.test_client()
+
+    with app.app_context():
+        admin, users = seed_tenant(users=n_users)
+        with timed() as t:
+            seed_calls(users, n_calls)
+        print(f"seeded {n_users} users / {n_calls} calls in {t['seconds']:.1f}s")
+
+        headers = auth_header(admin.id, "admin")
+        print(f"{'variant':>8} {'filter':>7} {'stmts':>6} {'ms':>9}")
+
+        for filter_type in ("", "week"):
+            for _ in range(repeats):
+                with count_statements(db.engine) as stmts, timed() as t:
+                    resp = client.get(f"/api/admin/call-analytics?filter={filter_type}", headers=headers)
+                if resp.status_code != 200:
+                    raise SystemExit(f"call-analytics failed: {resp.status_code} {resp.get_json()}")
+            print(f"{'new':>8} {filter_type or 'all':>7} {stmts.count:>6} {t['seconds'] * 1000:>9.1f}")
+
+        for _ in range(repeats):
+            with count_statements(db.engine) as stmts, timed() as t:
+                legacy_call_analytics(admin.id)
+        print(f"{'legacy':>8} {'all':>7} {stmts.count:>6} {t['seconds'] * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [500, 200_000][len(args):]))
@@ -0,0 +1,63 @@
+# benchmarks/bench_call_changes.py
+"""
+What a phone pays to catch up after a sync: re-reading the newest page of
+/my (which can't tell it what's new) versus pulling only the new rows from
+/changes, as the history grows.
+
+    python -m benchmarks.bench_call_changes [history sizes...]
+"""
+import sys
+from datetime import datetime, timedelta
+
+from app.models import db
+from benchmarks.common import make_app, seed_tenant, auth_header, count_statements, timed
+
+NEW_CALLS = 20
+
+
+def sync(client, headers, count, offset):
+    now = datetime.utcnow()
+    calls = [{
+        "phone_number": f"+91{offset + i:010d}", "call_type": "incoming",
+        "timestamp": (now - timedelta(minutes=offset + i)).isoformat(), "duration": 30,
+    } for i in range(count)]
+    resp = client.post("/api/call-history/sync", headers=headers, json={"call_history": calls})
+    if resp.status_code != 200:
+        raise SystemExit(f"sync failed: {resp.status_code} {resp.get_json()}")
+
+
+def catch_up(client, headers, token=""):
+    """Follow /changes to the end; returns the final token."""
+    while True:
+        body = client.get(f"/api/call-history/changes?limit=2000&since={token}", headers=headers).get_json()
+        token = body["next_token"]
+        if not body["has_more"]:
+            return token
+
+
+def main(sizes):
+    app = make_app()
+    client = app.test_client()
+
+    print(f"{'history':>8} {'endpoint':>9} {'rows':>6} {'bytes':>9} {'stmts':>6} {'ms':>8}")
+    with app.app_context():
+        for size in sizes:
+            _, (user,) = seed_tenant(users=1, admin_name=f"changes {size}")
+            headers = auth_header(user.id, "user")
+            sync(client, headers, size, 0)
+            token = catch_up(client, headers)
+
+            sync(client, headers, NEW_CALLS, size)
+            for name, url in (
+                ("/my", f"/api/call-history/my?per_page=200"),
+                ("/changes", f"/api/call-history/changes?limit=2000&since={token}"),
+            ):
+                with count_statements(db.engine) as statements:
+                    with timed() as t:
+                        resp = client.get(url, headers=headers)
+                rows = len(resp.get_json()["call_history"])
+                print(f"{size:>8} {name:>9} {rows:>6} {len(resp.data):>9} {statements.count:>6} {t['seconds'] * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    main([int(s) for s in sys.argv[1:]] or [1000, 10000])
@@ -0,0 +1,59 @@
+# benchmarks/bench_call_sync.py
+"""
+Round trips and wall time of POST /api/call-history/sync by batch size.
+
+    python -m benchmarks.bench_call_sync [sizes...]
+
+A fresh user is used per batch size; each batch is posted twice so the
+second run measures the all-duplicates path.
+"""
+import random
+import sys
+import time
+
+from app.models import db
+from benchmarks.common import make_app, seed_tenant, auth_header, count_statements, timed
+
+CALL_TYPES = ["incoming", "outgoing", "missed", "rejected"]
+
+
+def make_payload(size, seed=42):
+    rnd = random.Random(seed)
+    now_ms = int(time.time() * 1000)
+    numbers = [f"+9198{rnd.randrange(10**8):08d}" for _ in range(max(1, size // 5))]
+    calls = []
+    for i in range(size):
+        call_type = rnd.choice(CALL_TYPES)
+        calls.append({
+            "phone_number": rnd.choice(numbers),
+            "formatted_number": "",
+            "call_type": call_type,
+            "duration": 0 if call_type in ("missed", "rejected") else rnd.randrange(1, 900),
+            "timestamp": now_ms - i * 60_000,
+            "contact_name": "",
+        })
+    return {"call_history": calls}
+
+
+def main(sizes):
+    app = make_app()
+    client = app.test_client()
+
+    print(f"{'batch':>7} {'run':>6} {'saved':>7} {'stmts':>6} {'ms':>9}")
+    with app.app_context():
+        for size in sizes:
+            _, (user,) = seed_tenant(users=1, admin_name=f"Sync {size}")
+            headers = auth_header(user.id, "user")
+            payload = make_payload(size)
+
+            for run in ("first", "repeat"):
+                with count_statements(db.engine) as stmts, timed() as t:
+                    resp = client.post("/api/call-history/sync", json=payload, headers=headers)
+                body = resp.get_json()
+                if resp.status_code != 200:
+                    raise SystemExit(f"sync failed: {resp.status_code} {body}")
+                print(f"{size:>7} {run:>6} {body['records_saved']:>7} {stmts.count:>6} {t['seconds'] * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main([int(s) for s in sys.argv[1:]] or [100, 1000, 5000])
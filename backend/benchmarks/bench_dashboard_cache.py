@@ -0,0 +1,60 @@
+# benchmarks/bench_dashboard_cache.py
+"""
+Dashboard polling: full responses versus 304 revalidation, and body size
+with and without compression.
+
+    python -m benchmarks.bench_dashboard_cache [users] [calls_per_user]
+"""
+import sys
+
+from app.models import db
+from benchmarks.bench_performance_scores import seed_activity
+from benchmarks.common import make_app, seed_tenant, auth_header, count_statements, timed
+
+ROUNDS = 20
+
+DASHBOARDS = [
+    "/api/admin/dashboard-stats",
+    "/api/admin/recent-sync?per_page=100",
+    "/api/admin/call-analytics?filter=month",
+    "/api/admin/performance?filter=month",
+]
+
+
+def poll(client, url, headers):
+    with count_statements(db.engine) as statements:
+        with timed() as t:
+            for _ in range(ROUNDS):
+                response = client.get(url, headers=headers)
+    return response, statements.count / ROUNDS, t["seconds"] / ROUNDS * 1000
+
+
+def main(users, calls_per_user):
+    app = make_app()
+    with app.app_context():
+        admin, agents = seed_tenant(users=users)
+        seed_activity(agents, calls_per_user)
+
+        client = app.test_client()
+        headers = auth_header(admin.id, "admin")
+
+        print(f"{'endpoint':>40} {'200 ms':>7} {'stmts':>6} {'304 ms':>7} {'stmts':>6} "
+              f"{'bytes':>7} {'gzip':>6} {'br':>6}")
+        for url in DASHBOARDS:
+            full, full_stmts, full_ms = poll(client, url, headers)
+            etag = full.headers["ETag"]
+            revalidated, cond_stmts, cond_ms = poll(client, url, dict(headers, **{"If-None-Match": etag}))
+            assert revalidated.status_code == 304, revalidated.status_code
+
+            sizes = {}
+            for encoding in ("gzip", "br"):
+                response = client.get(url, headers=dict(headers, **{"Accept-Encoding": encoding}))
+                sizes[encoding] = len(response.data)
+
+            print(f"{url:>40} {full_ms:>7.2f} {full_stmts:>6.0f} {cond_ms:>7.2f} {cond_stmts:>6.0f} "
+                  f"{len(full.data):>7} {sizes['gzip']:>6} {sizes['br']:>6}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [200, 50][len(args):]))
@@ -0,0 +1,55 @@
+# benchmarks/bench_export.py
+"""
+Streaming export of a tenant's call history.
+
+    python -m benchmarks.bench_export [calls ...]
+
+For each size: time to first byte, total time, bytes written and the peak
+Python heap while the response is consumed (should stay flat as the size
+grows).
+"""
+import sys
+import tracemalloc
+
+from app.models import db, CallHistory
+from benchmarks.bench_call_analytics import seed_calls
+from benchmarks.common import make_app, seed_tenant, auth_header, timed
+
+
+def consume(client, url, headers):
+    response = client.get(url, headers=headers, buffered=False)
+    body = iter(response.response)
+    with timed() as first:
+        size = len(next(body))
+    for chunk in body:
+        size += len(chunk)
+    response.close()
+    return first["seconds"], size
+
+
+def main(sizes):
+    print(f"{'calls':>9} {'fmt':>7} {'ttfb ms':>8} {'total s':>8} {'MB':>7} {'peak heap MB':>13}")
+    for calls in sizes:
+        app = make_app()
+        with app.app_context():
+            admin, users = seed_tenant(users=50)
+            seed_calls(users, calls)
+            db.session.execute(CallHistory.__table__.update().values(admin_id=admin.id))
+            db.session.commit()
+
+            client = app.test_client()
+            headers = auth_header(admin.id, "admin")
+            for fmt in ("csv", "ndjson"):
+                tracemalloc.start()
+                with timed() as total:
+                    ttfb, size = consume(client, f"/api/admin/all-call-history/export?format={fmt}", headers)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                print(f"{calls:>9} {fmt:>7} {ttfb * 1000:>8.1f} {total['seconds']:>8.2f} "
+                      f"{size / 1e6:>7.1f} {peak / 1e6:>13.1f}")
+            db.session.remove()
+            db.drop_all()
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [50_000, 200_000])
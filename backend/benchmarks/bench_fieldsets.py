@@ -0,0 +1,48 @@
+# benchmarks/bench_fieldsets.py
+"""
+Payload size and time per page of /api/call-history/my, full rows versus
+sparse fieldsets and the columnar shape.
+
+    python -m benchmarks.bench_fieldsets [per_page]
+"""
+import sys
+
+from app.models import db, CallHistory
+from benchmarks.bench_call_analytics import seed_calls
+from benchmarks.common import make_app, seed_tenant, auth_header, timed
+
+ROUNDS = 50
+
+VARIANTS = [
+    ("full", ""),
+    ("mobile fields", "&fields=id,phone_number,call_type,timestamp"),
+    ("mobile columnar", "&fields=id,phone_number,call_type,timestamp&shape=columns"),
+    ("full columnar", "&shape=columns"),
+]
+
+
+def main(per_page):
+    app = make_app()
+    with app.app_context():
+        admin, users = seed_tenant(users=1)
+        seed_calls(users, 5_000)
+        db.session.execute(CallHistory.__table__.update().values(admin_id=admin.id))
+        db.session.commit()
+
+        client = app.test_client()
+        headers = auth_header(users[0].id, "user")
+
+        print(f"{'variant':>16} {'bytes':>9} {'x smaller':>10} {'ms/page':>8}")
+        baseline = None
+        for name, params in VARIANTS:
+            url = f"/api/call-history/my?cursor=&per_page={per_page}{params}"
+            size = len(client.get(url, headers=headers).data)
+            with timed() as t:
+                for _ in range(ROUNDS):
+                    client.get(url, headers=headers)
+            baseline = baseline or size
+            print(f"{name:>16} {size:>9} {baseline / size:>10.2f} {t['seconds'] / ROUNDS * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
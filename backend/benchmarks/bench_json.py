@@ -0,0 +1,85 @@
+# benchmarks/bench_json.py
+"""
+Serialization time for one 200-row call-history page.
+
+    python -m benchmarks.bench_json [rows]
+
+before:   per-value Python iso() strings, Flask's stdlib provider
+stdlib:   raw datetimes, StdlibJSONProvider (the fallback without orjson)
+orjson:   raw datetimes, OrjsonProvider
+"""
+import sys
+from datetime import datetime, timedelta, timezone
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app.serialization import StdlibJSONProvider, orjson
+from benchmarks.common import timed
+
+ROUNDS = 500
+
+
+def old_iso(dt):
+    # The per-module helper this replaced
+    if not dt:
+        return None
+    try:
+        return dt.replace(tzinfo=timezone.utc).isoformat()
+    except Exception:
+        return str(dt)
+
+
+def page(rows, fmt):
+    now = datetime.utcnow()
+    return {
+        "call_history": [
+            {
+                "id": i,
+                "user_id": 7,
+                "phone_number": f"+9198765{i:05d}",
+                "formatted_number": None,
+                "call_type": "incoming",
+                "timestamp": fmt(now - timedelta(minutes=i)),
+                "duration": i % 300,
+                "contact_name": f"Contact {i}",
+                "created_at": fmt(now),
+            }
+            for i in range(rows)
+        ],
+        "meta": {"per_page": rows, "has_next": True, "has_prev": False},
+    }
+
+
+def bench(provider_class, data):
+    app = Flask(__name__)
+    app.json = provider_class(app)
+    with app.app_context():
+        with timed() as t:
+            for _ in range(ROUNDS):
+                body = app.json.response(data).get_data()
+    return t["seconds"] / ROUNDS * 1000, len(body)
+
+
+def main(rows):
+    variants = [
+        ("before", DefaultJSONProvider, lambda: page(rows, old_iso)),
+        ("stdlib", StdlibJSONProvider, lambda: page(rows, lambda dt: dt)),
+    ]
+    if orjson is not None:
+        from app.serialization import OrjsonProvider
+        variants.append(("orjson", OrjsonProvider, lambda: page(rows, lambda dt: dt)))
+
+    print(f"{'variant':>8} {'ms/page':>8} {'bytes':>7}")
+    for name, provider_class, build in variants:
+        # Building the page is part of the cost: that is where iso() ran
+        with timed() as t:
+            for _ in range(ROUNDS):
+                data = build()
+        build_ms = t["seconds"] / ROUNDS * 1000
+        encode_ms, size = bench(provider_class, data)
+        print(f"{name:>8} {build_ms + encode_ms:>8.3f} {size:>7}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
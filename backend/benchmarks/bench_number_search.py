@@ -0,0 +1,73 @@
+# benchmarks/bench_number_search.py
+"""
+Phone number search: raw `phone_number LIKE '%q%'` vs the normalized columns.
+
+    python -m benchmarks.bench_number_search [calls]
+
+Defaults to 500k calls in one tenant on SQLite. For the PostgreSQL/pg_trgm
+numbers point BENCH_DATABASE_URL at a scratch database and pass 10000000.
+"""
+import random
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.ingest import number_columns
+from app.models import db, CallHistory
+from app.number_search import ensure_search_indexes, number_search_filter
+from benchmarks.common import make_app, seed_tenant, timed
+
+SEED_CHUNK = 50_000
+QUERIES = [("4321", "suffix"), ("98765", "contains"), ("00123", "contains")]
+
+
+def seed_numbers(admin, users, calls, seed=5):
+    rnd = random.Random(seed)
+    now = datetime.utcnow()
+    written = 0
+    while written < calls:
+        n = min(SEED_CHUNK, calls - written)
+        rows = []
+        for i in range(n):
+            number = f"+91 {rnd.randrange(10**5):05d}-{rnd.randrange(10**5):05d}"
+            rows.append(dict(
+                user_id=rnd.choice(users).id,
+                admin_id=admin.id,
+                phone_number=number,
+                call_type="incoming",
+                timestamp=now - timedelta(seconds=written + i),
+                **number_columns(number)
+            ))
+        db.session.execute(CallHistory.__table__.insert(), rows)
+        db.session.commit()
+        written += n
+
+
+def run(stmt, repeat=5):
+    best = None
+    for _ in range(repeat):
+        with timed() as t:
+            found = len(db.session.execute(stmt.limit(50)).all())
+        best = t["seconds"] if best is None else min(best, t["seconds"])
+    return found, best * 1000
+
+
+def main(calls):
+    app = make_app()
+    with app.app_context():
+        admin, users = seed_tenant(users=20)
+        seed_numbers(admin, users, calls)
+        ensure_search_indexes(log=lambda msg: None)
+
+        base = select(CallHistory.id).where(CallHistory.admin_id == admin.id)
+        print(f"{calls} calls")
+        print(f"{'query':>18} {'raw LIKE ms':>12} {'indexed ms':>11} {'rows':>5}")
+        for q, match in QUERIES:
+            _, raw_ms = run(base.where(CallHistory.phone_number.like(f"%{q}%")))
+            found, new_ms = run(base.where(number_search_filter(q, match)))
+            print(f"{q + ' ' + match:>18} {raw_ms:>12.2f} {new_ms:>11.2f} {found:>5}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
@@ -0,0 +1,82 @@
+# benchmarks/bench_performance_scores.py
+"""
+Per-user vs batched performance scoring for one admin's users, and the
+cost of saving the scores ("round trips" counts each executemany row).
+
+    python -m benchmarks.bench_performance_scores [users] [calls_per_user]
+
+Exits non-zero if calculate_performance_for_admin() disagrees with
+calculate_performance_for_user() for any user at this scale; the test suite
+checks the same on every run (tests/test_performance_scores.py).
+"""
+import random
+import sys
+from datetime import datetime, timedelta
+
+from app.models import db, Attendance, CallHistory, gen_uuid
+from app.routes.admin import calculate_performance_for_user, calculate_performance_for_admin, save_performance_scores
+from benchmarks.common import make_app, seed_tenant, count_statements, timed
+
+STATUSES = ["on-time", "on-time", "late", "present"]
+
+
+def seed_activity(users, calls_per_user, seed=11):
+    rnd = random.Random(seed)
+    now = datetime.utcnow()
+
+    for i, user in enumerate(users):
+        if i % 10 == 0:
+            continue  # leave some users without any data
+        db.session.execute(CallHistory.__table__.insert(), [
+            {
+                "user_id": user.id,
+                "phone_number": f"+9198{rnd.randrange(10**8):08d}",
+                "call_type": rnd.choice(["incoming", "outgoing", "missed"]),
+                "duration": rnd.choice([0, 0, rnd.randrange(1, 600), None]),
+                "timestamp": now - timedelta(minutes=n),
+            }
+            for n in range(calls_per_user)
+        ])
+        db.session.execute(Attendance.__table__.insert(), [
+            {
+                "id": gen_uuid(),
+                "user_id": user.id,
+                "check_in": now - timedelta(days=d),
+                "status": rnd.choice(STATUSES),
+            }
+            for d in range(rnd.randrange(1, 30))
+        ])
+    db.session.commit()
+
+
+def main(n_users, calls_per_user):
+    app = make_app()
+
+    with app.app_context():
+        admin, users = seed_tenant(users=n_users)
+        seed_activity(users, calls_per_user)
+
+        with count_statements(db.engine) as single_stmts, timed() as single_t:
+            single = {u.id: calculate_performance_for_user(u.id) for u in users}
+
+        with count_statements(db.engine) as batch_stmts, timed() as batch_t:
+            batched = calculate_performance_for_admin(admin.id)
+
+        with count_statements(db.engine) as save_stmts, timed() as save_t:
+            save_performance_scores(batched, admin_id=admin.id)
+            db.session.commit()
+
+        print(f"{'step':>8} {'stmts':>6} {'round trips':>12} {'ms':>9}")
+        for name, stmts, t in (("per-user", single_stmts, single_t), ("batched", batch_stmts, batch_t),
+                               ("save", save_stmts, save_t)):
+            print(f"{name:>8} {stmts.count:>6} {stmts.round_trips:>12} {t['seconds'] * 1000:>9.1f}")
+
+        mismatches = {uid: (single[uid], batched.get(uid)) for uid in single if single[uid] != batched.get(uid)}
+        if mismatches or set(batched) != set(single):
+            raise SystemExit(f"scores disagree: {mismatches}")
+        print(f"scores agree for all {len(single)} users")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [300, 50][len(args):]))
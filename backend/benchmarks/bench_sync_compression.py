@@ -0,0 +1,89 @@
+# benchmarks/bench_sync_compression.py
+"""
+Upload size of POST /api/call-history/sync bodies, raw versus gzip / zstd,
+and what decoding costs the server.
+
+    python -m benchmarks.bench_sync_compression [sizes...]
+
+Payloads look like a phone's call log: a few hundred recurring numbers,
+most of them saved contacts with a formatted number, millisecond timestamps.
+"""
+import gzip
+import json
+import random
+import sys
+import time
+
+from app.compression import zstandard
+from benchmarks.bench_call_sync import CALL_TYPES
+from benchmarks.common import make_app, seed_tenant, auth_header, timed
+
+FIRST_NAMES = ["Asha", "Ravi", "Priya", "Vikram", "Neha", "Arjun", "Kavya", "Rahul", "Meera", "Sanjay"]
+LAST_NAMES = ["Sharma", "Patel", "Iyer", "Reddy", "Gupta", "Nair", "Khan", "Das", "Joshi", "Rao"]
+
+# Rough 3G uplink, for the "upload" column
+UPLINK_BYTES_PER_SECOND = 48_000
+
+
+def make_call_log(size, seed=7):
+    rnd = random.Random(seed)
+    now_ms = int(time.time() * 1000)
+    contacts = []
+    for _ in range(max(1, min(size // 4, 400))):
+        digits = f"{rnd.randrange(6, 10)}{rnd.randrange(10**9):09d}"
+        saved = rnd.random() < 0.7
+        contacts.append({
+            "phone_number": f"+91{digits}",
+            "formatted_number": f"+91 {digits[:5]} {digits[5:]}" if saved else "",
+            "contact_name": f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}" if saved else "",
+        })
+
+    calls = []
+    for i in range(size):
+        call_type = rnd.choice(CALL_TYPES)
+        calls.append(dict(
+            rnd.choice(contacts),
+            call_type=call_type,
+            duration=0 if call_type in ("missed", "rejected") else rnd.randrange(1, 900),
+            timestamp=now_ms - i * rnd.randrange(60_000, 3_600_000),
+        ))
+    return {"call_history": calls}
+
+
+def encodings():
+    yield "identity", lambda raw: raw
+    yield "gzip", lambda raw: gzip.compress(raw, compresslevel=6)
+    if zstandard is not None:
+        yield "zstd", lambda raw: zstandard.ZstdCompressor(level=3).compress(raw)
+
+
+def main(sizes):
+    app = make_app()
+    client = app.test_client()
+
+    print(f"{'calls':>6} {'encoding':>9} {'bytes':>9} {'saved':>7} {'upload s':>9} {'server ms':>10}")
+    with app.app_context():
+        for size in sizes:
+            raw = json.dumps(make_call_log(size)).encode("utf-8")
+
+            for encoding, encode in encodings():
+                # Fresh user per run so every run inserts the whole batch
+                _, (user,) = seed_tenant(users=1, admin_name=f"{encoding} {size}")
+                headers = auth_header(user.id, "user")
+                headers["Content-Type"] = "application/json"
+                if encoding != "identity":
+                    headers["Content-Encoding"] = encoding
+
+                body = encode(raw)
+                with timed() as t:
+                    resp = client.post("/api/call-history/sync", data=body, headers=headers)
+                if resp.status_code != 200:
+                    raise SystemExit(f"sync failed: {resp.status_code} {resp.get_json()}")
+
+                saved = 1 - len(body) / len(raw)
+                print(f"{size:>6} {encoding:>9} {len(body):>9} {saved:>7.1%} "
+                      f"{len(body) / UPLINK_BYTES_PER_SECOND:>9.2f} {t['seconds'] * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main([int(s) for s in sys.argv[1:]] or [500, 5000])
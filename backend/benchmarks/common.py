@@ -0,0 +1,103 @@
+# benchmarks/common.py
+"""
+Shared plumbing for the benchmark scripts.
+
+Run from the backend directory, e.g. `python -m benchmarks.bench_call_sync`.
+Benchmarks use an in-memory SQLite database unless BENCH_DATABASE_URL points
+at a scratch database (never point it at production: tables are created and
+rows are inserted).
+"""
+import os
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from config import Config
+
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = os.environ.get("BENCH_DATABASE_URL", "sqlite://")
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
+
+
+def make_app():
+    from app import create_app
+    from app.models import db
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def seed_tenant(users=1, admin_name="Bench Admin"):
+    """Create a super admin, one admin and `users` users. Returns (admin, [users])."""
+    from app.models import db, SuperAdmin, Admin, User
+
+    sa = SuperAdmin.query.first()
+    if not sa:
+        sa = SuperAdmin(name="Bench Super", email="bench-super@example.com", password_hash="x")
+        db.session.add(sa)
+        db.session.flush()
+
+    n = Admin.query.count()
+    admin = Admin(
+        name=admin_name,
+        email=f"bench-admin-{n}@example.com",
+        password_hash="x",
+        user_limit=users,
+        created_by=sa.id,
+    )
+    db.session.add(admin)
+    db.session.flush()
+
+    members = [
+        User(name=f"Agent {i}", email=f"agent-{admin.id}-{i}@example.com", password_hash="x", admin_id=admin.id)
+        for i in range(users)
+    ]
+    db.session.add_all(members)
+    db.session.commit()
+    return admin, members
+
+
+def auth_header(identity, role):
+    token = create_access_token(identity=str(identity), additional_claims={"role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+class StatementCounter:
+    """
+    `count` is execute/executemany calls; `round_trips` counts each parameter
+    set of an executemany, which is what psycopg2 sends one by one.
+    """
+    def __init__(self):
+        self.count = 0
+        self.round_trips = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.round_trips += len(parameters) if executemany else 1
+
+
+@contextmanager
+def count_statements(engine):
+    """Count DBAPI calls (and executemany parameter sets) issued inside the block."""
+    counter = StatementCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+
+
+@contextmanager
+def timed():
+    result = {}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result["seconds"] = time.perf_counter() - start
@@ -5,3 +5,32 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.environ.get("SECRET_KEY", "super-secret-key")
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "jwt-secret-key")
+
+    # Seconds the before_request subscription check may trust a cached
+    # admin/user state; 0 disables the cache
+    SUBSCRIPTION_CACHE_TTL = int(os.environ.get("SUBSCRIPTION_CACHE_TTL", 60))
+    SUBSCRIPTION_CACHE_SIZE = int(os.environ.get("SUBSCRIPTION_CACHE_SIZE", 10000))
+
+    # Dashboard aggregate cache (app/analytics_cache.py): memory | redis |
+    # fakeredis | none. Entries are invalidated by the tenant's data version;
+    # the TTL only caps their lifetime
+    ANALYTICS_CACHE_BACKEND = os.environ.get("ANALYTICS_CACHE_BACKEND", "memory")
+    ANALYTICS_CACHE_URL = os.environ.get("ANALYTICS_CACHE_URL") or os.environ.get("REDIS_URL")
+    ANALYTICS_CACHE_TTL = int(os.environ.get("ANALYTICS_CACHE_TTL", 300))
+    ANALYTICS_CACHE_SIZE = int(os.environ.get("ANALYTICS_CACHE_SIZE", 2048))
+
+    # Background jobs (see worker.py): idle poll interval, retry backoff
+    # (base * 2^(attempt-1), capped) and how long a claimed job may run
+    # before another worker assumes its worker died and re-queues it
+    JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", 2))
+    JOB_RETRY_BASE_SECONDS = int(os.environ.get("JOB_RETRY_BASE_SECONDS", 30))
+    JOB_RETRY_MAX_SECONDS = int(os.environ.get("JOB_RETRY_MAX_SECONDS", 3600))
+    JOB_LEASE_SECONDS = int(os.environ.get("JOB_LEASE_SECONDS", 1800))
+
+    # Response compression (app/compression.py): smallest body worth
+    # encoding, and the gzip level / brotli quality used for it
+    COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 1024))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get("COMPRESS_GZIP_LEVEL", 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get("COMPRESS_BROTLI_QUALITY", 5))
+    # Largest gzip/zstd sync upload body accepted once inflated
+    SYNC_MAX_DECOMPRESSED_BYTES = int(os.environ.get("SYNC_MAX_DECOMPRESSED_BYTES", 32 * 1024 * 1024))
@@ -134,7 +134,10 @@ class DashboardManager {
     new Chart(ctx, {
       type: 'line',
       data: {
-        labels: ['Mon','Tue','Wed','Thu','Fri','Sat','Sun'],
+        labels: this.stats.performance_trend_days
+          ? this.stats.performance_trend_days.map(d =>
+              new Date(d + 'T00:00:00Z').toLocaleDateString(undefined, { weekday: 'short', timeZone: 'UTC' }))
+          : ['Mon','Tue','Wed','Thu','Fri','Sat','Sun'],
         datasets: [{ 
           label: 'Avg Performance', 
           data: this.stats.performance_trend || [0,0,0,0,0,0,0], 
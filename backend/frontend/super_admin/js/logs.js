@@ -14,13 +14,16 @@ document.addEventListener("DOMContentLoaded", () => {
 });
 
 /* -------------------------------------------------------
-    LOAD LOGS  (BACKEND HAS NO PAGINATION)
+    LOAD LOGS  (newest page; role filter applied by the backend)
 ------------------------------------------------------- */
 async function loadLogs() {
     try {
         let url = `/api/superadmin/logs`;
 
         const filterRole = document.getElementById("logFilter")?.value || "";
+        if (filterRole) {
+            url += `?actor_role=${encodeURIComponent(filterRole)}`;
+        }
 
         const response = await auth.makeAuthenticatedRequest(url);
         const data = await response.json();
@@ -30,14 +33,7 @@ async function loadLogs() {
             return;
         }
 
-        let logs = data.logs || [];
-
-        // Manual filter on frontend — because backend has no filter support
-        if (filterRole) {
-            logs = logs.filter(l => l.actor_role === filterRole);
-        }
-
-        displayLogs(logs);
+        displayLogs(data.logs || []);
 
     } catch (e) {
         console.error("Error loading logs:", e);
@@ -0,0 +1,153 @@
+"""Add call_history.call_fingerprint with a unique index
+
+Existing rows are fingerprinted here, before any sync can run against the
+new index, and rows that turn out to be duplicates of an earlier call are
+deleted. Otherwise a phone re-sending its log would find no fingerprint to
+conflict with and insert every legacy call a second time. The walk goes in
+primary-key chunks; on PostgreSQL each chunk commits on its own instead of
+holding locks across the whole table until the migration ends.
+
+The fingerprint is copied from app/ingest.py as it was at this revision, so
+later changes to the app can't change what this migration does.
+
+Revision ID: 3b7e2a9c41d0
+Revises: safe_inc_update
+Create Date: 2026-10-17
+"""
+import hashlib
+import logging
+import re
+from datetime import timezone
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+log = logging.getLogger('alembic.runtime.migration')
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7e2a9c41d0'
+down_revision = 'safe_inc_update'
+branch_labels = None
+depends_on = None
+
+
+CHUNK_SIZE = 1000
+NON_DIGITS_RE = re.compile(r'\D+')
+
+call_history = sa.table(
+    'call_history',
+    sa.column('id', sa.Integer),
+    sa.column('user_id', sa.Integer),
+    sa.column('phone_number', sa.String),
+    sa.column('call_type', sa.String),
+    sa.column('timestamp', sa.DateTime),
+    sa.column('duration', sa.Integer),
+    sa.column('call_fingerprint', sa.String),
+)
+
+
+def has_column(inspector, table_name, column_name):
+    return column_name in [c['name'] for c in inspector.get_columns(table_name)]
+
+
+def has_index(inspector, table_name, index_name):
+    return index_name in [i['name'] for i in inspector.get_indexes(table_name)]
+
+
+def call_fingerprint(user_id, phone_number, call_type, timestamp, duration):
+    """User, digits-only number, type, second and duration, hashed."""
+    epoch = int(timestamp.replace(tzinfo=timezone.utc).timestamp())
+    digits = NON_DIGITS_RE.sub('', phone_number or '')
+    raw = f"{user_id}|{digits}|{call_type or ''}|{epoch}|{int(duration or 0)}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def fingerprint_chunk(bind, last_id):
+    """
+    Fingerprint the next chunk of rows after `last_id`, deleting duplicates
+    of a row already seen. Returns (last_id, updated, deleted, skipped), or
+    None when no rows are left.
+    """
+    c = call_history.c
+    batch = bind.execute(
+        sa.select(c.id, c.user_id, c.phone_number, c.call_type, c.timestamp, c.duration)
+        .where(c.id > last_id, c.call_fingerprint.is_(None))
+        .order_by(c.id)
+        .limit(CHUNK_SIZE)
+    ).all()
+    if not batch:
+        return None
+
+    pending = {}
+    duplicates = []
+    skipped = 0
+    for row in batch:
+        if row.timestamp is None:
+            skipped += 1
+            continue
+        fp = call_fingerprint(row.user_id, row.phone_number, row.call_type, row.timestamp, row.duration)
+        if fp in pending:
+            duplicates.append(row.id)
+        else:
+            pending[fp] = row.id
+
+    stored = set(bind.execute(sa.select(c.call_fingerprint).where(c.call_fingerprint.in_(list(pending)))).scalars())
+    duplicates.extend(row_id for fp, row_id in pending.items() if fp in stored)
+    changes = {row_id: fp for fp, row_id in pending.items() if fp not in stored}
+
+    if duplicates:
+        bind.execute(sa.delete(call_history).where(c.id.in_(duplicates)))
+    if changes:
+        bind.execute(
+            sa.update(call_history)
+            .where(c.id.in_(list(changes)))
+            .values(call_fingerprint=sa.case(changes, value=c.id))
+        )
+    return batch[-1].id, len(changes), len(duplicates), skipped
+
+
+def fingerprint_legacy_calls(bind):
+    updated = deleted = skipped = 0
+    last_id = 0
+    while True:
+        step = fingerprint_chunk(bind, last_id)
+        if step is None:
+            break
+        last_id, chunk_updated, chunk_deleted, chunk_skipped = step
+        updated += chunk_updated
+        deleted += chunk_deleted
+        skipped += chunk_skipped
+        log.info('call_fingerprint backfill: up to id %s, %s updated, %s duplicates deleted',
+                 last_id, updated, deleted)
+    log.info('call_fingerprint: %s rows fingerprinted, %s duplicates deleted, %s without timestamp',
+             updated, deleted, skipped)
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = inspect(bind)
+
+    if not has_column(inspector, 'call_history', 'call_fingerprint'):
+        op.add_column('call_history', sa.Column('call_fingerprint', sa.String(length=64), nullable=True))
+
+    if not has_index(inspector, 'call_history', 'ix_call_history_call_fingerprint'):
+        op.create_index('ix_call_history_call_fingerprint', 'call_history', ['call_fingerprint'], unique=True)
+
+    if bind.dialect.name == 'postgresql':
+        # Autocommit: every chunk's DELETE and UPDATE commit as they run
+        with op.get_context().autocommit_block():
+            fingerprint_legacy_calls(bind)
+    else:
+        fingerprint_legacy_calls(bind)
+
+
+def downgrade():
+    inspector = inspect(op.get_bind())
+
+    if has_index(inspector, 'call_history', 'ix_call_history_call_fingerprint'):
+        op.drop_index('ix_call_history_call_fingerprint', table_name='call_history')
+
+    if has_column(inspector, 'call_history', 'call_fingerprint'):
+        op.drop_column('call_history', 'call_fingerprint')
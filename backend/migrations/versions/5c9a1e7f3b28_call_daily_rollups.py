@@ -0,0 +1,80 @@
+"""Create call_daily_rollups
+
+Fills it from the existing call history with one INSERT ... SELECT grouped
+by user and day, so dashboards keep their numbers right after the upgrade.
+Calls without a timestamp are counted on their created_at day, as
+app/rollups.py does. `flask rebuild-call-rollups` recomputes them later if
+needed.
+
+Revision ID: 5c9a1e7f3b28
+Revises: 8d41f0c2e6a5
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = '5c9a1e7f3b28'
+down_revision = '8d41f0c2e6a5'
+branch_labels = None
+depends_on = None
+
+
+BACKFILL = """
+    INSERT INTO call_daily_rollups (
+        user_id, day, total_calls, incoming_calls, outgoing_calls, missed_calls,
+        rejected_calls, answered_calls, total_duration, max_duration, updated_at
+    )
+    SELECT
+        user_id,
+        date(COALESCE(timestamp, created_at)),
+        COUNT(*),
+        SUM(CASE WHEN call_type = 'incoming' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN call_type = 'outgoing' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN call_type = 'missed' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN call_type = 'rejected' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN duration > 0 THEN 1 ELSE 0 END),
+        SUM(COALESCE(duration, 0)),
+        MAX(COALESCE(duration, 0)),
+        CURRENT_TIMESTAMP
+    FROM call_history
+    WHERE COALESCE(timestamp, created_at) IS NOT NULL
+    GROUP BY user_id, date(COALESCE(timestamp, created_at))
+"""
+
+
+def upgrade():
+    inspector = inspect(op.get_bind())
+    tables = inspector.get_table_names()
+    if 'call_daily_rollups' in tables:
+        return
+
+    op.create_table('call_daily_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('total_calls', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('incoming_calls', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('outgoing_calls', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('missed_calls', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('rejected_calls', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('answered_calls', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('total_duration', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('max_duration', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_call_daily_rollups_user_id_day', 'call_daily_rollups', ['user_id', 'day'], unique=True)
+
+    if 'call_history' in tables:
+        op.execute(BACKFILL)
+
+
+def downgrade():
+    inspector = inspect(op.get_bind())
+    if 'call_daily_rollups' in inspector.get_table_names():
+        op.drop_index('ix_call_daily_rollups_user_id_day', table_name='call_daily_rollups')
+        op.drop_table('call_daily_rollups')
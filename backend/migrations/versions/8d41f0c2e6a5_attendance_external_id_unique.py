@@ -0,0 +1,63 @@
+"""Unique (user_id, external_id) index on attendances for the sync upsert
+
+Rows that already share a (user_id, external_id) pair keep only the most
+recently created copy as the sync target; the older copies have their
+external_id cleared (the rows themselves are kept).
+
+Revision ID: 8d41f0c2e6a5
+Revises: 3b7e2a9c41d0
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41f0c2e6a5'
+down_revision = '3b7e2a9c41d0'
+branch_labels = None
+depends_on = None
+
+
+def has_index(inspector, table_name, index_name):
+    return index_name in [i['name'] for i in inspector.get_indexes(table_name)]
+
+
+def upgrade():
+    inspector = inspect(op.get_bind())
+
+    if has_index(inspector, 'attendances', 'ix_attendances_user_id_external_id'):
+        return
+
+    op.execute("""
+        UPDATE attendances
+        SET external_id = NULL
+        WHERE external_id IS NOT NULL
+          AND EXISTS (
+              SELECT 1 FROM attendances newer
+              WHERE newer.user_id = attendances.user_id
+                AND newer.external_id = attendances.external_id
+                AND (
+                    COALESCE(newer.created_at, '1970-01-01 00:00:00') > COALESCE(attendances.created_at, '1970-01-01 00:00:00')
+                    OR (
+                        COALESCE(newer.created_at, '1970-01-01 00:00:00') = COALESCE(attendances.created_at, '1970-01-01 00:00:00')
+                        AND newer.id > attendances.id
+                    )
+                )
+          );
+    """)
+
+    op.create_index(
+        'ix_attendances_user_id_external_id',
+        'attendances',
+        ['user_id', 'external_id'],
+        unique=True
+    )
+
+
+def downgrade():
+    inspector = inspect(op.get_bind())
+
+    if has_index(inspector, 'attendances', 'ix_attendances_user_id_external_id'):
+        op.drop_index('ix_attendances_user_id_external_id', table_name='attendances')
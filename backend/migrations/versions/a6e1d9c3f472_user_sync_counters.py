@@ -0,0 +1,59 @@
+"""Per-user call and attendance counters
+
+Adds users.call_count and users.attendance_count and fills them with one
+correlated UPDATE. From here on sync maintains them; the
+reconcile-user-counters command repairs drift.
+
+Revision ID: a6e1d9c3f472
+Revises: f3c8d1a65b94
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6e1d9c3f472'
+down_revision = 'f3c8d1a65b94'
+branch_labels = None
+depends_on = None
+
+
+COUNTERS = [
+    ('call_count', 'call_history'),
+    ('attendance_count', 'attendances'),
+]
+
+
+def has_column(inspector, table_name, column_name):
+    return column_name in {c['name'] for c in inspector.get_columns(table_name)}
+
+
+def upgrade():
+    inspector = inspect(op.get_bind())
+    tables = inspector.get_table_names()
+    if 'users' not in tables:
+        return
+
+    for column, source in COUNTERS:
+        if has_column(inspector, 'users', column):
+            continue
+        op.add_column('users', sa.Column(column, sa.Integer(), nullable=False, server_default='0'))
+
+        if source in tables:
+            op.execute(f"""
+                UPDATE users
+                SET {column} = (SELECT COUNT(*) FROM {source} WHERE {source}.user_id = users.id)
+            """)
+
+
+def downgrade():
+    inspector = inspect(op.get_bind())
+    if 'users' not in inspector.get_table_names():
+        return
+
+    with op.batch_alter_table('users') as batch_op:
+        for column, _ in reversed(COUNTERS):
+            if has_column(inspector, 'users', column):
+                batch_op.drop_column(column)
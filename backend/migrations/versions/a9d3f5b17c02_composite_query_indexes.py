@@ -0,0 +1,78 @@
+"""Composite indexes matching the hot query shapes
+
+- call_history (user_id, timestamp DESC, id DESC): per-user history, keyset paging
+- call_history (user_id, call_type, timestamp): per-user type counts over a window
+- call_history (timestamp): tenant-wide listings ordered by time
+- attendances (user_id, check_in) / (user_id, created_at): per-user listings
+- users (admin_id): every tenant join
+
+Existing indexes are detected by name, so re-running (or upgrading a database
+created by db.create_all()) is a no-op. On PostgreSQL the indexes are built
+CONCURRENTLY so sync writes are not blocked.
+
+Verify the plans afterwards with `FLASK_APP=wsgi flask explain-check`.
+
+Revision ID: a9d3f5b17c02
+Revises: e2b6c9d4a713
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d3f5b17c02'
+down_revision = 'e2b6c9d4a713'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_call_history_user_id_timestamp_id', 'call_history',
+     ['user_id', sa.text('"timestamp" DESC'), sa.text('id DESC')]),
+    ('ix_call_history_user_id_call_type_timestamp', 'call_history', ['user_id', 'call_type', 'timestamp']),
+    ('ix_call_history_timestamp', 'call_history', ['timestamp']),
+    ('ix_attendances_user_id_check_in', 'attendances', ['user_id', 'check_in']),
+    ('ix_attendances_user_id_created_at', 'attendances', ['user_id', 'created_at']),
+    ('ix_users_admin_id', 'users', ['admin_id']),
+]
+
+
+def has_index(inspector, table_name, index_name):
+    return index_name in {ix['name'] for ix in inspector.get_indexes(table_name)}
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    tables = inspector.get_table_names()
+    concurrently = bind.dialect.name == 'postgresql'
+
+    missing = [
+        (name, table, columns) for name, table, columns in INDEXES
+        if table in tables and not has_index(inspector, table, name)
+    ]
+    if not missing:
+        return
+
+    if concurrently:
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with op.get_context().autocommit_block():
+            for name, table, columns in missing:
+                op.create_index(name, table, columns, postgresql_concurrently=True)
+    else:
+        for name, table, columns in missing:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    inspector = inspect(op.get_bind())
+    tables = inspector.get_table_names()
+
+    # ix_call_history_timestamp predates this revision on most databases; keep it
+    for name, table, _ in reversed(INDEXES):
+        if name == 'ix_call_history_timestamp':
+            continue
+        if table in tables and has_index(inspector, table, name):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,70 @@
+"""Denormalize admin_id onto call_history and attendances
+
+Adds the columns, backfills them from users.admin_id with one correlated
+UPDATE per table, then indexes them for tenant-wide range scans.
+
+Revision ID: b4e8c2f06d19
+Revises: a9d3f5b17c02
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4e8c2f06d19'
+down_revision = 'a9d3f5b17c02'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_call_history_admin_id_timestamp', 'call_history', ['admin_id', 'timestamp']),
+    ('ix_attendances_admin_id_check_in', 'attendances', ['admin_id', 'check_in']),
+    ('ix_attendances_admin_id_created_at', 'attendances', ['admin_id', 'created_at']),
+]
+
+
+def has_column(inspector, table_name, column_name):
+    return column_name in {c['name'] for c in inspector.get_columns(table_name)}
+
+
+def has_index(inspector, table_name, index_name):
+    return index_name in {ix['name'] for ix in inspector.get_indexes(table_name)}
+
+
+def upgrade():
+    inspector = inspect(op.get_bind())
+    tables = inspector.get_table_names()
+
+    for table in ('call_history', 'attendances'):
+        if table not in tables:
+            continue
+        if not has_column(inspector, table, 'admin_id'):
+            op.add_column(table, sa.Column('admin_id', sa.Integer(), nullable=True))
+
+        # Correlated UPDATE: one statement, no round trip per row
+        op.execute(f"""
+            UPDATE {table}
+            SET admin_id = (SELECT users.admin_id FROM users WHERE users.id = {table}.user_id)
+            WHERE admin_id IS NULL
+        """)
+
+    for name, table, columns in INDEXES:
+        if table in tables and not has_index(inspector, table, name):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    inspector = inspect(op.get_bind())
+    tables = inspector.get_table_names()
+
+    for name, table, _ in reversed(INDEXES):
+        if table in tables and has_index(inspector, table, name):
+            op.drop_index(name, table_name=table)
+
+    for table in ('attendances', 'call_history'):
+        if table in tables and has_column(inspector, table, 'admin_id'):
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.drop_column('admin_id')
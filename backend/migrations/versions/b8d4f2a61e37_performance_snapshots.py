@@ -0,0 +1,46 @@
+"""Create performance_snapshots
+
+Daily per-user performance scores, written by every recalculation. The
+first snapshot of each tenant appears with its next recalc-performance job.
+
+Revision ID: b8d4f2a61e37
+Revises: a6e1d9c3f472
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8d4f2a61e37'
+down_revision = 'a6e1d9c3f472'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = inspect(op.get_bind())
+    if 'performance_snapshots' in inspector.get_table_names():
+        return
+
+    op.create_table('performance_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('admin_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_performance_snapshots_user_id_day', 'performance_snapshots', ['user_id', 'day'], unique=True)
+    op.create_index('ix_performance_snapshots_admin_id_day', 'performance_snapshots', ['admin_id', 'day'])
+
+
+def downgrade():
+    inspector = inspect(op.get_bind())
+    if 'performance_snapshots' in inspector.get_table_names():
+        op.drop_index('ix_performance_snapshots_admin_id_day', table_name='performance_snapshots')
+        op.drop_index('ix_performance_snapshots_user_id_day', table_name='performance_snapshots')
+        op.drop_table('performance_snapshots')
@@ -0,0 +1,57 @@
+"""Composite indexes for the activity log listings
+
+Newest-first keyset pages of activity_logs, filtered by target, by actor or
+not at all, each read from one index. Built CONCURRENTLY on PostgreSQL.
+
+Revision ID: c2e7a9f4d318
+Revises: b8d4f2a61e37
+Create Date: 2026-10-17
+"""
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2e7a9f4d318'
+down_revision = 'b8d4f2a61e37'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_activity_logs_target_type_target_id_timestamp', ['target_type', 'target_id', 'timestamp', 'id']),
+    ('ix_activity_logs_actor_role_actor_id_timestamp', ['actor_role', 'actor_id', 'timestamp', 'id']),
+    ('ix_activity_logs_timestamp_id', ['timestamp', 'id']),
+]
+
+
+def has_index(inspector, table_name, index_name):
+    return index_name in {ix['name'] for ix in inspector.get_indexes(table_name)}
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if 'activity_logs' not in inspector.get_table_names():
+        return
+
+    missing = [(name, columns) for name, columns in INDEXES if not has_index(inspector, 'activity_logs', name)]
+
+    if bind.dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with op.get_context().autocommit_block():
+            for name, columns in missing:
+                op.create_index(name, 'activity_logs', columns, postgresql_concurrently=True)
+    else:
+        for name, columns in missing:
+            op.create_index(name, 'activity_logs', columns)
+
+
+def downgrade():
+    inspector = inspect(op.get_bind())
+    if 'activity_logs' not in inspector.get_table_names():
+        return
+
+    for name, _ in reversed(INDEXES):
+        if has_index(inspector, 'activity_logs', name):
+            op.drop_index(name, table_name='activity_logs')
@@ -0,0 +1,142 @@
+"""Normalized phone number search columns
+
+Adds call_history.number_digits / number_digits_rev and fills them for the
+existing rows in id chunks (committed one at a time on PostgreSQL), so
+number search keeps finding old calls right after the upgrade. Then adds the
+SQLite-friendly (admin_id, number_digits_rev) suffix index and a substring
+index on number_digits: on PostgreSQL pg_trgm with a GIN trigram index, on
+SQLite an FTS5 trigram table kept in step by triggers.
+
+The normalization and FTS definitions are copied from app/ingest.py and
+app/number_search.py as they were at this revision.
+
+Revision ID: c7f1a4e92b30
+Revises: b4e8c2f06d19
+Create Date: 2026-10-17
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7f1a4e92b30'
+down_revision = 'b4e8c2f06d19'
+branch_labels = None
+depends_on = None
+
+
+TRGM_INDEX = 'ix_call_history_number_digits_trgm'
+SUFFIX_INDEX = 'ix_call_history_admin_id_number_digits_rev'
+FTS_TABLE = 'call_history_number_fts'
+FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "number_digits, content='call_history', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON call_history BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, number_digits) VALUES (new.id, new.number_digits); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON call_history BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, number_digits) VALUES ('delete', old.id, old.number_digits); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF number_digits ON call_history BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, number_digits) VALUES ('delete', old.id, old.number_digits); "
+    f"INSERT INTO {FTS_TABLE}(rowid, number_digits) VALUES (new.id, new.number_digits); END",
+]
+
+NON_DIGITS_RE = re.compile(r'\D+')
+BACKFILL_CHUNK_SIZE = 1000
+
+call_history = sa.table(
+    'call_history',
+    sa.column('id', sa.Integer),
+    sa.column('phone_number', sa.String),
+    sa.column('number_digits', sa.String),
+    sa.column('number_digits_rev', sa.String),
+)
+
+
+def has_column(inspector, table_name, column_name):
+    return column_name in {c['name'] for c in inspector.get_columns(table_name)}
+
+
+def has_index(inspector, table_name, index_name):
+    return index_name in {ix['name'] for ix in inspector.get_indexes(table_name)}
+
+
+def backfill_number_digits(bind):
+    """Digits-only number and its reverse for rows that have none, one UPDATE per chunk."""
+    c = call_history.c
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(c.id, c.phone_number)
+            .where(c.id > last_id, c.number_digits.is_(None))
+            .order_by(c.id)
+            .limit(BACKFILL_CHUNK_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        digits = {row.id: NON_DIGITS_RE.sub('', row.phone_number or '') for row in rows}
+        bind.execute(
+            sa.update(call_history)
+            .where(c.id.in_(list(digits)))
+            .values(
+                number_digits=sa.case(digits, value=c.id),
+                number_digits_rev=sa.case({i: d[::-1] for i, d in digits.items()}, value=c.id),
+            )
+        )
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if 'call_history' not in inspector.get_table_names():
+        return
+
+    for column in ('number_digits', 'number_digits_rev'):
+        if not has_column(inspector, 'call_history', column):
+            op.add_column('call_history', sa.Column(column, sa.String(length=50), nullable=True))
+
+    if bind.dialect.name == 'postgresql':
+        # Each chunk commits on its own instead of locking every row until the end
+        with op.get_context().autocommit_block():
+            backfill_number_digits(bind)
+    else:
+        backfill_number_digits(bind)
+
+    if not has_index(inspector, 'call_history', SUFFIX_INDEX):
+        op.create_index(SUFFIX_INDEX, 'call_history', ['admin_id', 'number_digits_rev'])
+
+    if bind.dialect.name == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS {TRGM_INDEX} "
+            "ON call_history USING gin (number_digits gin_trgm_ops)"
+        )
+    elif bind.dialect.name == 'sqlite':
+        for ddl in FTS_DDL:
+            op.execute(ddl)
+        op.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if 'call_history' not in inspector.get_table_names():
+        return
+
+    if bind.dialect.name == 'postgresql':
+        op.execute(f"DROP INDEX IF EXISTS {TRGM_INDEX}")
+    elif bind.dialect.name == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        op.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    if has_index(inspector, 'call_history', SUFFIX_INDEX):
+        op.drop_index(SUFFIX_INDEX, table_name='call_history')
+
+    with op.batch_alter_table('call_history') as batch_op:
+        for column in ('number_digits_rev', 'number_digits'):
+            if has_column(inspector, 'call_history', column):
+                batch_op.drop_column(column)
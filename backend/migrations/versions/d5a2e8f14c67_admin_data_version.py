@@ -0,0 +1,46 @@
+"""Per-tenant data version on admins
+
+Backs the dashboards' ETag / Last-Modified validators. Existing tenants
+start at version 0, changed now.
+
+Revision ID: d5a2e8f14c67
+Revises: c7f1a4e92b30
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a2e8f14c67'
+down_revision = 'c7f1a4e92b30'
+branch_labels = None
+depends_on = None
+
+
+def has_column(inspector, table_name, column_name):
+    return column_name in {c['name'] for c in inspector.get_columns(table_name)}
+
+
+def upgrade():
+    inspector = inspect(op.get_bind())
+    if 'admins' not in inspector.get_table_names():
+        return
+
+    if not has_column(inspector, 'admins', 'data_version'):
+        op.add_column('admins', sa.Column('data_version', sa.Integer(), nullable=False, server_default='0'))
+    if not has_column(inspector, 'admins', 'data_changed_at'):
+        op.add_column('admins', sa.Column('data_changed_at', sa.DateTime(), nullable=True))
+        op.execute("UPDATE admins SET data_changed_at = CURRENT_TIMESTAMP")
+
+
+def downgrade():
+    inspector = inspect(op.get_bind())
+    if 'admins' not in inspector.get_table_names():
+        return
+
+    with op.batch_alter_table('admins') as batch_op:
+        for column in ('data_changed_at', 'data_version'):
+            if has_column(inspector, 'admins', column):
+                batch_op.drop_column(column)
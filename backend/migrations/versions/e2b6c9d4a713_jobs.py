@@ -0,0 +1,52 @@
+"""Create jobs table for the background worker
+
+Revision ID: e2b6c9d4a713
+Revises: 5c9a1e7f3b28
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b6c9d4a713'
+down_revision = '5c9a1e7f3b28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = inspect(op.get_bind())
+    if 'jobs' in inspector.get_table_names():
+        return
+
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=64), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('admin_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=16), nullable=False, server_default='queued'),
+    sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='3'),
+    sa.Column('run_after', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    sa.Column('locked_by', sa.String(length=128), nullable=True),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['admin_id'], ['admins.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_jobs_status_run_after', 'jobs', ['status', 'run_after'], unique=False)
+    op.create_index(op.f('ix_jobs_admin_id'), 'jobs', ['admin_id'], unique=False)
+
+
+def downgrade():
+    inspector = inspect(op.get_bind())
+    if 'jobs' in inspector.get_table_names():
+        op.drop_index(op.f('ix_jobs_admin_id'), table_name='jobs')
+        op.drop_index('ix_jobs_status_run_after', table_name='jobs')
+        op.drop_table('jobs')
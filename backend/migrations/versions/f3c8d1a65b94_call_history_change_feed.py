@@ -0,0 +1,46 @@
+"""call_history (user_id, id) for the delta-sync change feed
+
+/api/call-history/changes walks one user's rows in id order from a token;
+this index makes each pull a range scan of just the new rows. Built
+CONCURRENTLY on PostgreSQL.
+
+Revision ID: f3c8d1a65b94
+Revises: d5a2e8f14c67
+Create Date: 2026-10-17
+"""
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c8d1a65b94'
+down_revision = 'd5a2e8f14c67'
+branch_labels = None
+depends_on = None
+
+
+INDEX = 'ix_call_history_user_id_id'
+
+
+def has_index(inspector, table_name, index_name):
+    return index_name in {ix['name'] for ix in inspector.get_indexes(table_name)}
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if 'call_history' not in inspector.get_table_names() or has_index(inspector, 'call_history', INDEX):
+        return
+
+    if bind.dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with op.get_context().autocommit_block():
+            op.create_index(INDEX, 'call_history', ['user_id', 'id'], postgresql_concurrently=True)
+    else:
+        op.create_index(INDEX, 'call_history', ['user_id', 'id'])
+
+
+def downgrade():
+    inspector = inspect(op.get_bind())
+    if 'call_history' in inspector.get_table_names() and has_index(inspector, 'call_history', INDEX):
+        op.drop_index(INDEX, table_name='call_history')
@@ -0,0 +1,107 @@
+# tests/conftest.py
+"""
+Fixtures: a fresh app on an in-memory SQLite database per test, and
+helpers to seed a tenant and authenticate as its admin or users.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from config import Config
+
+
+CALL_TYPES = ("incoming", "outgoing", "missed", "rejected")
+ATTENDANCE_STATUSES = ("on-time", "late", "on-time", "absent")
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    JWT_SECRET_KEY = "test-jwt-secret-key-of-at-least-32-bytes"
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
+    ANALYTICS_CACHE_BACKEND = "memory"
+
+
+@pytest.fixture
+def app():
+    from app import create_app
+    from app.models import db
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_tenant(app):
+    """make_tenant(users=n) -> (admin, [users]) under one super admin."""
+    from app.models import db, SuperAdmin, Admin, User
+
+    def make(users=1, name="Test Admin"):
+        sa = SuperAdmin.query.first()
+        if sa is None:
+            sa = SuperAdmin(name="Test Super", email="super@example.com", password_hash="x")
+            db.session.add(sa)
+            db.session.flush()
+
+        n = Admin.query.count()
+        admin = Admin(name=name, email=f"admin-{n}@example.com", password_hash="x", user_limit=users, created_by=sa.id)
+        db.session.add(admin)
+        db.session.flush()
+
+        members = [
+            User(name=f"Agent {i}", email=f"agent-{admin.id}-{i}@example.com", password_hash="x", admin_id=admin.id)
+            for i in range(users)
+        ]
+        db.session.add_all(members)
+        db.session.commit()
+        return admin, members
+
+    return make
+
+
+@pytest.fixture
+def seed_activity(app):
+    """
+    seed_activity(user, calls=n, attendance=m): synced calls of mixed types
+    and durations (some unanswered) and attendance with mixed statuses,
+    written through the sync paths so rollups and counters follow.
+    """
+    from app.ingest import ingest_call_history, upsert_attendance
+    from app.models import db
+
+    def seed(user, calls=0, attendance=0):
+        start = datetime(2026, 10, 1, 9)
+        ingest_call_history(user.id, [{
+            "phone_number": f"+91{user.id:04d}{i:06d}",
+            "call_type": CALL_TYPES[i % len(CALL_TYPES)],
+            "timestamp": (start + timedelta(hours=i)).isoformat(),
+            "duration": (i * 37) % 5 and (i * 37) % 300,
+        } for i in range(calls)], admin_id=user.admin_id)
+        upsert_attendance(user.id, [{
+            "id": f"att-{user.id}-{i}",
+            "check_in": int((start + timedelta(days=i)).timestamp() * 1000),
+            "status": ATTENDANCE_STATUSES[i % len(ATTENDANCE_STATUSES)],
+        } for i in range(attendance)], admin_id=user.admin_id)
+        db.session.commit()
+
+    return seed
+
+
+@pytest.fixture
+def auth_header(app):
+    """auth_header(identity, role) -> Authorization header for a fresh token."""
+    def header(identity, role):
+        token = create_access_token(identity=str(identity), additional_claims={"role": role})
+        return {"Authorization": f"Bearer {token}"}
+
+    return header
@@ -0,0 +1,16 @@
+# tests/test_admin_call_analytics.py
+from app.models import db, Admin
+from app.subscription_cache import get_subscription_state
+
+
+def test_deleted_admin_is_refused_even_while_cached(client, make_tenant, auth_header):
+    admin, _ = make_tenant(users=1)
+    headers = auth_header(admin.id, "admin")
+    assert client.get("/api/admin/call-analytics", headers=headers).status_code == 200
+    get_subscription_state("admin", admin.id)
+
+    # A bulk delete bypasses the ORM events that invalidate the subscription cache
+    db.session.query(Admin).filter(Admin.id == admin.id).delete(synchronize_session=False)
+    db.session.commit()
+
+    assert client.get("/api/admin/call-analytics", headers=headers).status_code == 401
@@ -0,0 +1,30 @@
+# tests/test_admin_performance.py
+from app.models import db
+from app.performance_snapshots import record_performance_snapshots
+
+
+def latest_score(resp):
+    assert resp.status_code == 200
+    return resp.get_json()["trend"][-1]["score"]
+
+
+def test_user_trends_are_not_shared_between_users(client, make_tenant, auth_header):
+    admin, (first, second) = make_tenant(users=2)
+    record_performance_snapshots({first.id: 80.0, second.id: 20.0}, admin.id)
+    db.session.commit()
+    headers = auth_header(admin.id, "admin")
+
+    # Twice each, so the second round is served from the analytics cache
+    for _ in range(2):
+        assert latest_score(client.get(f"/api/admin/performance/trend/users/{first.id}", headers=headers)) == 80.0
+        assert latest_score(client.get(f"/api/admin/performance/trend/users/{second.id}", headers=headers)) == 20.0
+
+
+def test_cached_trend_is_not_served_for_another_tenants_user(client, make_tenant, auth_header):
+    admin, (own,) = make_tenant(users=1)
+    _, (foreign,) = make_tenant(users=1, name="Other Admin")
+    headers = auth_header(admin.id, "admin")
+
+    assert client.get(f"/api/admin/performance/trend/users/{own.id}", headers=headers).status_code == 200
+    resp = client.get(f"/api/admin/performance/trend/users/{foreign.id}", headers=headers)
+    assert resp.status_code == 403
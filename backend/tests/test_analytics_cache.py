@@ -0,0 +1,25 @@
+# tests/test_analytics_cache.py
+from app.analytics_cache import analytics_cache
+from app.models import db
+from app.performance_snapshots import record_performance_snapshots
+
+
+def test_per_user_trend_is_cached_per_user(client, make_tenant, auth_header):
+    admin, (first, second) = make_tenant(users=2)
+    record_performance_snapshots({first.id: 80.0, second.id: 20.0}, admin.id)
+    db.session.commit()
+    headers = auth_header(admin.id, "admin")
+    assert analytics_cache.backend is not None
+
+    bodies = {}
+    for user in (first, second, first, second):
+        resp = client.get(f"/api/admin/performance/trend/users/{user.id}", headers=headers)
+        assert resp.status_code == 200
+        body = resp.get_json()
+        assert body["user_id"] == user.id
+        bodies.setdefault(user.id, body)
+        assert body == bodies[user.id]
+
+    assert bodies[first.id]["trend"] != bodies[second.id]["trend"]
+    assert analytics_cache.stats()["hits"] == 2
+
@@ -0,0 +1,63 @@
+# tests/test_jobs.py
+import time
+
+import pytest
+
+from app.jobs import JOB_HANDLERS, claim_next_job, enqueue_job, job_handler, requeue_stale_jobs, run_job
+from app.models import db, Job
+
+
+@pytest.fixture
+def handlers():
+    registered = dict(JOB_HANDLERS)
+    yield
+    JOB_HANDLERS.clear()
+    JOB_HANDLERS.update(registered)
+
+
+def claim(kind):
+    enqueue_job(kind)
+    db.session.commit()
+    return claim_next_job("worker-a")
+
+
+def test_lease_is_renewed_while_a_long_job_runs(app, handlers):
+    app.config["JOB_LEASE_SECONDS"] = 0.6
+    seen = {}
+
+    @job_handler("slow")
+    def slow():
+        time.sleep(1.5)
+        # What another worker's stale-lease sweep would do at this point
+        seen["requeued"] = requeue_stale_jobs()
+        return {"done": True}
+
+    job = run_job(claim("slow"))
+
+    assert seen["requeued"] == 0
+    assert (job.status, job.result, job.attempts) == (Job.SUCCEEDED, {"done": True}, 1)
+
+
+def test_outcome_is_dropped_once_the_lease_is_lost(app, handlers):
+    @job_handler("overtaken")
+    def overtaken():
+        # The lease expired and another worker re-claimed the job meanwhile
+        db.session.query(Job).update({"locked_by": "worker-b"})
+        db.session.commit()
+        return {"done": True}
+
+    job = run_job(claim("overtaken"))
+
+    assert (job.status, job.locked_by, job.result) == (Job.RUNNING, "worker-b", None)
+
+
+def test_failure_is_not_recorded_once_the_lease_is_lost(app, handlers):
+    @job_handler("overtaken_then_failing")
+    def overtaken_then_failing():
+        db.session.query(Job).update({"locked_by": "worker-b"})
+        db.session.commit()
+        raise RuntimeError("boom")
+
+    job = run_job(claim("overtaken_then_failing"))
+
+    assert (job.status, job.locked_by, job.last_error) == (Job.RUNNING, "worker-b", None)
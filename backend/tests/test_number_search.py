@@ -0,0 +1,21 @@
+# tests/test_number_search.py
+from app.ingest import number_columns
+from app.models import db, CallHistory
+from app.number_search import number_search_filter
+
+
+def search(term, match="contains"):
+    return sorted(c.phone_number for c in CallHistory.query.filter(number_search_filter(term, match)))
+
+
+def test_number_search_ignores_formatting(make_tenant):
+    _, (user,) = make_tenant(users=1)
+    for number in ("+91 98765-43210", "+91 12345-00123", "555-0199"):
+        db.session.add(CallHistory(user_id=user.id, phone_number=number, call_type="incoming", **number_columns(number)))
+    db.session.commit()
+
+    assert search("98765 43210") == ["+91 98765-43210"]
+    assert search("0012") == ["+91 12345-00123"]
+    assert search("55") == ["555-0199"]
+    assert search("0199", "suffix") == ["555-0199"]
+    assert search("9876", "suffix") == []
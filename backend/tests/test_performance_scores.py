@@ -0,0 +1,32 @@
+# tests/test_performance_scores.py
+from app.models import db, User
+from app.routes.admin import calculate_performance_for_admin, calculate_performance_for_user, save_performance_scores
+
+
+def test_batched_scores_match_the_per_user_scorer(make_tenant, seed_activity):
+    admin, users = make_tenant(users=6)
+    # (calls, attendance): busy, calls only, attendance only, a single
+    # unanswered call, and two users with no activity at all
+    activity = [(40, 12), (17, 0), (0, 7), (1, 0), (0, 0), (0, 0)]
+    for user, (calls, attendance) in zip(users, activity):
+        seed_activity(user, calls=calls, attendance=attendance)
+    _, (other,) = make_tenant(users=1, name="Other Admin")
+    seed_activity(other, calls=5, attendance=2)
+
+    batched = calculate_performance_for_admin(admin.id)
+
+    assert batched == {user.id: calculate_performance_for_user(user.id) for user in users}
+    assert batched[users[4].id] == batched[users[5].id] == 0
+    assert len(set(batched.values())) > 2
+
+
+def test_saved_scores_are_written_per_user(make_tenant, seed_activity):
+    admin, users = make_tenant(users=3)
+    for i, user in enumerate(users):
+        seed_activity(user, calls=10 * i, attendance=3 * i)
+
+    scores = calculate_performance_for_admin(admin.id)
+    save_performance_scores(scores, admin_id=admin.id)
+    db.session.commit()
+
+    assert {u.id: u.performance_score for u in User.query.filter_by(admin_id=admin.id)} == scores
@@ -0,0 +1,24 @@
+# tests/test_rollups.py
+from datetime import date, datetime
+
+from app.models import db, CallDailyRollup, CallHistory
+from app.rollups import rebuild_call_rollups
+
+
+def test_rebuild_counts_calls_without_timestamp_on_their_created_day(make_tenant):
+    _, (user,) = make_tenant(users=1)
+    db.session.add_all([
+        CallHistory(user_id=user.id, phone_number="+911", call_type="incoming", duration=30,
+                    timestamp=datetime(2026, 10, 1, 9), created_at=datetime(2026, 10, 2)),
+        CallHistory(user_id=user.id, phone_number="+912", call_type="missed", duration=0,
+                    timestamp=None, created_at=datetime(2026, 10, 2, 12)),
+    ])
+    db.session.commit()
+
+    rebuild_call_rollups(user_ids=[user.id], log=lambda msg: None)
+
+    rollups = {r.day: r for r in CallDailyRollup.query.filter_by(user_id=user.id)}
+    assert sorted(rollups) == [date(2026, 10, 1), date(2026, 10, 2)]
+    assert (rollups[date(2026, 10, 1)].total_calls, rollups[date(2026, 10, 1)].answered_calls) == (1, 1)
+    assert (rollups[date(2026, 10, 2)].total_calls, rollups[date(2026, 10, 2)].missed_calls) == (1, 1)
+    assert sum(r.total_calls for r in rollups.values()) == CallHistory.query.filter_by(user_id=user.id).count()
@@ -0,0 +1,28 @@
+# tests/test_user_analytics.py
+from sqlalchemy import event
+
+from app.models import db
+from app.routes.admin import calculate_performance_for_user
+
+
+def test_user_analytics_scores_from_rollups_without_scanning_calls(client, make_tenant, seed_activity, auth_header):
+    admin, (user,) = make_tenant(users=1)
+    seed_activity(user, calls=23, attendance=9)
+    expected = calculate_performance_for_user(user.id)
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        resp = client.get(f"/api/admin/user-analytics/{user.id}", headers=auth_header(admin.id, "admin"))
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+
+    assert resp.status_code == 200
+    analytics = resp.get_json()["analytics"]
+    assert analytics["calls"]["total_calls"] == 23
+    assert analytics["performance"]["score"] == expected
+    assert not [s for s in statements if "FROM call_history" in s]
@@ -0,0 +1,37 @@
+"""
+Background job worker. Runs next to the web process:
+
+    python worker.py            # poll forever
+    python worker.py --burst    # drain due jobs, then exit (cron-friendly)
+"""
+import argparse
+import signal
+
+from app import create_app
+from app.jobs import run_worker
+
+app = create_app()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued background jobs.")
+    parser.add_argument("--burst", action="store_true", help="Exit once no job is due.")
+    parser.add_argument("--poll-interval", type=float, default=None, help="Seconds to sleep when idle.")
+    args = parser.parse_args()
+
+    stopping = []
+
+    def request_stop(signum, frame):
+        # Finish the running job, then exit
+        stopping.append(signum)
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    with app.app_context():
+        ran = run_worker(poll_interval=args.poll_interval, burst=args.burst, should_stop=lambda: bool(stopping))
+        app.logger.info("Worker stopped after %s jobs", ran)
+
+
+if __name__ == "__main__":
+    main()